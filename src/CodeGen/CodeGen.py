@@ -1,12 +1,1331 @@
+"""
+Code generation lowers the analysed ASTs into LLVM IR (via llvmlite), with one LLVM module per S++ module. It runs after
+semantic analysis, so every expression can be type-inferred, every call resolves to a single overload, and the scopes
+created during analysis hold the symbols that the function bodies use.
+
+The ASTs have already been reduced (see AstReduction), so every function is a "call_[ref|mut|one]" method on the
+super-imposition of a "__MOCK_" overload class. Each of these methods is lowered into an LLVM function, named by its
+module, owner type, function name and overload index, ie "main.Point.norm1#0". Classes are lowered into identified LLVM
+struct types, with one element per attribute, in the order the attributes are declared in.
+
+The overload classes themselves are erased: they have no attributes, and every call is resolved to an overload
+statically, so no struct type or instance ("let f = __MOCK_f {}") is emitted for them. A function name used as a value
+is lowered into the (zero-sized) value of its overload class, whose struct type is only created for that use.
+
+The std types that have no attributes are lowered into LLVM primitive types:
+- std.Num  -> double
+- std.Bool -> i1
+- std.Str  -> i8*
+- std.Void -> void
+
+Parameters passed by reference ("&" or "&mut") are lowered into pointers to the argument, and everything else is passed
+by value. Local variables are allocated on the stack, in the entry block of the function, so that LLVM can promote them
+into registers.
+
+Objects (struct initialisers) that don't escape the function creating them are constructed in place, in the stack slot
+of the variable or moved argument holding them, and objects that escape are built as values (see EscapeAnalysis).
+Nothing is allocated on the heap. With COUNT_ALLOCATIONS, every object created at runtime is counted, per module, by
+whether it escapes, and the counts are read back after a "--run".
+
+Expressions on literals are folded into literals before any code is generated (see ConstantFolding).
+
+Generic functions are monomorphised: before any code is generated, every module is walked for the concrete
+instantiations that the program calls, ie "f[std.Num]", which are then generated once each, with the generic parameters
+substituted. Each instantiation is named after the generic function and the canonical names of its generic arguments,
+ie "main.f#0[std.Num]".
+"""
+
+from __future__ import annotations
+
+import ctypes
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
 import llvmlite.ir as ll
 import llvmlite.binding as llvm
 
+from src.CodeGen.ConstantFolding import ConstantFolding
+from src.CodeGen.EscapeAnalysis import EscapeAnalysis
+from src.Compiler.MemoryReport import MemoryReport
+from src.Compiler.TimeReport import TimeReport
+from src.Compiler.Trace import Trace
+from src.LexicalAnalysis.Lexer import Lexer
+from src.LexicalAnalysis.Tokens import TokenType
+from src.SemanticAnalysis2.CommonTypes import CommonTypes
+from src.SemanticAnalysis2.ModuleTree import ModuleTree
+from src.SemanticAnalysis2.SymbolTable import Scope, ScopeHandler, SymbolTypes
+from src.SemanticAnalysis2.TypeInference import TypeInfer
 from src.SyntacticAnalysis import Ast
+from src.SyntacticAnalysis.Parser import ErrFmt
+
+
+class CodeGenFunction:
+    # The state of the function currently being generated: the LLVM function, the builder for the current position in
+    # the body, a second builder for allocating variables in the entry block, the addresses of the local variables
+    # (keyed by their symbol), and the return type of the function.
+    function: ll.Function
+    builder: ll.IRBuilder
+    alloca_builder: ll.IRBuilder
+    variables: dict[int, ll.Value]
+    return_type: Ast.TypeAst
+
+    def __init__(self, function: ll.Function, return_type: Ast.TypeAst):
+        # Variables are allocated in the entry block, so that variables declared in loops don't grow the stack on every
+        # iteration, and so that the "mem2reg" pass can promote them into registers. The body starts in its own block,
+        # which the entry block branches to once the function is complete.
+        self.function = function
+        self.alloca_builder = ll.IRBuilder(function.append_basic_block("entry"))
+        self.builder = ll.IRBuilder(function.append_basic_block("body"))
+        self.variables = {}
+        self.return_type = return_type
+
+    def alloca(self, ty: ll.Type, name: str) -> ll.Value:
+        return self.alloca_builder.alloca(ty, name=name)
+
+    def finish(self) -> None:
+        self.alloca_builder.branch(self.function.basic_blocks[1])
+
+
+@dataclass
+class Instantiation:
+    # A concrete instantiation of a generic function: its canonical name, the generic prototype, the concrete type bound
+    # to each generic parameter, the module that generates it (the module declaring the generic function), and the
+    # number of calls that requested it.
+    name: str
+    fn_proto: Ast.SupMethodPrototypeAst
+    generic_map: dict[Ast.IdentifierAst, Ast.TypeAst]
+    module: str
+    requests: int
+
+
+@dataclass
+class CompiledModule:
+    # The result of compiling a module: the generated and optimised IR, the pass timing report, the object file, how
+    # many calls of each kind were generated, and how many objects were created by where they live. The IR and the
+    # counts aren't available for modules whose object file was loaded from the cache.
+    name: str
+    ir: Optional[str]
+    optimised_ir: Optional[str]
+    pass_timings: str
+    object_code: Optional[bytes]
+    call_counts: dict[str, int]
+    object_counts: dict[str, int]
 
 
 class CodeGen:
+    # The number of processes to compile modules in. Each module is compiled independently once the names of all the
+    # functions are known.
+    JOBS = 1
+    SNAPSHOT = None
+
+    # The directory that object files are cached in, keyed by the hash of everything the object file depends on.
+    CACHE_DIR = "_out/cache"
+
+    # The mangled name of every function, keyed by the id of its "call_[ref|mut|one]" prototype. The names are assigned
+    # for every module before any code is generated, so that calls to functions in other modules can be declared.
+    FUNCTION_NAMES: dict[int, str] = {}
+
+    # Every "call_[ref|mut|one]" prototype, with the name of the module that declares it, keyed by the id of the
+    # prototype.
+    FUNCTIONS: dict[int, tuple[str, Ast.SupMethodPrototypeAst]] = {}
+
+    # The instantiations of generic functions that the program needs, keyed by their canonical name, found by the
+    # monomorphisation stage before any code is generated. Each is generated once, by the module that declares the
+    # generic function, and only declared by the modules that call it. While an instantiation is being walked or
+    # generated, the types bound to its generic parameters are in GENERIC_MAP, which every type is substituted through.
+    INSTANTIATIONS: dict[str, Instantiation] = {}
+    PENDING_INSTANTIATIONS: list[Instantiation] = []
+    GENERIC_MAP: dict[Ast.IdentifierAst, Ast.TypeAst] = {}
+
+    # The LLVM types of the std types that are lowered into primitives, keyed by the class scope of the type.
+    BUILTIN_TYPES: dict[Scope, ll.Type] = {}
+
+    # The module being generated, and the struct types created in it, keyed by the class scope of the type. Each LLVM
+    # module has its own context, so struct types are created per module.
+    MODULE: Optional[ll.Module] = None
+    STRUCT_TYPES: dict[Scope, ll.Type] = {}
+
+    # The number of calls generated in the module being generated, by kind: direct calls to a statically selected
+    # function, indirect calls through a function pointer, and operator calls lowered into instructions. Every overload
+    # is selected by the analysis, and calling function values isn't accepted by the analysis yet, so there are no
+    # indirect calls for now.
+    CALL_COUNTS: dict[str, int] = {}
+
+    # Moved aggregates (struct and tuple values passed by value) are passed as a pointer to the moved-from value rather
+    # than copied, as the caller can't use a value once it's been moved. This can be turned off to compare against
+    # copying them (see tst/bench_struct_passing.py). The attributes are given to every pointer parameter, and the
+    # exclusive ones only to the pointers that nothing else can access during the call ("&mut" borrows and moves).
+    MOVE_BY_POINTER = True
+    POINTER_ATTRIBUTES = ["nonnull", "captures(none)"]
+    EXCLUSIVE_POINTER_ATTRIBUTES = ["noalias"]
+
+    # The number of objects created in the module being generated, by where they live: constructed in place in a stack
+    # slot, built as a value that escapes the function, or erased (the overload class instances bound to function
+    # names). With COUNT_ALLOCATIONS, each object created at runtime also increments a counter global in its
+    # module, named "<module>.allocations.<stack|escaping>".
+    OBJECT_COUNTS: dict[str, int] = {}
+    COUNT_ALLOCATIONS = False
+
+    # The target machine for each optimisation level is created on first use, as initializing the native target is slow.
+    TARGET_MACHINES: dict[int, llvm.TargetMachine] = {}
+
+    # The execution engines for the "--run" mode, per optimisation level, and the modules the last run added to them.
+    # The engines are kept between compilations in the same process, so that only the first run pays for creating one.
+    ENGINES: dict[int, llvm.ExecutionEngine] = {}
+    ENGINE_MODULES: dict[int, list[llvm.ModuleRef]] = {}
+
+    # The pipeline tuning options for each "-O" level. Level 0 runs no IR passes at all. Level 1 only inlines very small
+    # functions and doesn't vectorize, level 2 matches LLVM's default pipeline, and level 3 inlines more aggressively.
+    OPT_LEVELS = {
+        0: {"inlining_threshold": 0, "loop_vectorization": False, "slp_vectorization": False, "loop_unrolling": False, "loop_interleaving": False},
+        1: {"inlining_threshold": 75, "loop_vectorization": False, "slp_vectorization": False, "loop_unrolling": False, "loop_interleaving": False},
+        2: {"inlining_threshold": 225, "loop_vectorization": True, "slp_vectorization": True, "loop_unrolling": True, "loop_interleaving": True},
+        3: {"inlining_threshold": 250, "loop_vectorization": True, "slp_vectorization": True, "loop_unrolling": True, "loop_interleaving": True},
+    }
+
+    # The binary operators on std.Num and std.Bool that are lowered straight into LLVM instructions, rather than into
+    # calls to the operator methods in the std library.
+    NUM_INTRINSICS = {
+        "add": lambda b, l, r: b.fadd(l, r),
+        "sub": lambda b, l, r: b.fsub(l, r),
+        "mul": lambda b, l, r: b.fmul(l, r),
+        "div": lambda b, l, r: b.fdiv(l, r),
+        "rem": lambda b, l, r: b.frem(l, r),
+        "eq": lambda b, l, r: b.fcmp_ordered("==", l, r),
+        "ne": lambda b, l, r: b.fcmp_unordered("!=", l, r),
+        "lt": lambda b, l, r: b.fcmp_ordered("<", l, r),
+        "le": lambda b, l, r: b.fcmp_ordered("<=", l, r),
+        "gt": lambda b, l, r: b.fcmp_ordered(">", l, r),
+        "ge": lambda b, l, r: b.fcmp_ordered(">=", l, r),
+    }
+
+    BOOL_INTRINSICS = {
+        "and": lambda b, l, r: b.and_(l, r),
+        "or": lambda b, l, r: b.or_(l, r),
+        "eq": lambda b, l, r: b.icmp_unsigned("==", l, r),
+        "ne": lambda b, l, r: b.icmp_unsigned("!=", l, r),
+    }
+
+    @staticmethod
+    def prepare(mods: list[tuple[Scope, Ast.ProgramAst]], s: ScopeHandler, instantiations: Optional[dict[str, Instantiation]] = None) -> None:
+        # Name every function in every module, map the std types onto the LLVM primitive types, and fold the constant
+        # expressions and find the instantiations of the generic functions (unless this has already been done, ie by the
+        # main process for a worker). This is done before any module is generated, so the modules can then be generated
+        # in any order (or in different processes).
+        s.switch_to_global_scope()
+        CodeGen.FUNCTION_NAMES = {}
+        CodeGen.FUNCTIONS = {}
+        CodeGen.BUILTIN_TYPES = {
+            s.global_scope.get_child_scope(CommonTypes.num(s)): ll.DoubleType(),
+            s.global_scope.get_child_scope(CommonTypes.bool(s)): ll.IntType(1),
+            s.global_scope.get_child_scope(CommonTypes.str(s)): ll.IntType(8).as_pointer(),
+            s.global_scope.get_child_scope(CommonTypes.void(s)): ll.VoidType()}
+
+        for scope, mod in mods:
+            CodeGen.name_functions(mod.module.body.members, str(mod.module.identifier), str(mod.module.identifier))
+
+        if instantiations is None:
+            ConstantFolding.fold([mod for scope, mod in mods])
+            CodeGen.monomorphise(s)
+        else:
+            CodeGen.INSTANTIATIONS = instantiations
+
+    @staticmethod
+    def compile(mods: list[tuple[Scope, Ast.ProgramAst]], s: ScopeHandler, opt_level: int, emit_objects: bool = True) -> list[CompiledModule]:
+        # Generate, optimise and (optionally) emit the object file for each module. Modules whose object file is in the
+        # cache are skipped entirely. The rest are compiled in a process pool when there is more than one job, with each
+        # worker using its own LLVM context. The results are in the same order as the modules, and the first error (in
+        # module order) is reported, regardless of how the work was scheduled.
+        with TimeReport.phase("codegen"):
+            CodeGen.prepare(mods, s)
+        keys = CodeGen.cache_keys(mods, opt_level) if emit_objects else [None] * len(mods)
+        compiled = [CodeGen.load_cached_object(mod, key) for (scope, mod), key in zip(mods, keys)]
+        indexes = [i for i, compiled_module in enumerate(compiled) if compiled_module is None]
+
+        if CodeGen.JOBS > 1 and len(indexes) > 1:
+            jobs = min(CodeGen.JOBS, len(indexes))
+            with TimeReport.phase("codegen"), ProcessPoolExecutor(max_workers=jobs, initializer=CodeGen.init_module_worker, initargs=((mods, s, opt_level, emit_objects, CodeGen.INSTANTIATIONS),)) as pool:
+                results = list(pool.map(CodeGen.compile_module_worker, indexes))
+        else:
+            results = [(None, CodeGen.compile_module(mods[i], s, opt_level, emit_objects), []) for i in indexes]
+        s.switch_to_global_scope()
+
+        for i, (error, compiled_module, events) in zip(indexes, results):
+            Trace.merge(events)
+            if error:
+                raise SystemExit(error)
+            compiled[i] = compiled_module
+            if keys[i]:
+                CodeGen.store_cached_object(compiled_module, keys[i])
+        MemoryReport.snapshot("codegen", [mod for _, mod in mods], s)
+        return compiled
+
+    @staticmethod
+    def compile_module(mod: tuple[Scope, Ast.ProgramAst], s: ScopeHandler, opt_level: int, emit_objects: bool) -> CompiledModule:
+        scope, ast = mod
+        with TimeReport.phase("codegen", str(ast.module.identifier)):
+            module = CodeGen.generate_module(ast, scope, s, is_root=scope is s.global_scope)
+            with Trace.span("parse IR", "codegen", module=module.name):
+                llvm_module = CodeGen.parse(module)
+            with Trace.span("optimise", "codegen", module=module.name, opt_level=opt_level):
+                pass_timings = CodeGen.optimise(llvm_module, opt_level)
+            with Trace.span("emit object", "codegen", module=module.name):
+                object_code = CodeGen.emit_object(llvm_module, opt_level) if emit_objects else None
+        return CompiledModule(module.name, str(module), str(llvm_module), pass_timings, object_code, CodeGen.CALL_COUNTS, CodeGen.OBJECT_COUNTS)
+
+    @staticmethod
+    def init_module_worker(snapshot: tuple[list[tuple[Scope, Ast.ProgramAst]], ScopeHandler, int, bool, dict[str, Instantiation]]):
+        # Each worker names the functions itself, as the names are keyed by the ids of the worker's copies of the ASTs.
+        # The instantiations are pickled along with the ASTs, so they refer to the worker's copies of the prototypes.
+        # Workers don't record phases, as the time report is only kept by the main process.
+        TimeReport.stop()
+        Trace.take()
+        Trace.name_process("codegen worker")
+        CodeGen.SNAPSHOT = snapshot
+        mods, s, opt_level, emit_objects, instantiations = snapshot
+        CodeGen.prepare(mods, s, instantiations)
+
+    @staticmethod
+    def compile_module_worker(index: int) -> tuple[Optional[str], Optional[CompiledModule], list[dict]]:
+        # Errors are returned as diagnostics rather than raised, so the main process can report the first one in order.
+        # The spans traced while compiling the module are returned with it.
+        mods, s, opt_level, emit_objects, instantiations = CodeGen.SNAPSHOT
+        try:
+            return None, CodeGen.compile_module(mods[index], s, opt_level, emit_objects), Trace.take()
+        except SystemExit as e:
+            return str(e.code), None, Trace.take()
+
+    @staticmethod
+    def cache_keys(mods: list[tuple[Scope, Ast.ProgramAst]], opt_level: int) -> list[str]:
+        # The object file of a module depends on the module's source, the interfaces (types and function signatures) of
+        # every other module it can use, and on how it was compiled, which includes the source of the whole compiler, as
+        # the analysis decides the overloads and types that the code generation uses. Function bodies in other modules
+        # don't matter, as modules are compiled separately. Only the modules that the main module references are loaded,
+        # and a module can use any other loaded module, so the interfaces of all the loaded modules are part of the key.
+        # A module also generates the instantiations of its generic functions that other modules call, so these are part
+        # of its key too.
+        compiler = hashlib.sha256()
+        for path, dirs, files in sorted(os.walk(os.path.dirname(os.path.dirname(__file__)))):
+            for name in sorted(file for file in files if file.endswith(".py")):
+                compiler.update(name.encode())
+                compiler.update(open(os.path.join(path, name), "rb").read())
+        compiler = compiler.hexdigest()
+        environment = f"{compiler}:{llvm.get_process_triple()}:{llvm.llvm_version_info}:O{opt_level}:{CodeGen.MOVE_BY_POINTER}:{CodeGen.COUNT_ALLOCATIONS}"
+        interfaces = [CodeGen.interface_hash(mod.module.body.members) for scope, mod in mods]
+
+        keys = []
+        for i, (scope, mod) in enumerate(mods):
+            key = hashlib.sha256(environment.encode())
+            key.update(open(ModuleTree.ROOT + mod.module.identifier.as_file_path(), "rb").read())
+            for interface in interfaces[:i] + interfaces[i + 1:]:
+                key.update(interface.encode())
+            for instantiation in CodeGen.INSTANTIATIONS.values():
+                if instantiation.module == str(mod.module.identifier):
+                    key.update(instantiation.name.encode())
+            keys.append(key.hexdigest())
+        return keys
+
+    @staticmethod
+    def interface_hash(members: list[Ast.ModuleMemberAst | Ast.SupMemberAst]) -> str:
+        # Hash the parts of the module that other modules' code depends on: the classes (their struct layouts), the
+        # super-impositions, and the signatures of their methods, in order (as the order determines the overload names).
+        interface = hashlib.sha256()
+        for member in members:
+            match member:
+                case Ast.SupMethodPrototypeAst():
+                    interface.update(f"fn {member.identifier}[{', '.join(map(str, member.generic_parameters))}]({', '.join(map(str, member.parameters))}) -> {member.return_type}".encode())
+                case Ast.SupPrototypeNormalAst():
+                    interface.update(f"sup {member.identifier} {{{CodeGen.interface_hash(member.body.members)}}}".encode())
+                case Ast.ClassPrototypeAst() | Ast.EnumPrototypeAst() | Ast.LetStatementAst() | Ast.SupTypedefAst():
+                    interface.update(str(member).encode())
+        return interface.hexdigest()
+
+    @staticmethod
+    def load_cached_object(ast: Ast.ProgramAst, key: Optional[str]) -> Optional[CompiledModule]:
+        path = os.path.join(CodeGen.CACHE_DIR, f"{key}.o")
+        if key is None or not os.path.exists(path):
+            return None
+        return CompiledModule(str(ast.module.identifier), None, None, "", open(path, "rb").read(), {}, {})
+
+    @staticmethod
+    def store_cached_object(compiled_module: CompiledModule, key: str) -> None:
+        # Write to a temporary file first, so that an interrupted compilation never leaves a partial object file behind.
+        os.makedirs(CodeGen.CACHE_DIR, exist_ok=True)
+        path = os.path.join(CodeGen.CACHE_DIR, f"{key}.o")
+        open(path + ".tmp", "wb").write(compiled_module.object_code)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def name_functions(members: list[Ast.ModuleMemberAst | Ast.SupMemberAst], prefix: str, module: str) -> None:
+        # The overload index is counted per function name, per owner, so overloads of the same function get unique
+        # names. The "__MOCK_" super-impositions hold the overloads, and any other super-imposition holds methods, whose
+        # overloads are in nested "__MOCK_" super-impositions.
+        overload_counts = {}
+        for member in members:
+            if not isinstance(member, Ast.SupPrototypeNormalAst):
+                continue
+
+            owner = str(member.identifier)
+            if owner.startswith("__MOCK_"):
+                function_name = owner[len("__MOCK_"):]
+                for method in [m for m in member.body.members if isinstance(m, Ast.SupMethodPrototypeAst)]:
+                    index = overload_counts.get(function_name, 0)
+                    overload_counts[function_name] = index + 1
+                    CodeGen.FUNCTION_NAMES[id(method)] = f"{prefix}.{function_name}#{index}"
+                    CodeGen.FUNCTIONS[id(method)] = (module, method)
+            else:
+                CodeGen.name_functions(member.body.members, f"{prefix}.{owner}", module)
+
+    @staticmethod
+    def monomorphise(s: ScopeHandler) -> None:
+        # Find every instantiation of a generic function that the program needs. The bodies of the non-generic functions
+        # are walked for calls to generic functions, and the body of each new instantiation is then walked in turn (with
+        # its generic parameters substituted), until no new instantiations are found. Instantiations are deduplicated by
+        # their canonical name, so each is generated once, however many calls (in however many modules) request it.
+        CodeGen.INSTANTIATIONS = {}
+        CodeGen.PENDING_INSTANTIATIONS = []
+        for module, fn_proto in CodeGen.FUNCTIONS.values():
+            if not fn_proto.generic_parameters:
+                CodeGen.collect_function(fn_proto, s)
+
+        while CodeGen.PENDING_INSTANTIATIONS:
+            instantiation = CodeGen.PENDING_INSTANTIATIONS.pop(0)
+            CodeGen.GENERIC_MAP = instantiation.generic_map
+            CodeGen.collect_function(instantiation.fn_proto, s)
+        CodeGen.GENERIC_MAP = {}
+        s.switch_to_global_scope()
+
+    @staticmethod
+    def collect_function(ast: Ast.SupMethodPrototypeAst, s: ScopeHandler) -> None:
+        # Walk the body of a function for calls to generic functions. The nested scopes are entered in the same order as
+        # the code generator enters them, and are rewound first, as the body of a generic function is walked once per
+        # instantiation.
+        s.next_scope(ast)
+        s.rewind_scope()
+        CodeGen.collect_statements(ast.body.statements, s)
+        s.prev_scope()
+
+    @staticmethod
+    def collect_statements(asts: list[Ast.StatementAst], s: ScopeHandler) -> None:
+        for statement in asts:
+            match statement:
+                case Ast.TypedefStatementAst(): pass
+                case Ast.ReturnStatementAst() | Ast.LetStatementAst(): CodeGen.collect_expression(statement.value, s)
+                case _: CodeGen.collect_expression(statement, s)
+
+    @staticmethod
+    def collect_expression(ast: Optional[Ast.ExpressionAst], s: ScopeHandler) -> None:
+        # Only the expressions that the code generator lowers are walked into; anything else is reported as unsupported
+        # when it is generated.
+        match ast:
+            case Ast.TupleLiteralAst():
+                [CodeGen.collect_expression(value, s) for value in ast.values]
+            case Ast.BinaryExpressionAst():
+                CodeGen.collect_expression(ast.lhs, s)
+                CodeGen.collect_expression(ast.rhs, s)
+            case Ast.AssignmentExpressionAst():
+                [CodeGen.collect_expression(lhs, s) for lhs in ast.lhs]
+                CodeGen.collect_expression(ast.rhs, s)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixFunctionCallAst):
+                CodeGen.collect_expression(ast.lhs.lhs if isinstance(ast.lhs, Ast.PostfixExpressionAst) else None, s)
+                [CodeGen.collect_expression(argument.value, s) for argument in ast.op.arguments]
+                fn_proto = CodeGen.resolve_call(ast, s).meta_data["fn_proto"]
+                if fn_proto.generic_parameters:
+                    CodeGen.request_instantiation(fn_proto, CodeGen.instantiation_map(ast, fn_proto, s), s)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixMemberAccessAst):
+                CodeGen.collect_expression(ast.lhs, s)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixStructInitializerAst):
+                [CodeGen.collect_expression(field.value, s) for field in ast.op.fields]
+            case Ast.IfStatementAst():
+                s.next_scope()
+                CodeGen.collect_expression(ast.condition, s)
+                for branch in ast.branches:
+                    s.next_scope()
+                    [CodeGen.collect_expression(pattern.value, s) for pattern in branch.patterns]
+                    CodeGen.collect_expression(branch.guard, s)
+                    CodeGen.collect_statements(branch.body, s)
+                    s.prev_scope()
+                s.prev_scope()
+            case Ast.WhileStatementAst():
+                s.next_scope()
+                CodeGen.collect_expression(ast.condition, s)
+                CodeGen.collect_statements(ast.body, s)
+                s.prev_scope()
+            case Ast.InnerScopeAst():
+                s.next_scope()
+                CodeGen.collect_statements(ast.body, s)
+                s.prev_scope()
+
+    @staticmethod
+    def request_instantiation(fn_proto: Ast.SupMethodPrototypeAst, generic_map: dict[Ast.IdentifierAst, Ast.TypeAst], s: ScopeHandler) -> None:
+        # Record a call to an instantiation, queueing the instantiation to be walked if it is new.
+        name = CodeGen.instantiation_name(fn_proto, generic_map)
+        if name not in CodeGen.INSTANTIATIONS:
+            instantiation = Instantiation(name, fn_proto, generic_map, CodeGen.FUNCTIONS[id(fn_proto)][0], 0)
+            CodeGen.INSTANTIATIONS[name] = instantiation
+            CodeGen.PENDING_INSTANTIATIONS.append(instantiation)
+        CodeGen.INSTANTIATIONS[name].requests += 1
+
+    @staticmethod
+    def instantiation_map(ast: Ast.PostfixExpressionAst, fn_proto: Ast.SupMethodPrototypeAst, s: ScopeHandler) -> dict[Ast.IdentifierAst, Ast.TypeAst]:
+        # Get the concrete type bound to each generic parameter of the function being called, from the generic map the
+        # analysis selected the overload with. Inside an instantiation, the bound types can be the generic parameters of
+        # that instantiation, so they are substituted too. The types are fully qualified, as they are lowered from the
+        # scope of the function being called, which can be in another module.
+        generic_map = {}
+        for generic_parameter in fn_proto.generic_parameters:
+            ty = ast.op.generic_map.get(generic_parameter.identifier)
+            if ty is None or generic_parameter.is_variadic:
+                raise CodeGen.unsupported(ast)
+            generic_map[generic_parameter.identifier] = CodeGen.qualified_type(ty, s)
+        return generic_map
+
+    @staticmethod
+    def instantiation_name(fn_proto: Ast.SupMethodPrototypeAst, generic_map: dict[Ast.IdentifierAst, Ast.TypeAst]) -> str:
+        # The canonical name of an instantiation is the name of the generic function, with the (fully qualified) types
+        # bound to its generic parameters, in the order the parameters are declared in.
+        return f"{CodeGen.FUNCTION_NAMES[id(fn_proto)]}[{', '.join(map(str, generic_map.values()))}]"
+
+    @staticmethod
+    def monomorphisation_report() -> str:
+        # Report each instantiation with the number of calls that requested it, and the totals, ie how many requests
+        # were served by an instantiation that had already been generated.
+        report = ""
+        for instantiation in CodeGen.INSTANTIATIONS.values():
+            report += f"{instantiation.name} ({instantiation.module}): {instantiation.requests} requests\n"
+        requested = sum(instantiation.requests for instantiation in CodeGen.INSTANTIATIONS.values())
+        report += f"Instantiations: {requested} requested, {len(CodeGen.INSTANTIATIONS)} generated\n"
+        return report
+
+    @staticmethod
+    def dispatch_report(compiled_modules: list[CompiledModule]) -> str:
+        # Report the number of direct and indirect calls in each module, and the share of the calls that are direct.
+        report = ""
+        for compiled_module in compiled_modules:
+            counts = compiled_module.call_counts
+            if not counts:
+                report += f"Module {compiled_module.name}: cached\n"
+                continue
+            calls = counts["direct"] + counts["indirect"]
+            ratio = f"{100 * counts['direct'] / calls:.1f}% direct" if calls else "no calls"
+            report += f"Module {compiled_module.name}: {counts['direct']} direct, {counts['indirect']} indirect ({ratio}), {counts['intrinsic']} operators lowered into instructions, {counts['elided_copies']} moves passed without a copy\n"
+        return report
+
+    @staticmethod
+    def escape_report(compiled_modules: list[CompiledModule]) -> str:
+        # Report the number of objects created in each module's code, by where they live.
+        report = ""
+        for compiled_module in compiled_modules:
+            counts = compiled_module.object_counts
+            if not counts:
+                report += f"Module {compiled_module.name}: cached\n"
+                continue
+            report += f"Module {compiled_module.name}: {counts['stack']} objects on the stack, {counts['escaping']} escaping, {counts['erased']} function objects erased\n"
+        return report
+
+    @staticmethod
+    def allocation_report(compiled_modules: list[CompiledModule], opt_level: int) -> str:
+        # Report the runtime allocation counters of the last "--run", by reading the counter globals from the execution
+        # engine. Modules that never created an object (of a kind) have no counter for it.
+        engine = CodeGen.ENGINES[opt_level]
+        report = ""
+        for compiled_module in compiled_modules:
+            counts = []
+            for kind in ["stack", "escaping"]:
+                address = engine.get_global_value_address(f"{compiled_module.name}.allocations.{kind}")
+                counts.append(ctypes.c_int64.from_address(address).value if address else 0)
+            report += f"Module {compiled_module.name}: {counts[0]} objects created on the stack, {counts[1]} escaping\n"
+        return report
+
+    @staticmethod
+    def generate_module(ast: Ast.ProgramAst, scope: Scope, s: ScopeHandler, is_root: bool) -> ll.Module:
+        ErrFmt.TOKENS = Lexer(open(ModuleTree.ROOT + ast.module.identifier.as_file_path(), "r").read()).lex()
+        ErrFmt.FILE_PATH = str(ast.module.identifier)
+
+        # Create the LLVM module for the S++ module, in its own context, targeting the host machine.
+        module_name = str(ast.module.identifier)
+        CodeGen.MODULE = ll.Module(name=module_name, context=ll.Context())
+        CodeGen.MODULE.triple = llvm.get_process_triple()
+        CodeGen.MODULE.data_layout = str(CodeGen.target_machine().target_data)
+        CodeGen.STRUCT_TYPES = {}
+        CodeGen.CALL_COUNTS = {"direct": 0, "indirect": 0, "intrinsic": 0, "elided_copies": 0}
+        CodeGen.OBJECT_COUNTS = {"stack": 0, "escaping": 0, "erased": 0}
+
+        main = None
+        for member in ast.module.body.members:
+            match member:
+                case Ast.ClassPrototypeAst():
+                    CodeGen.generate_class_prototype(member, s)
+                case Ast.EnumPrototypeAst():
+                    s.skip_scope(member)
+                case Ast.SupPrototypeNormalAst():
+                    main = CodeGen.generate_sup_prototype(member, module_name, s) or main
+                case Ast.LetStatementAst():
+                    CodeGen.generate_global_let_statement(member, module_name, s)
+
+        # The instantiations of the module's generic functions are generated after its other members, as they were found
+        # by walking every module rather than this one.
+        for instantiation in CodeGen.INSTANTIATIONS.values():
+            if instantiation.module == module_name:
+                CodeGen.generate_instantiation(instantiation, s)
+
+        # The root module's "main" function is wrapped in the C entry point, so that the object file can be linked into
+        # an executable.
+        if is_root and main:
+            CodeGen.generate_entry_point(main, s)
+
+        return CodeGen.MODULE
+
+    @staticmethod
+    def generate_class_prototype(ast: Ast.ClassPrototypeAst, s: ScopeHandler) -> None:
+        # Create the struct type for the class, unless it's generic, in which case the struct type depends on the
+        # generic arguments, which are unknown until the class is used. Overload classes are erased.
+        s.next_scope(ast)
+        if not ast.generic_parameters and not ast.identifier.identifier.startswith("__MOCK_"):
+            CodeGen.llvm_type(Ast.TypeSingleAst([Ast.GenericIdentifierAst(ast.identifier.identifier, [], ast._tok)], ast._tok), s)
+        s.prev_scope()
+
+    @staticmethod
+    def generate_sup_prototype(ast: Ast.SupPrototypeNormalAst, prefix: str, s: ScopeHandler) -> Optional[Ast.SupMethodPrototypeAst]:
+        # Generate each method in the super-imposition, and recurse into nested super-impositions (the overload classes
+        # of methods). The "call_[ref|mut|one]" prototype for the "main" function is returned, for the entry point.
+        s.next_scope(ast)
+        main = None
+        owner = str(ast.identifier)
+        for member in ast.body.members:
+            match member:
+                case Ast.SupMethodPrototypeAst():
+                    CodeGen.generate_function_prototype(member, s)
+                    if prefix == "main" and owner == "__MOCK_main" and not member.parameters:
+                        main = member
+                case Ast.SupPrototypeNormalAst():
+                    main = CodeGen.generate_sup_prototype(member, f"{prefix}.{owner}", s) or main
+                case Ast.LetStatementAst():
+                    CodeGen.generate_global_let_statement(member, f"{prefix}.{owner}", s)
+        s.prev_scope()
+        return main
+
+    @staticmethod
+    def generate_global_let_statement(ast: Ast.LetStatementAst, prefix: str, s: ScopeHandler) -> None:
+        # Module and super-imposition level let statements bind a function name to its overload class instance, ie
+        # "let f = __MOCK_f {}". The instance has no state, so it is erased, and uses of the function name as a value
+        # are lowered into a constant (see generate_function_object). Any other let statement is lowered into a
+        # constant global.
+        ty = ast.type_annotation or TypeInfer.infer_expression(ast.value, s)
+        if CodeGen.is_overload_class(ty):
+            CodeGen.OBJECT_COUNTS["erased"] += 1
+            return
+
+        llvm_ty = CodeGen.llvm_type(ty, s)
+        variable = ll.GlobalVariable(CodeGen.MODULE, llvm_ty, name=f"{prefix}.{ast.variables[0].identifier}")
+        variable.initializer = ll.Constant(llvm_ty, None)
+        variable.global_constant = True
+
+    @staticmethod
+    def generate_function_prototype(ast: Ast.SupMethodPrototypeAst, s: ScopeHandler) -> None:
+        # Generic functions are lowered per instantiation (see generate_instantiation), so there is nothing to generate
+        # for the prototype itself.
+        if ast.generic_parameters:
+            s.skip_scope(ast)
+            return
+        CodeGen.generate_function(ast, CodeGen.llvm_function(ast, s), s)
+
+    @staticmethod
+    def generate_instantiation(instantiation: Instantiation, s: ScopeHandler) -> None:
+        # Generate the body of a generic function with its generic parameters bound to the instantiation's types, which
+        # every type in the body is substituted through.
+        CodeGen.GENERIC_MAP = instantiation.generic_map
+        CodeGen.generate_function(instantiation.fn_proto, CodeGen.llvm_function(instantiation.fn_proto, s, instantiation.generic_map), s)
+        CodeGen.GENERIC_MAP = {}
+
+    @staticmethod
+    def generate_function(ast: Ast.SupMethodPrototypeAst, function: ll.Function, s: ScopeHandler) -> None:
+        # Functions without a body that return a value are external (ie implemented by the runtime), so are only
+        # declared. The declaration is created on demand, by the first call to the function.
+        if not ast.body.statements and not CodeGen.is_void(ast.return_type, s):
+            s.skip_scope(ast)
+            return
+
+        # The nested scopes are rewound, as the body of a generic function is walked once per instantiation.
+        with Trace.span(function.name, "codegen", module=CodeGen.MODULE.name):
+            CodeGen.generate_function_body(ast, function, s)
+
+    @staticmethod
+    def generate_function_body(ast: Ast.SupMethodPrototypeAst, function: ll.Function, s: ScopeHandler) -> None:
+        s.next_scope(ast)
+        s.rewind_scope()
+        EscapeAnalysis.analyse_function(ast)
+        f = CodeGenFunction(function, ast.return_type)
+
+        # Bind each parameter to its address. Parameters passed by pointer (borrows, and moved aggregates) are already
+        # addresses, and the other parameters passed by value are stored into a stack slot, so that they can be
+        # re-assigned and borrowed from like any other local variable.
+        for parameter, argument in zip(ast.parameters, function.args):
+            name = parameter.identifier.identifier
+            argument.name = name
+            symbol = s.current_scope.get_symbol(parameter.identifier, SymbolTypes.VariableSymbol)
+            if CodeGen.is_passed_by_pointer(parameter, argument):
+                f.variables[id(symbol)] = argument
+            else:
+                address = f.alloca(argument.type, name)
+                f.builder.store(argument, address)
+                f.variables[id(symbol)] = address
+
+        CodeGen.generate_statements(ast.body.statements, f, s)
+
+        # A function that doesn't end with a return statement returns std.Void. Blocks that can't be reached (ie after
+        # an "if" where every branch returns) are terminated as unreachable.
+        if not f.builder.block.is_terminated:
+            if CodeGen.is_void(ast.return_type, s):
+                f.builder.ret_void()
+            else:
+                f.builder.unreachable()
+
+        f.finish()
+        s.prev_scope()
+
+    @staticmethod
+    def generate_entry_point(main: Ast.SupMethodPrototypeAst, s: ScopeHandler) -> None:
+        # Create "i32 main()", which calls the S++ "main" function and returns 0.
+        function = ll.Function(CodeGen.MODULE, ll.FunctionType(ll.IntType(32), []), name="main")
+        builder = ll.IRBuilder(function.append_basic_block("entry"))
+        builder.call(CodeGen.llvm_function(main, s), [])
+        builder.ret(ll.Constant(ll.IntType(32), 0))
+
+    @staticmethod
+    def generate_statements(asts: list[Ast.StatementAst], f: CodeGenFunction, s: ScopeHandler) -> None:
+        # Statements after a return statement can't be reached, so stop generating once the block has been terminated.
+        for statement in asts:
+            if f.builder.block.is_terminated:
+                break
+            CodeGen.generate_statement(statement, f, s)
+
+    @staticmethod
+    def generate_statement(ast: Ast.StatementAst, f: CodeGenFunction, s: ScopeHandler) -> None:
+        match ast:
+            case Ast.TypedefStatementAst(): pass
+            case Ast.ReturnStatementAst(): CodeGen.generate_return_statement(ast, f, s)
+            case Ast.LetStatementAst(): CodeGen.generate_let_statement(ast, f, s)
+            case Ast.FunctionPrototypeAst(): raise CodeGen.unsupported(ast)
+            case _: CodeGen.generate_expression(ast, f, s)
+
+    @staticmethod
+    def generate_return_statement(ast: Ast.ReturnStatementAst, f: CodeGenFunction, s: ScopeHandler) -> None:
+        if ast.value and not CodeGen.is_void(f.return_type, s):
+            f.builder.ret(CodeGen.generate_value(ast.value, f, s))
+        else:
+            if ast.value:
+                CodeGen.generate_expression(ast.value, f, s)
+            f.builder.ret_void()
+
     @staticmethod
-    def generate(ast: Ast.ProgramAst):
-        # todo : LLVM initialization boilerplate code here
-        # todo : call generation for each type of ast
-        ...
+    def generate_let_statement(ast: Ast.LetStatementAst, f: CodeGenFunction, s: ScopeHandler) -> None:
+        # Only single variable let statements are lowered for now; tuple destructuring isn't.
+        if len(ast.variables) != 1 or ast.if_null:
+            raise CodeGen.unsupported(ast)
+
+        # The variable's symbol was added to the current scope by the analysis, and has the inferred type of the value.
+        variable = ast.variables[0].identifier
+        symbol = s.current_scope.get_symbol(variable, SymbolTypes.VariableSymbol)
+        # An object that doesn't escape is constructed in the variable's stack slot. The variable isn't bound until the
+        # value has been generated, so the value can't refer to the slot being constructed into.
+        address = f.alloca(CodeGen.llvm_type(symbol.type, s), variable.identifier)
+        if ast.value and not EscapeAnalysis.escapes(ast.value):
+            CodeGen.generate_postfix_struct_initializer_into(ast.value, address, f, s)
+        elif ast.value:
+            f.builder.store(CodeGen.generate_value(ast.value, f, s), address)
+        f.variables[id(symbol)] = address
+
+    @staticmethod
+    def generate_value(ast: Ast.ExpressionAst, f: CodeGenFunction, s: ScopeHandler) -> ll.Value:
+        # Generate an expression whose value is used, ie an argument or the value of a let statement. Expressions that
+        # produce std.Void, or that are only lowered as statements (if/while), have no value.
+        value = CodeGen.generate_expression(ast, f, s)
+        if value is None:
+            raise CodeGen.unsupported(ast)
+        return value
+
+    @staticmethod
+    def generate_expression(ast: Ast.ExpressionAst, f: CodeGenFunction, s: ScopeHandler) -> Optional[ll.Value]:
+        match ast:
+            case Ast.IdentifierAst() if CodeGen.is_function_object(ast, f, s):
+                return CodeGen.generate_function_object(ast, s)
+            case Ast.IdentifierAst() | Ast.TokenAst() if CodeGen.is_variable(ast):
+                return f.builder.load(CodeGen.generate_address(ast, f, s))
+            case Ast.NumberLiteralBase10Ast() | Ast.NumberLiteralBase16Ast() | Ast.NumberLiteralBase02Ast():
+                return ll.Constant(ll.DoubleType(), CodeGen.number_literal_value(ast))
+            case Ast.BoolLiteralAst():
+                return ll.Constant(ll.IntType(1), int(ast.value))
+            case Ast.StringLiteralAst():
+                return CodeGen.generate_string_literal(ast, f)
+            case Ast.TupleLiteralAst():
+                return CodeGen.generate_tuple_literal(ast, f, s)
+            case Ast.BinaryExpressionAst():
+                return CodeGen.generate_binary_expression(ast, f, s)
+            case Ast.AssignmentExpressionAst():
+                return CodeGen.generate_assignment_expression(ast, f, s)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixFunctionCallAst):
+                return CodeGen.generate_postfix_function_call(ast, f, s)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixMemberAccessAst):
+                return CodeGen.generate_postfix_member_access(ast, f, s)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixStructInitializerAst):
+                return CodeGen.generate_postfix_struct_initializer(ast, f, s)
+            case Ast.IfStatementAst():
+                return CodeGen.generate_if_statement(ast, f, s)
+            case Ast.WhileStatementAst():
+                return CodeGen.generate_while_statement(ast, f, s)
+            case Ast.InnerScopeAst():
+                return CodeGen.generate_inner_scope(ast, f, s)
+            case _:
+                raise CodeGen.unsupported(ast)
+
+    @staticmethod
+    def generate_address(ast: Ast.ExpressionAst, f: CodeGenFunction, s: ScopeHandler) -> ll.Value:
+        # Get the address of an expression, for assignment, member access, and passing by reference. Variables and their
+        # attributes have addresses, and any other value is stored into a temporary stack slot.
+        match ast:
+            case Ast.IdentifierAst() | Ast.TokenAst() if CodeGen.is_variable(ast):
+                identifier = Ast.IdentifierAst("self", ast._tok) if isinstance(ast, Ast.TokenAst) else ast
+                symbol = s.current_scope.get_symbol(identifier, SymbolTypes.VariableSymbol)
+                if id(symbol) not in f.variables:
+                    raise CodeGen.unsupported(ast)
+                return f.variables[id(symbol)]
+
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixMemberAccessAst):
+                index = CodeGen.member_index(ast, s)
+                return f.builder.gep(CodeGen.generate_address(ast.lhs, f, s), [ll.Constant(ll.IntType(32), 0), ll.Constant(ll.IntType(32), index)])
+
+            case _:
+                value = CodeGen.generate_value(ast, f, s)
+                address = f.alloca(value.type, "tmp")
+                f.builder.store(value, address)
+                return address
+
+    @staticmethod
+    def generate_function_object(ast: Ast.IdentifierAst, s: ScopeHandler) -> ll.Value:
+        # A function used as a value is an instance of its overload class, which has no attributes, so the value is a
+        # constant of the empty struct type, and no instance is ever stored. Calls on the value are still resolved to
+        # an overload statically, from the overload class in its type.
+        symbol = s.current_scope.get_symbol(ast, SymbolTypes.VariableSymbol)
+        return ll.Constant(CodeGen.llvm_type(symbol.type, s), None)
+
+    @staticmethod
+    def generate_string_literal(ast: Ast.StringLiteralAst, f: CodeGenFunction) -> ll.Value:
+        # Strings are null-terminated constant globals, and the std.Str value is the pointer to the first character.
+        data = bytearray(ast.value[1:-1].encode("utf8") + b"\0")
+        ty = ll.ArrayType(ll.IntType(8), len(data))
+        variable = ll.GlobalVariable(CodeGen.MODULE, ty, name=CodeGen.MODULE.get_unique_name("str"))
+        variable.linkage = "internal"
+        variable.global_constant = True
+        variable.initializer = ll.Constant(ty, data)
+        return f.builder.bitcast(variable, ll.IntType(8).as_pointer())
+
+    @staticmethod
+    def generate_tuple_literal(ast: Ast.TupleLiteralAst, f: CodeGenFunction, s: ScopeHandler) -> ll.Value:
+        values = [CodeGen.generate_value(value, f, s) for value in ast.values]
+        tuple_value = ll.Constant(ll.LiteralStructType([value.type for value in values]), None)
+        for i, value in enumerate(values):
+            tuple_value = f.builder.insert_value(tuple_value, value, i)
+        return tuple_value
+
+    @staticmethod
+    def generate_binary_expression(ast: Ast.BinaryExpressionAst, f: CodeGenFunction, s: ScopeHandler, lhs: Optional[ll.Value] = None) -> Optional[ll.Value]:
+        # The lhs can be given pre-generated, for comparing the condition of an "if" against each pattern, so that the
+        # condition is only evaluated once.
+        lhs_ty = TypeInfer.infer_expression(ast.lhs, s)
+        rhs_ty = TypeInfer.infer_expression(ast.rhs, s)
+        lhs_scope = s.global_scope.get_child_scope(lhs_ty) if isinstance(lhs_ty, Ast.TypeSingleAst) else None
+        rhs_scope = s.global_scope.get_child_scope(rhs_ty) if isinstance(rhs_ty, Ast.TypeSingleAst) else None
+        method_name = Ast.BIN_FN[ast.op.tok.token_type]
+
+        # Operators on std.Num and std.Bool operands are lowered into instructions.
+        intrinsics = {ll.DoubleType(): CodeGen.NUM_INTRINSICS, ll.IntType(1): CodeGen.BOOL_INTRINSICS}.get(CodeGen.BUILTIN_TYPES.get(lhs_scope), {})
+        if lhs_scope is rhs_scope and method_name in intrinsics:
+            lhs = lhs if lhs is not None else CodeGen.generate_value(ast.lhs, f, s)
+            rhs = CodeGen.generate_value(ast.rhs, f, s)
+            CodeGen.CALL_COUNTS["intrinsic"] += 1
+            return intrinsics[method_name](f.builder, lhs, rhs)
+
+        # Otherwise, call the operator method, with the lhs as "self" and the rhs by value, as analysed. The comparisons
+        # generated for the patterns of an "if" weren't analysed themselves, so their operator method is resolved here.
+        symbol = getattr(ast, "_overload", None) or (TypeInfer.resolve_binary_operator(ast, s) or TypeInfer.infer_postfix_function_call(TypeInfer.binary_expression_as_function_call(ast), s))[0]
+        fn_proto = symbol.meta_data["fn_proto"]
+        function = CodeGen.llvm_function(fn_proto, s)
+        borrowed = {EscapeAnalysis.place_root(ast.lhs)} if fn_proto.parameters[0].calling_convention else set()
+        if lhs is not None and CodeGen.is_passed_by_pointer(fn_proto.parameters[0], function.args[0]):
+            receiver = f.alloca(lhs.type, "tmp")
+            f.builder.store(lhs, receiver)
+        elif lhs is not None:
+            receiver = lhs
+        else:
+            receiver = CodeGen.generate_argument(ast.lhs, fn_proto.parameters[0], function.args[0], borrowed, f, s)
+
+        rhs = CodeGen.generate_argument(ast.rhs, fn_proto.parameters[1], function.args[1], borrowed, f, s)
+        return CodeGen.generate_call(fn_proto, [receiver, rhs], f, s)
+
+    @staticmethod
+    def generate_assignment_expression(ast: Ast.AssignmentExpressionAst, f: CodeGenFunction, s: ScopeHandler) -> None:
+        if len(ast.lhs) != 1:
+            raise CodeGen.unsupported(ast)
+
+        value = CodeGen.generate_value(ast.rhs, f, s)
+        f.builder.store(value, CodeGen.generate_address(ast.lhs[0], f, s))
+
+    @staticmethod
+    def generate_postfix_function_call(ast: Ast.PostfixExpressionAst, f: CodeGenFunction, s: ScopeHandler) -> Optional[ll.Value]:
+        # Call the overload that the analysis selected, and match the arguments up to its parameters. The receiver of a
+        # method call is the "self" argument, named arguments are matched by name, and any missing arguments take the
+        # default value of their parameter.
+        symbol = CodeGen.resolve_call(ast, s)
+        fn_proto = symbol.meta_data["fn_proto"]
+        if any(parameter.is_variadic for parameter in fn_proto.parameters):
+            raise CodeGen.unsupported(ast)
+        generic_map = CodeGen.instantiation_map(ast, fn_proto, s) if fn_proto.generic_parameters else None
+
+        arguments = {}
+        parameters = fn_proto.parameters
+        if symbol.meta_data.get("is_method", False) and parameters and parameters[0].is_self:
+            arguments[parameters[0].identifier.identifier] = ast.lhs.lhs
+            parameters = parameters[1:]
+
+        positional = [argument for argument in ast.op.arguments if not argument.identifier]
+        for parameter, argument in zip(parameters, positional):
+            arguments[parameter.identifier.identifier] = argument.value
+        for argument in [argument for argument in ast.op.arguments if argument.identifier]:
+            arguments[argument.identifier.identifier] = argument.value
+
+        # The variables that any argument borrows from are collected first, so that a moved argument isn't passed by
+        # pointer into memory that another argument of the same call borrows.
+        function = CodeGen.llvm_function(fn_proto, s, generic_map)
+        argument_asts = [arguments.get(parameter.identifier.identifier, parameter.default_value) for parameter in fn_proto.parameters]
+        borrowed = {EscapeAnalysis.place_root(argument) for parameter, argument in zip(fn_proto.parameters, argument_asts) if parameter.calling_convention}
+
+        values = []
+        for parameter, argument, llvm_argument in zip(fn_proto.parameters, argument_asts, function.args):
+            values.append(CodeGen.generate_argument(argument, parameter, llvm_argument, borrowed, f, s))
+        return CodeGen.generate_call(fn_proto, values, f, s, generic_map)
+
+    @staticmethod
+    def resolve_call(ast: Ast.PostfixExpressionAst, s: ScopeHandler) -> SymbolTypes.VariableSymbol:
+        # Overloads are selected statically, by the analysis, which records the selected overload on the call (along
+        # with its generic map), including for the calls analysed by a worker process.
+        symbol = getattr(ast.op, "_overload", None)
+        if symbol is None:
+            raise CodeGen.unsupported(ast)
+        return symbol
+
+    @staticmethod
+    def generate_argument(ast: Ast.ExpressionAst, parameter: Ast.FunctionParameterAst, llvm_argument: ll.Argument, borrowed: set[Optional[str]], f: CodeGenFunction, s: ScopeHandler) -> ll.Value:
+        # Arguments for parameters passed by reference are passed as the address of the argument. A moved aggregate is
+        # passed as the address of the variable (or attribute) it is moved from, without copying it, as the analysis
+        # doesn't allow the moved-from value to be used again until it is re-assigned. If another argument of the call
+        # borrows from the same variable, the callee would see the same memory twice, so a copy is passed instead.
+        if parameter.calling_convention:
+            return CodeGen.generate_address(ast, f, s)
+        if not CodeGen.is_passed_by_pointer(parameter, llvm_argument):
+            return CodeGen.generate_value(ast, f, s)
+        if CodeGen.is_place(ast) and EscapeAnalysis.place_root(ast) not in borrowed:
+            CodeGen.CALL_COUNTS["elided_copies"] += 1
+            return CodeGen.generate_address(ast, f, s)
+        if not EscapeAnalysis.escapes(ast):
+            address = f.alloca(llvm_argument.type.pointee, "tmp")
+            CodeGen.generate_postfix_struct_initializer_into(ast, address, f, s)
+            return address
+
+        value = CodeGen.generate_value(ast, f, s)
+        address = f.alloca(value.type, "tmp")
+        f.builder.store(value, address)
+        return address
+
+    @staticmethod
+    def generate_call(fn_proto: Ast.SupMethodPrototypeAst, arguments: list[ll.Value], f: CodeGenFunction, s: ScopeHandler, generic_map: Optional[dict[Ast.IdentifierAst, Ast.TypeAst]] = None) -> Optional[ll.Value]:
+        # Every call is to a statically selected function, and calls to generic functions call the instantiation for the
+        # generic map.
+        call = f.builder.call(CodeGen.llvm_function(fn_proto, s, generic_map), arguments)
+        CodeGen.CALL_COUNTS["direct"] += 1
+        return None if isinstance(call.type, ll.VoidType) else call
+
+    @staticmethod
+    def generate_postfix_member_access(ast: Ast.PostfixExpressionAst, f: CodeGenFunction, s: ScopeHandler) -> ll.Value:
+        # Attributes of variables are loaded through their address, and attributes of any other value (ie the result of
+        # a function call) are extracted from the value.
+        if CodeGen.is_place(ast.lhs):
+            return f.builder.load(CodeGen.generate_address(ast, f, s))
+        return f.builder.extract_value(CodeGen.generate_value(ast.lhs, f, s), CodeGen.member_index(ast, s))
+
+    @staticmethod
+    def generate_postfix_struct_initializer(ast: Ast.PostfixExpressionAst, f: CodeGenFunction, s: ScopeHandler) -> ll.Value:
+        # Start from a zero-initialized struct and insert each given field into it. The "else" and "sup" fields (default
+        # values and super-class instances) aren't lowered yet.
+        cls_ty = TypeInfer.infer_expression(ast, s)
+        struct_value = ll.Constant(CodeGen.llvm_type(cls_ty, s), None)
+        for index, value in CodeGen.generate_struct_fields(ast, cls_ty, f, s):
+            struct_value = f.builder.insert_value(struct_value, value, index)
+        CodeGen.count_object(ast, f)
+        return struct_value
+
+    @staticmethod
+    def generate_postfix_struct_initializer_into(ast: Ast.PostfixExpressionAst, address: ll.Value, f: CodeGenFunction, s: ScopeHandler) -> None:
+        # Construct an object that doesn't escape in place, by storing each field into the stack slot that holds it. The
+        # fields are all generated before any is stored. The slot is zero-initialized first if any field isn't given.
+        cls_ty = TypeInfer.infer_expression(ast, s)
+        fields = CodeGen.generate_struct_fields(ast, cls_ty, f, s)
+        if len(fields) < len(CodeGen.class_attributes(cls_ty, s)):
+            f.builder.store(ll.Constant(address.type.pointee, None), address)
+        for index, value in fields:
+            f.builder.store(value, f.builder.gep(address, [ll.Constant(ll.IntType(32), 0), ll.Constant(ll.IntType(32), index)]))
+        CodeGen.count_object(ast, f)
+
+    @staticmethod
+    def generate_struct_fields(ast: Ast.PostfixExpressionAst, cls_ty: Ast.TypeAst, f: CodeGenFunction, s: ScopeHandler) -> list[tuple[int, ll.Value]]:
+        # Generate the value of each given field, with the index of its attribute in the struct type.
+        attributes = CodeGen.class_attributes(cls_ty, s)
+        fields = []
+        for field in ast.op.fields:
+            if not isinstance(field.identifier, Ast.IdentifierAst):
+                raise CodeGen.unsupported(field)
+            index = [attribute.name for attribute in attributes].index(field.identifier)
+            fields.append((index, CodeGen.generate_value(field.value or field.identifier, f, s)))
+        return fields
+
+    @staticmethod
+    def count_object(ast: Ast.PostfixExpressionAst, f: CodeGenFunction) -> None:
+        # Count an object by where it lives, and (with COUNT_ALLOCATIONS) increment its runtime counter, which is made
+        # in the module on first use.
+        kind = "escaping" if EscapeAnalysis.escapes(ast) else "stack"
+        CodeGen.OBJECT_COUNTS[kind] += 1
+        if not CodeGen.COUNT_ALLOCATIONS:
+            return
+
+        name = f"{CodeGen.MODULE.name}.allocations.{kind}"
+        if name not in CodeGen.MODULE.globals:
+            counter = ll.GlobalVariable(CodeGen.MODULE, ll.IntType(64), name=name)
+            counter.initializer = ll.Constant(ll.IntType(64), 0)
+        counter = CodeGen.MODULE.globals[name]
+        f.builder.store(f.builder.add(f.builder.load(counter), ll.Constant(ll.IntType(64), 1)), counter)
+
+    @staticmethod
+    def generate_if_statement(ast: Ast.IfStatementAst, f: CodeGenFunction, s: ScopeHandler) -> None:
+        # The condition is evaluated once, and each branch is tested in order: a branch is taken if any of its patterns
+        # match (comparing the condition to the pattern with the branch's, or the if statement's, comparison operator),
+        # and its guard is true. A final "else" branch is always taken. The scopes are entered in the same order
+        # as the analysis created them in: the "if" scope, and then a "pattern" scope per branch.
+        s.next_scope()
+        condition = CodeGen.generate_value(ast.condition, f, s)
+        end_block = f.function.append_basic_block("if.end")
+
+        for i, branch in enumerate(ast.branches):
+            s.next_scope()
+            if i > 0 and i == len(ast.branches) - 1 and CodeGen.is_else_branch(branch):
+                CodeGen.generate_statements(branch.body, f, s)
+            else:
+                matches = None
+                for pattern in branch.patterns:
+                    match = CodeGen.generate_pattern(ast, branch, pattern, condition, f, s)
+                    matches = match if matches is None else f.builder.or_(matches, match)
+                if branch.guard:
+                    matches = f.builder.and_(matches, CodeGen.generate_value(branch.guard, f, s))
+
+                body_block = f.function.append_basic_block("if.branch")
+                next_block = f.function.append_basic_block("if.next")
+                f.builder.cbranch(matches, body_block, next_block)
+                f.builder.position_at_end(body_block)
+                CodeGen.generate_statements(branch.body, f, s)
+                if not f.builder.block.is_terminated:
+                    f.builder.branch(end_block)
+                f.builder.position_at_end(next_block)
+            s.prev_scope()
+
+        if not f.builder.block.is_terminated:
+            f.builder.branch(end_block)
+        f.builder.position_at_end(end_block)
+        s.prev_scope()
+
+    @staticmethod
+    def generate_pattern(ast: Ast.IfStatementAst, branch: Ast.PatternStatementAst, pattern: Ast.PatternAst, condition: ll.Value, f: CodeGenFunction, s: ScopeHandler) -> ll.Value:
+        # Without a comparison operator, the condition is a std.Bool matched against "true" or "false".
+        op = branch.comparison_op or ast.comparison_op
+        if op:
+            comparison = Ast.BinaryExpressionAst(ast.condition, op, pattern.value, op._tok)
+            return CodeGen.generate_binary_expression(comparison, f, s, lhs=condition)
+        if isinstance(pattern.value, Ast.BoolLiteralAst):
+            return condition if pattern.value.value else f.builder.not_(condition)
+        raise CodeGen.unsupported(pattern)
+
+    @staticmethod
+    def generate_while_statement(ast: Ast.WhileStatementAst, f: CodeGenFunction, s: ScopeHandler) -> None:
+        # The condition is tested before each iteration, in its own block, and the body branches back to it.
+        if ast.else_:
+            raise CodeGen.unsupported(ast.else_)
+
+        s.next_scope()
+        condition_block = f.function.append_basic_block("while.cond")
+        body_block = f.function.append_basic_block("while.body")
+        end_block = f.function.append_basic_block("while.end")
+
+        f.builder.branch(condition_block)
+        f.builder.position_at_end(condition_block)
+        f.builder.cbranch(CodeGen.generate_value(ast.condition, f, s), body_block, end_block)
+
+        f.builder.position_at_end(body_block)
+        CodeGen.generate_statements(ast.body, f, s)
+        if not f.builder.block.is_terminated:
+            f.builder.branch(condition_block)
+        f.builder.position_at_end(end_block)
+        s.prev_scope()
+
+    @staticmethod
+    def generate_inner_scope(ast: Ast.InnerScopeAst, f: CodeGenFunction, s: ScopeHandler) -> None:
+        s.next_scope()
+        CodeGen.generate_statements(ast.body, f, s)
+        s.prev_scope()
+
+    @staticmethod
+    def llvm_function(ast: Ast.SupMethodPrototypeAst, s: ScopeHandler, generic_map: Optional[dict[Ast.IdentifierAst, Ast.TypeAst]] = None) -> ll.Function:
+        # Get the LLVM function for a function prototype from the current module, declaring it if it hasn't been yet (ie
+        # for functions defined in other modules, or later in this module). Generic functions are only lowered per
+        # instantiation, with the types of the generic map substituted into the parameter and return types.
+        if ast.generic_parameters and generic_map is None:
+            raise CodeGen.unsupported(ast)
+        name = CodeGen.instantiation_name(ast, generic_map) if generic_map is not None else CodeGen.FUNCTION_NAMES[id(ast)]
+        if name in CodeGen.MODULE.globals:
+            return CodeGen.MODULE.globals[name]
+
+        # The types are resolved from the function's own scope, as they are written relative to the module declaring the
+        # function (ie "Num" for std.Num in the std module).
+        current_scope = s.current_scope
+        s.current_scope = s.scopes[getattr(ast, "_scope_index")]
+        parameter_types = []
+        for parameter in ast.parameters:
+            ty = CodeGen.llvm_type(CodeGen.concrete_type(parameter.type_annotation, generic_map or {}), s)
+            by_pointer = parameter.calling_convention or (CodeGen.MOVE_BY_POINTER and isinstance(ty, ll.BaseStructType))
+            parameter_types.append(ty.as_pointer() if by_pointer else ty)
+
+        return_type = CodeGen.llvm_type(CodeGen.concrete_type(ast.return_type, generic_map or {}), s)
+        s.current_scope = current_scope
+        function = ll.Function(CodeGen.MODULE, ll.FunctionType(return_type, parameter_types), name=name)
+
+        # The law of exclusivity means that nothing else can access the memory behind a "&mut" borrow during the call,
+        # and that a moved value is owned by the callee, so those pointers are "noalias". A "&" borrow can share its
+        # memory with other "&" borrows, so it isn't. Borrows can't be stored anywhere, so no pointer is captured.
+        for parameter, argument in zip(ast.parameters, function.args):
+            if CodeGen.is_passed_by_pointer(parameter, argument):
+                exclusive = parameter.calling_convention is None or parameter.calling_convention.is_mutable
+                for attribute in CodeGen.POINTER_ATTRIBUTES + (CodeGen.EXCLUSIVE_POINTER_ATTRIBUTES if exclusive else []):
+                    argument.add_attribute(attribute)
+        return function
+
+    @staticmethod
+    def llvm_type(ast: Ast.TypeAst, s: ScopeHandler) -> ll.Type:
+        # Tuples are lowered into literal structs of their element types, the std primitive types into LLVM primitives,
+        # and classes into identified structs, which are created (with a body of the attribute types) on first use.
+        # Inside an instantiation, its generic parameters are substituted first.
+        ast = CodeGen.concrete_type(ast, CodeGen.GENERIC_MAP)
+        if isinstance(ast, Ast.TypeTupleAst):
+            return ll.LiteralStructType([CodeGen.llvm_type(t, s) for t in ast.types])
+
+        cls_scope = CodeGen.class_scope(ast, s)
+        if cls_scope is None:
+            raise CodeGen.unsupported(ast)
+        if cls_scope in CodeGen.BUILTIN_TYPES:
+            return CodeGen.BUILTIN_TYPES[cls_scope]
+
+        # Generic classes depend on their generic arguments (apart from the std.Tup tuple type), which aren't lowered
+        # yet.
+        generic_arguments = [getattr(g, "value", g) for g in ast.parts[-1].generic_arguments]
+        if str(ast.parts[-1].identifier) == "Tup" and "std" in cls_scope.ancestors_names():
+            return ll.LiteralStructType([CodeGen.llvm_type(t, s) for t in generic_arguments])
+        if generic_arguments:
+            raise CodeGen.unsupported(ast)
+
+        if cls_scope not in CodeGen.STRUCT_TYPES:
+            struct_type = CodeGen.MODULE.context.get_identified_type(CodeGen.qualified_name(cls_scope))
+            CodeGen.STRUCT_TYPES[cls_scope] = struct_type
+            struct_type.set_body(*[CodeGen.llvm_type(attribute.type, s) for attribute in CodeGen.class_attributes(ast, s)])
+        return CodeGen.STRUCT_TYPES[cls_scope]
+
+    @staticmethod
+    def concrete_type(ast: Ast.TypeAst, generic_map: dict[Ast.IdentifierAst, Ast.TypeAst]) -> Ast.TypeAst:
+        # Substitute the types bound to generic parameters into a type, including into tuples and generic arguments. New
+        # ASTs are created for the parts that change, so the type in the analysed AST is left as it was.
+        match ast:
+            case _ if not generic_map:
+                return ast
+            case Ast.TypeTupleAst():
+                return Ast.TypeTupleAst([CodeGen.concrete_type(ty, generic_map) for ty in ast.types], ast._tok)
+            case Ast.TypeSingleAst() if len(ast.parts) == 1 and ast.to_identifier() in generic_map:
+                return generic_map[ast.to_identifier()]
+            case Ast.TypeSingleAst() if any(part.generic_arguments for part in ast.parts):
+                return Ast.TypeSingleAst([Ast.GenericIdentifierAst(part.identifier, [
+                    Ast.TypeGenericArgumentAst(getattr(g, "identifier", None), CodeGen.concrete_type(getattr(g, "value", g), generic_map), g._tok) for g in part.generic_arguments], part._tok)
+                    for part in ast.parts], ast._tok)
+            case _:
+                return ast
+
+    @staticmethod
+    def qualified_type(ast: Ast.TypeAst, s: ScopeHandler) -> Ast.TypeAst:
+        # Get the canonical form of a concrete type: the fully qualified name of its class, with the canonical forms of
+        # its generic arguments, so the same type is written the same way however it was written in the source (ie "Num"
+        # in the std module, and "std.Num" elsewhere), and can be found from any scope.
+        ast = CodeGen.concrete_type(ast, CodeGen.GENERIC_MAP)
+        if isinstance(ast, Ast.TypeTupleAst):
+            return Ast.TypeTupleAst([CodeGen.qualified_type(ty, s) for ty in ast.types], ast._tok)
+
+        cls_scope = CodeGen.class_scope(ast, s)
+        if cls_scope is None:
+            raise CodeGen.unsupported(ast)
+        generic_arguments = [Ast.TypeGenericArgumentAst(None, CodeGen.qualified_type(getattr(g, "value", g), s), ast._tok) for g in ast.parts[-1].generic_arguments]
+        names = CodeGen.qualified_name(cls_scope).split(".")
+        parts = [Ast.GenericIdentifierAst(name, [], ast._tok) for name in names[:-1]] + [Ast.GenericIdentifierAst(names[-1], generic_arguments, ast._tok)]
+        return Ast.TypeSingleAst(parts, ast._tok)
+
+    @staticmethod
+    def qualified_name(cls_scope: Scope) -> str:
+        return ".".join([name for name in reversed(cls_scope.ancestors_names()) if name != "Global"] + [str(cls_scope.name)])
+
+    @staticmethod
+    def class_scope(ast: Ast.TypeSingleAst, s: ScopeHandler) -> Optional[Scope]:
+        # Types are fully qualified by the namespace substitution, apart from types in the module that defines them, and
+        # the overload classes of methods, which are nested in the super-imposition of their owner. These are found by
+        # looking in the current scope and its ancestors.
+        for scope in [s.global_scope, s.current_scope] + s.current_scope.ancestors():
+            cls_scope = scope.get_child_scope(ast)
+            if cls_scope:
+                return cls_scope
+        return None
+
+    @staticmethod
+    def class_attributes(ast: Ast.TypeSingleAst, s: ScopeHandler) -> list[SymbolTypes.VariableSymbol]:
+        # The attributes of a class are the variable symbols in its scope, in the order they were declared in.
+        cls_scope = CodeGen.class_scope(ast, s)
+        return [symbol for symbol in cls_scope.symbol_table.symbols.values() if isinstance(symbol, SymbolTypes.VariableSymbol)]
+
+    @staticmethod
+    def member_index(ast: Ast.PostfixExpressionAst, s: ScopeHandler) -> int:
+        # Get the index of the attribute (or tuple element) being accessed, in the struct type of the lhs.
+        if isinstance(ast.op.identifier, Ast.NumberLiteralBase10Ast):
+            return int(ast.op.identifier.integer)
+        lhs_ty = TypeInfer.infer_expression(ast.lhs, s)
+        return [attribute.name for attribute in CodeGen.class_attributes(lhs_ty, s)].index(ast.op.identifier)
+
+    @staticmethod
+    def number_literal_value(ast: Ast.NumberLiteralAst) -> float:
+        # Literals are evaluated the same way as when they're folded, so folding doesn't change any value.
+        value = ConstantFolding.literal_value(ast)
+        if value is None:
+            raise CodeGen.unsupported(ast)
+        return value
+
+    @staticmethod
+    def is_void(ast: Ast.TypeAst, s: ScopeHandler) -> bool:
+        ast = CodeGen.concrete_type(ast, CodeGen.GENERIC_MAP)
+        return isinstance(ast, Ast.TypeSingleAst) and isinstance(CodeGen.BUILTIN_TYPES.get(CodeGen.class_scope(ast, s)), ll.VoidType)
+
+    @staticmethod
+    def is_variable(ast: Ast.IdentifierAst | Ast.TokenAst) -> bool:
+        return isinstance(ast, Ast.IdentifierAst) or ast.tok.token_type == TokenType.KwSelf
+
+    @staticmethod
+    def is_function_object(ast: Ast.IdentifierAst, f: CodeGenFunction, s: ScopeHandler) -> bool:
+        # A name that isn't a local variable, and is bound to an overload class instance, is a function name.
+        symbol = s.current_scope.get_symbol(ast, SymbolTypes.VariableSymbol, error=False)
+        return symbol is not None and id(symbol) not in f.variables and CodeGen.is_overload_class(symbol.type)
+
+    @staticmethod
+    def is_overload_class(ast: Ast.TypeAst) -> bool:
+        return isinstance(ast, Ast.TypeSingleAst) and ast.parts[-1].identifier.startswith("__MOCK_")
+
+    @staticmethod
+    def is_passed_by_pointer(parameter: Ast.FunctionParameterAst, argument: ll.Argument) -> bool:
+        # Borrows are passed by pointer, and so are moved aggregates (see MOVE_BY_POINTER), which are the only other
+        # pointers to a struct type.
+        return bool(parameter.calling_convention) or (isinstance(argument.type, ll.PointerType) and isinstance(argument.type.pointee, ll.BaseStructType))
+
+    @staticmethod
+    def is_place(ast: Ast.ExpressionAst) -> bool:
+        # A place is an expression with an address: a variable, or an attribute of a place.
+        match ast:
+            case Ast.IdentifierAst() | Ast.TokenAst() if CodeGen.is_variable(ast): return True
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixMemberAccessAst): return CodeGen.is_place(ast.lhs)
+            case _: return False
+
+    @staticmethod
+    def is_else_branch(ast: Ast.PatternStatementAst) -> bool:
+        # The "else" branch is parsed as a branch with the single pattern "true" and no comparison operator.
+        return not ast.comparison_op and not ast.guard and len(ast.patterns) == 1 and isinstance(ast.patterns[0].value, Ast.BoolLiteralAst) and ast.patterns[0].value.value
+
+    @staticmethod
+    def unsupported(ast) -> SystemExit:
+        return SystemExit(ErrFmt.err(ast._tok) + f"{type(ast).__name__} is not supported by the code generator yet.")
+
+    @staticmethod
+    def target_machine(opt_level: int = 0) -> llvm.TargetMachine:
+        if opt_level not in CodeGen.TARGET_MACHINES:
+            CodeGen.TARGET_MACHINES[opt_level] = CodeGen.create_target_machine(opt_level)
+        return CodeGen.TARGET_MACHINES[opt_level]
+
+    @staticmethod
+    def create_target_machine(opt_level: int) -> llvm.TargetMachine:
+        # Create a new target machine for the host. An execution engine takes ownership of (and disposes of) the target
+        # machine it is created with, so execution engines must be given a new one, rather than a cached one.
+        llvm.initialize_native_target()
+        llvm.initialize_native_asmprinter()
+        return llvm.Target.from_triple(llvm.get_process_triple()).create_target_machine(opt=opt_level, reloc="pic")
+
+    @staticmethod
+    def parse(module: ll.Module) -> llvm.ModuleRef:
+        # Parse the generated IR into LLVM, and verify it.
+        llvm_module = llvm.parse_assembly(str(module))
+        llvm_module.verify()
+        return llvm_module
+
+    @staticmethod
+    def optimise(llvm_module: llvm.ModuleRef, opt_level: int) -> str:
+        # Run the optimisation pipeline for the "-O" level over the module, in place. The report of how long each pass
+        # took is returned (and is empty for level 0, as no passes are run).
+        if opt_level == 0:
+            return ""
+
+        tuning_options = llvm.create_pipeline_tuning_options(speed_level=opt_level)
+        for option, value in CodeGen.OPT_LEVELS[opt_level].items():
+            setattr(tuning_options, option, value)
+
+        pass_builder = llvm.create_pass_builder(CodeGen.target_machine(opt_level), tuning_options)
+        pass_builder.start_pass_timing()
+        pass_builder.getModulePassManager().run(llvm_module, pass_builder)
+        llvm_module.verify()
+        return pass_builder.finish_pass_timing()
+
+    @staticmethod
+    def emit_object(llvm_module: llvm.ModuleRef, opt_level: int) -> bytes:
+        # Compile the (optimised) module into an object file for the host machine.
+        return CodeGen.target_machine(opt_level).emit_object(llvm_module)
+
+    @staticmethod
+    def run(compiled_modules: list[CompiledModule], opt_level: int) -> int:
+        # Compile the optimised IR of the modules in memory, and call the "main" entry point, returning its exit code.
+        # The modules of the previous run are removed from the cached execution engine first, so that their symbols are
+        # replaced by the new ones.
+        llvm_modules = [llvm.parse_assembly(compiled_module.optimised_ir) for compiled_module in compiled_modules]
+        if opt_level not in CodeGen.ENGINES:
+            empty_module = llvm.parse_assembly("")
+            empty_module.triple = llvm.get_process_triple()
+            CodeGen.ENGINES[opt_level] = llvm.create_mcjit_compiler(empty_module, CodeGen.create_target_machine(opt_level))
+            CodeGen.ENGINE_MODULES[opt_level] = []
+
+        engine = CodeGen.ENGINES[opt_level]
+        for llvm_module in CodeGen.ENGINE_MODULES[opt_level]:
+            engine.remove_module(llvm_module)
+        for llvm_module in llvm_modules:
+            engine.add_module(llvm_module)
+        CodeGen.ENGINE_MODULES[opt_level] = llvm_modules
+
+        engine.finalize_object()
+        engine.run_static_constructors()
+        main = engine.get_function_address("main")
+        if not main:
+            raise SystemExit("The program has no 'main' function to run.")
+        return ctypes.CFUNCTYPE(ctypes.c_int32)(main)()
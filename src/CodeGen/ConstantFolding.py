@@ -0,0 +1,171 @@
+"""
+Constant folding evaluates the expressions whose operands are all literals at compile time, and replaces them in the
+analysed AST with the literal of their value, before any code is generated. The std.Num arithmetic and comparison
+operators, and the std.Bool logical and comparison operators, are folded, with the same semantics as the instructions
+that the code generator lowers them into (IEEE doubles, with "rem" as "fmod"). Nested expressions are folded inside-out,
+so "1 + 2 * 3" folds into "7".
+
+Results that can't be written as a literal (infinities and NaNs), and operations that would raise in Python (division
+by zero), are left for the code generator, so they behave the same at runtime as they would have unfolded.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+from src.LexicalAnalysis.Tokens import Token, TokenType
+from src.SyntacticAnalysis import Ast
+
+
+class ConstantFolding:
+    # The operators that are folded, by the name of their operator method (see Ast.BIN_FN), for each literal type.
+    NUM_OPERATORS = {
+        "add": lambda l, r: l + r,
+        "sub": lambda l, r: l - r,
+        "mul": lambda l, r: l * r,
+        "div": lambda l, r: l / r,
+        "rem": lambda l, r: math.fmod(l, r),
+        "eq": lambda l, r: l == r,
+        "ne": lambda l, r: l != r,
+        "lt": lambda l, r: l < r,
+        "le": lambda l, r: l <= r,
+        "gt": lambda l, r: l > r,
+        "ge": lambda l, r: l >= r,
+    }
+
+    BOOL_OPERATORS = {
+        "and": lambda l, r: l and r,
+        "or": lambda l, r: l or r,
+        "eq": lambda l, r: l == r,
+        "ne": lambda l, r: l != r,
+    }
+
+    # The number of expressions folded in each module, keyed by the module's name.
+    FOLDED: dict[str, int] = {}
+    MODULE: str = ""
+
+    @staticmethod
+    def fold(mods: list[Ast.ProgramAst]) -> None:
+        ConstantFolding.FOLDED = {}
+        for mod in mods:
+            ConstantFolding.MODULE = str(mod.module.identifier)
+            ConstantFolding.FOLDED[ConstantFolding.MODULE] = 0
+            ConstantFolding.fold_members(mod.module.body.members)
+
+    @staticmethod
+    def fold_members(members: list[Ast.ModuleMemberAst | Ast.SupMemberAst]) -> None:
+        # Functions are methods of super-impositions (see AstReduction), which can be nested.
+        for member in members:
+            match member:
+                case Ast.SupPrototypeNormalAst() | Ast.SupPrototypeInheritanceAst():
+                    ConstantFolding.fold_members(member.body.members)
+                case Ast.SupMethodPrototypeAst():
+                    ConstantFolding.fold_statements(member.body.statements)
+
+    @staticmethod
+    def fold_statements(asts: list[Ast.StatementAst]) -> None:
+        for i, statement in enumerate(asts):
+            match statement:
+                case Ast.ReturnStatementAst() | Ast.LetStatementAst():
+                    statement.value = ConstantFolding.fold_expression(statement.value)
+                case Ast.TypedefStatementAst() | Ast.FunctionPrototypeAst():
+                    pass
+                case _:
+                    asts[i] = ConstantFolding.fold_expression(statement)
+
+    @staticmethod
+    def fold_expression(ast: Optional[Ast.ExpressionAst]) -> Optional[Ast.ExpressionAst]:
+        # Fold the sub-expressions of an expression, and then the expression itself if it's an operator on literals.
+        # The (possibly new) expression is returned, for the parent to replace the old one with.
+        match ast:
+            case Ast.BinaryExpressionAst():
+                ast.lhs = ConstantFolding.fold_expression(ast.lhs)
+                ast.rhs = ConstantFolding.fold_expression(ast.rhs)
+                return ConstantFolding.fold_binary_expression(ast)
+            case Ast.TupleLiteralAst():
+                ast.values = [ConstantFolding.fold_expression(value) for value in ast.values]
+            case Ast.AssignmentExpressionAst():
+                ast.rhs = ConstantFolding.fold_expression(ast.rhs)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixFunctionCallAst):
+                ast.lhs = ConstantFolding.fold_expression(ast.lhs)
+                for argument in ast.op.arguments:
+                    argument.value = ConstantFolding.fold_expression(argument.value)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixMemberAccessAst):
+                ast.lhs = ConstantFolding.fold_expression(ast.lhs)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixStructInitializerAst):
+                for field in ast.op.fields:
+                    field.value = ConstantFolding.fold_expression(field.value)
+            case Ast.IfStatementAst():
+                ast.condition = ConstantFolding.fold_expression(ast.condition)
+                for branch in ast.branches:
+                    for pattern in branch.patterns:
+                        pattern.value = ConstantFolding.fold_expression(pattern.value)
+                    branch.guard = ConstantFolding.fold_expression(branch.guard)
+                    ConstantFolding.fold_statements(branch.body)
+            case Ast.WhileStatementAst():
+                ast.condition = ConstantFolding.fold_expression(ast.condition)
+                ConstantFolding.fold_statements(ast.body)
+            case Ast.InnerScopeAst():
+                ConstantFolding.fold_statements(ast.body)
+        return ast
+
+    @staticmethod
+    def fold_binary_expression(ast: Ast.BinaryExpressionAst) -> Ast.ExpressionAst:
+        lhs = ConstantFolding.literal_value(ast.lhs)
+        rhs = ConstantFolding.literal_value(ast.rhs)
+        if lhs is None or rhs is None or type(lhs) is not type(rhs):
+            return ast
+
+        operators = ConstantFolding.BOOL_OPERATORS if isinstance(lhs, bool) else ConstantFolding.NUM_OPERATORS
+        operator = operators.get(Ast.BIN_FN.get(ast.op.tok.token_type))
+        if operator is None:
+            return ast
+        try:
+            value = operator(lhs, rhs)
+        except (ZeroDivisionError, ValueError):
+            return ast
+
+        if isinstance(value, bool):
+            folded = Ast.BoolLiteralAst(value, ast._tok)
+        elif math.isfinite(value):
+            folded = ConstantFolding.number_literal(value, ast._tok)
+        else:
+            return ast
+        ConstantFolding.FOLDED[ConstantFolding.MODULE] += 1
+        return folded
+
+    @staticmethod
+    def literal_value(ast: Ast.ExpressionAst) -> Optional[float | bool]:
+        # The value of a std.Num or std.Bool literal, or None for any other expression. Imaginary numbers aren't folded.
+        match ast:
+            case Ast.BoolLiteralAst():
+                return ast.value
+            case Ast.NumberLiteralBase10Ast() if not ast.is_imaginary:
+                value = ast.integer + ("." + ast.decimal if ast.decimal else "")
+                value += ("e" + (ast.exponent.sign.tok.token_metadata if ast.exponent.sign else "") + ast.exponent.value) if ast.exponent else ""
+                return float(value) * (-1 if ast.sign and ast.sign.tok.token_type == TokenType.TkSub else 1)
+            case Ast.NumberLiteralBase16Ast() | Ast.NumberLiteralBase02Ast():
+                return float(int(ast.value, 0))
+            case _:
+                return None
+
+    @staticmethod
+    def number_literal(value: float, tok: int) -> Ast.NumberLiteralBase10Ast:
+        # Write a double as a base 10 literal that parses back into exactly the same double (the shortest repr does).
+        mantissa, _, exponent = repr(abs(value)).partition("e")
+        integer, _, decimal = mantissa.partition(".")
+        sign = Ast.TokenAst(Token("-", TokenType.TkSub), tok) if math.copysign(1, value) < 0 else None
+        exponent_ast = None
+        if exponent:
+            exponent_sign = Ast.TokenAst(Token("-", TokenType.TkSub), tok) if exponent.startswith("-") else None
+            exponent_ast = Ast.NumberExponentAst(exponent_sign, exponent.lstrip("+-"), tok)
+        return Ast.NumberLiteralBase10Ast(sign, integer, "" if decimal == "0" else decimal, exponent_ast, False, tok)
+
+    @staticmethod
+    def report() -> str:
+        report = ""
+        for module, folded in ConstantFolding.FOLDED.items():
+            report += f"Module {module}: {folded} expressions folded\n"
+        report += f"Total: {sum(ConstantFolding.FOLDED.values())} expressions folded\n"
+        return report
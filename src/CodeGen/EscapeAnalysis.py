@@ -0,0 +1,131 @@
+"""
+Escape analysis finds the objects (struct initialisers) whose value leaves the function that creates them, by being
+returned, or by being written through a borrowed parameter into memory that the caller owns. Every other object lives
+and dies in the function's frame: it is bound to a local variable, moved into a call, borrowed, or read from.
+
+The code generator never allocates objects on the heap, as every value is passed and returned by value, so escaping
+objects are the ones that are copied out of the frame. Objects that don't escape are constructed in place, in the stack
+slot of the variable or moved argument that holds them, and objects that escape are built as values, which LLVM returns
+in registers (or through the caller's return slot).
+
+The analysis is syntactic, over the function body after semantic analysis, and is conservative: an object bound to a
+variable escapes if any variable with the same name is returned or written through a borrow, regardless of scoping.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from src.LexicalAnalysis.Tokens import TokenType
+from src.SyntacticAnalysis import Ast
+
+
+class EscapeAnalysis:
+    # The state of the function being analysed: the names of the parameters that point into the caller's memory, the
+    # objects bound to each local variable name, the names of the variables whose value escapes, and every object
+    # created in the body.
+    OUTER_NAMES: set[str] = set()
+    BINDINGS: dict[str, list[Ast.PostfixStructInitializerAst]] = {}
+    ESCAPING_NAMES: set[str] = set()
+    OBJECTS: list[Ast.PostfixStructInitializerAst] = []
+
+    @staticmethod
+    def analyse_function(ast: Ast.SupMethodPrototypeAst) -> None:
+        # Record whether each object created in the function's body escapes, on the object's initialiser, as "_escapes".
+        # The body of a generic function is analysed once per instantiation, with the same result each time.
+        EscapeAnalysis.OUTER_NAMES = {parameter.identifier.identifier for parameter in ast.parameters if parameter.calling_convention}
+        EscapeAnalysis.BINDINGS = {}
+        EscapeAnalysis.ESCAPING_NAMES = set()
+        EscapeAnalysis.OBJECTS = []
+
+        escaping = set()
+        EscapeAnalysis.analyse_statements(ast.body.statements, escaping)
+        for name in EscapeAnalysis.ESCAPING_NAMES:
+            escaping.update(id(initialiser) for initialiser in EscapeAnalysis.BINDINGS.get(name, []))
+        for initialiser in EscapeAnalysis.OBJECTS:
+            setattr(initialiser, "_escapes", id(initialiser) in escaping)
+
+    @staticmethod
+    def analyse_statements(asts: list[Ast.StatementAst], escaping: set[int]) -> None:
+        for statement in asts:
+            match statement:
+                case Ast.TypedefStatementAst():
+                    pass
+                case Ast.ReturnStatementAst():
+                    EscapeAnalysis.escape(statement.value, escaping)
+                    EscapeAnalysis.analyse_expression(statement.value, escaping)
+                case Ast.LetStatementAst():
+                    if len(statement.variables) == 1 and EscapeAnalysis.is_initialiser(statement.value):
+                        EscapeAnalysis.BINDINGS.setdefault(statement.variables[0].identifier.identifier, []).append(statement.value.op)
+                    EscapeAnalysis.analyse_expression(statement.value, escaping)
+                case _:
+                    EscapeAnalysis.analyse_expression(statement, escaping)
+
+    @staticmethod
+    def analyse_expression(ast: Optional[Ast.ExpressionAst], escaping: set[int]) -> None:
+        # Walk an expression for the objects it creates, and for the assignments that bind objects to variables or write
+        # values into the caller's memory.
+        match ast:
+            case Ast.TupleLiteralAst():
+                [EscapeAnalysis.analyse_expression(value, escaping) for value in ast.values]
+            case Ast.BinaryExpressionAst():
+                EscapeAnalysis.analyse_expression(ast.lhs, escaping)
+                EscapeAnalysis.analyse_expression(ast.rhs, escaping)
+            case Ast.AssignmentExpressionAst():
+                for lhs in ast.lhs:
+                    if EscapeAnalysis.place_root(lhs) in EscapeAnalysis.OUTER_NAMES:
+                        EscapeAnalysis.escape(ast.rhs, escaping)
+                    elif isinstance(lhs, Ast.IdentifierAst) and EscapeAnalysis.is_initialiser(ast.rhs):
+                        EscapeAnalysis.BINDINGS.setdefault(lhs.identifier, []).append(ast.rhs.op)
+                    EscapeAnalysis.analyse_expression(lhs, escaping)
+                EscapeAnalysis.analyse_expression(ast.rhs, escaping)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixFunctionCallAst):
+                EscapeAnalysis.analyse_expression(ast.lhs, escaping)
+                [EscapeAnalysis.analyse_expression(argument.value, escaping) for argument in ast.op.arguments]
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixMemberAccessAst):
+                EscapeAnalysis.analyse_expression(ast.lhs, escaping)
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixStructInitializerAst):
+                EscapeAnalysis.OBJECTS.append(ast.op)
+                [EscapeAnalysis.analyse_expression(field.value, escaping) for field in ast.op.fields]
+            case Ast.IfStatementAst():
+                EscapeAnalysis.analyse_expression(ast.condition, escaping)
+                for branch in ast.branches:
+                    [EscapeAnalysis.analyse_expression(pattern.value, escaping) for pattern in branch.patterns]
+                    EscapeAnalysis.analyse_expression(branch.guard, escaping)
+                    EscapeAnalysis.analyse_statements(branch.body, escaping)
+            case Ast.WhileStatementAst():
+                EscapeAnalysis.analyse_expression(ast.condition, escaping)
+                EscapeAnalysis.analyse_statements(ast.body, escaping)
+            case Ast.InnerScopeAst():
+                EscapeAnalysis.analyse_statements(ast.body, escaping)
+
+    @staticmethod
+    def escape(ast: Optional[Ast.ExpressionAst], escaping: set[int]) -> None:
+        # Mark the objects that a value leaving the function is made of: the object itself, the objects nested in it (as
+        # attributes or tuple elements), or the objects bound to the variable that it is read from.
+        match ast:
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixStructInitializerAst):
+                escaping.add(id(ast.op))
+                [EscapeAnalysis.escape(field.value or field.identifier, escaping) for field in ast.op.fields]
+            case Ast.TupleLiteralAst():
+                [EscapeAnalysis.escape(value, escaping) for value in ast.values]
+            case _ if EscapeAnalysis.place_root(ast) is not None:
+                EscapeAnalysis.ESCAPING_NAMES.add(EscapeAnalysis.place_root(ast))
+
+    @staticmethod
+    def escapes(ast: Ast.ExpressionAst) -> bool:
+        # Objects in functions that haven't been analysed (and any other value) are treated as escaping.
+        return not EscapeAnalysis.is_initialiser(ast) or getattr(ast.op, "_escapes", True)
+
+    @staticmethod
+    def is_initialiser(ast: Optional[Ast.ExpressionAst]) -> bool:
+        return isinstance(ast, Ast.PostfixExpressionAst) and isinstance(ast.op, Ast.PostfixStructInitializerAst)
+
+    @staticmethod
+    def place_root(ast: Optional[Ast.ExpressionAst]) -> Optional[str]:
+        # The name of the variable that a place belongs to, ie "p" for "p.a.b", or None for any other expression.
+        match ast:
+            case Ast.IdentifierAst(): return ast.identifier
+            case Ast.TokenAst() if ast.tok.token_type == TokenType.KwSelf: return "self"
+            case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixMemberAccessAst): return EscapeAnalysis.place_root(ast.lhs)
+            case _: return None
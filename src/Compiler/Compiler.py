@@ -3,33 +3,147 @@ from src.LexicalAnalysis.Lexer import Lexer
 from src.SyntacticAnalysis.Ast import ProgramAst
 from src.SyntacticAnalysis.Parser import Parser
 
+from src.SemanticAnalysis2.ModuleTree import ModuleTree
 from src.SemanticAnalysis2.Semantics import Semantics
+from src.CodeGen.CodeGen import CodeGen, CompiledModule
+from src.CodeGen.ConstantFolding import ConstantFolding
+from src.Compiler.Dump import Dump
+from src.Compiler.LookupStats import LookupStats
+from src.Compiler.MemoryReport import MemoryReport
+from src.Compiler.ParseProfile import ParseProfile
+from src.Compiler.Profiler import Profiler
+from src.Compiler.TimeReport import TimeReport
+from src.Compiler.Trace import Trace
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class CompilerOptions:
+    # The options of a compilation (see src/__main__.py): the "-O" level, whether the program is run in memory instead
+    # of being compiled into object files, the instrumentation that is enabled, and the artefacts that are dumped.
+    opt_level: int = 0
+    run: bool = False
+    time_report: bool = False
+    trace: bool = False
+    profile: Optional[str] = None
+    parse_profile: bool = False
+    lookup_stats: bool = False
+    memory_report: bool = False
+    dump: list[str] = field(default_factory=list)
+    dump_format: str = "json"
 
-import dataclasses
-from src.Compiler.Printer import save_json
 
 class Compiler:
     _code: str
     _tokens: list[Token]
     _ast: ProgramAst
+    _compiled_modules: list[CompiledModule]
+    exit_code: int
 
-    def __init__(self, code: str, root_path: str):
-        # Load the code into the Compiler class.
+    def __init__(self, code: str, root_path: str, options: Optional[CompilerOptions] = None):
+        # Load the code into the Compiler class. The instrumentation is stopped even if the compilation fails, so the
+        # hooks and the patched methods don't outlive it.
+        options = options or CompilerOptions()
         self._code = code
+        try:
+            Compiler.start(options)
+            self.compile(root_path, options)
+            Compiler.save(options)
+        finally:
+            Compiler.stop(options)
+
+        # Run the program in memory, from the optimised IR.
+        self.exit_code = 0
+        if options.run:
+            self.exit_code = CodeGen.run(self._compiled_modules, options.opt_level)
+            if CodeGen.COUNT_ALLOCATIONS:
+                open("_out/allocations.txt", "w").write(CodeGen.allocation_report(self._compiled_modules, options.opt_level))
 
+    def compile(self, root_path: str, options: CompilerOptions) -> None:
         # Lex the code into a stream of tokens.
-        self._tokens = Lexer(code).lex()
-        tok_str = ""
-        for i, tok in enumerate(self._tokens):
-            tok_str += f"{i}: {tok}\n"
-        open("_out/tokens.txt", "w").write(tok_str)
+        with TimeReport.phase("lex", root_path):
+            self._tokens = Lexer(self._code).lex()
+        Dump.tokens(self._tokens)
 
         # Parse the tokens into an AST.
-        self._ast = Parser(self._tokens, root_path).parse()
+        with TimeReport.phase("parse", root_path):
+            self._ast = Parser(self._tokens, root_path).parse()
+        TimeReport.name_module(root_path, str(self._ast.module.identifier))
+        MemoryReport.snapshot("parse", [self._ast])
+
+        Dump.ast(self._ast)
+        Dump.code(str(self._ast))
+
+        if options.lookup_stats:
+            LookupStats.start()
+        semantics = Semantics(self._ast, self._tokens)
+        if options.lookup_stats:
+            LookupStats.stop()
+        Dump.report("modules.txt", ModuleTree.report())
+
+        # Generate the LLVM IR for each module, optimise it for the "-O" level, and compile each module into an object
+        # file (unless the program is being run in memory). The IR, optimised IR, and the time taken by each
+        # optimisation pass can be dumped alongside, for the modules that weren't loaded from the object cache.
+        self._compiled_modules = CodeGen.compile(semantics.modules, semantics.scope_handler, options.opt_level, emit_objects=not options.run)
+        pass_timings = ""
+        for compiled_module in self._compiled_modules:
+            if compiled_module.ir is None:
+                pass_timings += f"Module {compiled_module.name} (-O{options.opt_level}): cached\n"
+            else:
+                Dump.ir(compiled_module.name, compiled_module.ir, compiled_module.optimised_ir)
+                pass_timings += f"Module {compiled_module.name} (-O{options.opt_level}):\n{compiled_module.pass_timings}\n"
+            if compiled_module.object_code is not None:
+                open(f"_out/{compiled_module.name}.o", "wb").write(compiled_module.object_code)
+        Dump.report("pass_timings.txt", pass_timings)
+        Dump.report("folding.txt", ConstantFolding.report())
+        Dump.report("monomorphisation.txt", CodeGen.monomorphisation_report())
+        Dump.report("dispatch.txt", CodeGen.dispatch_report(self._compiled_modules))
+        Dump.report("escape.txt", CodeGen.escape_report(self._compiled_modules))
 
-        d = dataclasses.asdict(self._ast)
-        save_json(d, "_out/ast.json")
-        open("_out/new_code.spp", "w").write(str(self._ast))
+    @staticmethod
+    def start(options: CompilerOptions) -> None:
+        if options.time_report:
+            TimeReport.start()
+        if options.trace:
+            Trace.start()
+        if options.profile:
+            Profiler.start(options.profile)
+        if options.parse_profile:
+            ParseProfile.start()
+        if options.memory_report:
+            MemoryReport.start()
+        if options.dump:
+            Dump.start(options.dump, options.dump_format)
 
-        Semantics(self._ast)
+    @staticmethod
+    def save(options: CompilerOptions) -> None:
+        if options.time_report:
+            TimeReport.save("_out/time_report.json")
+        if options.trace:
+            Trace.save("_out/trace.json")
+        if options.profile:
+            Profiler.save("_out/profile.txt")
+        if options.parse_profile:
+            ParseProfile.save("_out/parse_profile.txt", "_out/parse_heatmap.html")
+        if options.memory_report:
+            MemoryReport.save("_out/memory_report.json", "_out/memory_report.txt")
 
+    @staticmethod
+    def stop(options: CompilerOptions) -> None:
+        # In the reverse order of starting, as the lookup statistics and the profiler can both wrap the same methods.
+        if options.dump:
+            Dump.stop()
+        if options.memory_report:
+            MemoryReport.stop()
+        if options.lookup_stats:
+            LookupStats.stop()
+        if options.parse_profile:
+            ParseProfile.stop()
+        if options.profile:
+            Profiler.stop()
+        if options.trace:
+            Trace.stop()
+        if options.time_report:
+            TimeReport.stop()
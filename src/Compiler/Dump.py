@@ -0,0 +1,218 @@
+"""
+The dumps write the compiler's intermediate artefacts to "_out/", for debugging: "tokens" (the main module's tokens, to
+"tokens.txt"), "ast" (the main module's AST, after parsing, to "ast.json"), "code" (the code of every module, to
+"new_code.spp"), "symbols" (the scope tree, after the semantic analysis, to "symbol_table.json"), "ir" (the LLVM IR of
+each module that wasn't loaded from the object cache, before and after optimisation, to "<module>.ll" and
+"<module>.opt.ll") and "reports" (the reports of the module tree, the optimisation passes, constant folding,
+monomorphisation, dispatch and escape analysis, to "modules.txt", "pass_timings.txt", "folding.txt",
+"monomorphisation.txt", "dispatch.txt" and "escape.txt"). They are selected with "--dump <artefact> ...", and none are
+written by default (the object files are, as they are the compiler's output). The AST and the scope tree are written as
+JSON, or as MessagePack ("--dump-format msgpack", to ".msgpack" files, with the optional "msgpack" package).
+
+The AST and the scope tree are streamed to the file as they are visited, node by node, so they are never copied into
+dicts, or formatted, in memory. Each AST node is written as a map of its fields, with its type in the "node" key, and
+tokens and enums are written by their name.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+from enum import Enum
+from typing import Any, BinaryIO, TextIO
+
+from src.SemanticAnalysis2.SymbolTable import Scope, ScopeHandler
+from src.LexicalAnalysis.Tokens import Token
+from src.SyntacticAnalysis import Ast
+
+
+class JsonWriter:
+    # Writes JSON from the events of the visitor. Each open map or array keeps the number of items written to it, so
+    # the items are separated with commas; a value in a map is separated by its key instead.
+    def __init__(self, file: TextIO):
+        self.file = file
+        self.stack: list[list] = []
+
+    def separate(self) -> None:
+        if self.stack and self.stack[-1][0] == "array":
+            if self.stack[-1][1]:
+                self.file.write(",")
+            self.stack[-1][1] += 1
+
+    def map(self, size: int) -> None:
+        self.separate()
+        self.file.write("{")
+        self.stack.append(["map", 0])
+
+    def array(self, size: int) -> None:
+        self.separate()
+        self.file.write("[")
+        self.stack.append(["array", 0])
+
+    def key(self, key: str) -> None:
+        if self.stack[-1][1]:
+            self.file.write(",")
+        self.stack[-1][1] += 1
+        self.file.write(json.dumps(key) + ":")
+
+    def value(self, value: Any) -> None:
+        self.separate()
+        self.file.write(json.dumps(value))
+
+    def end(self) -> None:
+        self.file.write("}" if self.stack.pop()[0] == "map" else "]")
+
+
+class MsgpackWriter:
+    # Writes MessagePack from the events of the visitor. The maps and arrays are written with their size up front, so
+    # nothing needs closing.
+    def __init__(self, file: BinaryIO):
+        import msgpack
+        self.file = file
+        self.packer = msgpack.Packer()
+
+    def map(self, size: int) -> None:
+        self.file.write(self.packer.pack_map_header(size))
+
+    def array(self, size: int) -> None:
+        self.file.write(self.packer.pack_array_header(size))
+
+    def key(self, key: str) -> None:
+        self.file.write(self.packer.pack(key))
+
+    def value(self, value: Any) -> None:
+        self.file.write(self.packer.pack(value))
+
+    def end(self) -> None:
+        pass
+
+
+class Dump:
+    ARTEFACTS = ["tokens", "ast", "code", "symbols", "ir", "reports"]
+    FORMATS = ["json", "msgpack"]
+
+    # The artefacts that are dumped, and the format of the AST and the scope tree.
+    ENABLED: set[str] = set()
+    FORMAT = "json"
+
+    @staticmethod
+    def start(artefacts: list[str], format: str = "json") -> None:
+        if format == "msgpack":
+            try:
+                import msgpack
+            except ImportError:
+                raise SystemExit("The 'msgpack' dump format requires the 'msgpack' package.")
+        Dump.ENABLED = set(artefacts)
+        Dump.FORMAT = format
+
+    @staticmethod
+    def stop() -> None:
+        Dump.ENABLED = set()
+
+    @staticmethod
+    def writer(name: str) -> tuple[Any, JsonWriter | MsgpackWriter]:
+        if Dump.FORMAT == "msgpack":
+            file = open(f"_out/{name}.msgpack", "wb")
+            return file, MsgpackWriter(file)
+        file = open(f"_out/{name}.json", "w")
+        return file, JsonWriter(file)
+
+    @staticmethod
+    def tokens(tokens: list[Token]) -> None:
+        if "tokens" not in Dump.ENABLED:
+            return
+        with open("_out/tokens.txt", "w") as file:
+            for i, tok in enumerate(tokens):
+                file.write(f"{i}: {tok}\n")
+
+    @staticmethod
+    def code(code: str, append: bool = False) -> None:
+        if "code" not in Dump.ENABLED:
+            return
+        with open("_out/new_code.spp", "a" if append else "w") as file:
+            file.write(code)
+
+    @staticmethod
+    def ast(ast: Ast.ProgramAst) -> None:
+        if "ast" not in Dump.ENABLED:
+            return
+        file, writer = Dump.writer("ast")
+        with file:
+            Dump.visit(ast, writer)
+
+    @staticmethod
+    def symbols(s: ScopeHandler) -> None:
+        if "symbols" not in Dump.ENABLED:
+            return
+        file, writer = Dump.writer("symbol_table")
+        with file:
+            Dump.visit_scope(s.global_scope, writer)
+
+    @staticmethod
+    def ir(name: str, ir: str, optimised_ir: str) -> None:
+        if "ir" not in Dump.ENABLED:
+            return
+        with open(f"_out/{name}.ll", "w") as file:
+            file.write(ir)
+        with open(f"_out/{name}.opt.ll", "w") as file:
+            file.write(optimised_ir)
+
+    @staticmethod
+    def report(file_name: str, report: str) -> None:
+        if "reports" not in Dump.ENABLED:
+            return
+        with open(f"_out/{file_name}", "w") as file:
+            file.write(report)
+
+    @staticmethod
+    def visit(obj: Any, writer: JsonWriter | MsgpackWriter) -> None:
+        # Only the fields of a node are written, not the attributes that the analysis adds to it.
+        match obj:
+            case Token():
+                writer.value(f"{obj.token_type.name}({obj.token_metadata})")
+            case Enum():
+                writer.value(obj.name)
+            case None | bool() | int() | float() | str():
+                writer.value(obj)
+            case list() | tuple():
+                writer.array(len(obj))
+                for item in obj:
+                    Dump.visit(item, writer)
+                writer.end()
+            case dict():
+                writer.map(len(obj))
+                for key, item in obj.items():
+                    writer.key(str(key))
+                    Dump.visit(item, writer)
+                writer.end()
+            case _ if dataclasses.is_dataclass(obj):
+                fields = dataclasses.fields(obj)
+                writer.map(len(fields) + 1)
+                writer.key("node")
+                writer.value(type(obj).__name__)
+                for field in fields:
+                    writer.key(field.name)
+                    Dump.visit(getattr(obj, field.name), writer)
+                writer.end()
+            case _:
+                writer.value(str(obj))
+
+    @staticmethod
+    def visit_scope(scope: Scope, writer: JsonWriter | MsgpackWriter) -> None:
+        writer.map(6)
+        writer.key("id")
+        writer.value(scope.id)
+        writer.key("name")
+        writer.value(str(scope.name))
+        writer.key("parent")
+        writer.value(scope.parent.id if scope.parent is not None else None)
+        writer.key("symbols")
+        Dump.visit({str(symbol.name): symbol.json() for symbol in scope.symbol_table.symbols.values()}, writer)
+        writer.key("sup-scopes")
+        Dump.visit([str(sup_scope.name) for sup_scope in scope.sup_scopes], writer)
+        writer.key("children")
+        writer.array(len(scope.children))
+        for child in scope.children:
+            Dump.visit_scope(child, writer)
+        writer.end()
+        writer.end()
@@ -0,0 +1,160 @@
+"""
+The lookup statistics count the symbol and scope lookups of the semantic analysis: the calls to each lookup method of
+Scope, and for each lookup (the outermost call, not the calls it makes to itself on the parent scopes), whether it
+found anything, how many parent scopes it walked up, and how many sup-scopes were merged into the symbol tables it
+searched. The scopes that are looked up from the most, and the hits and misses of the lookup caches, are counted too.
+It is enabled with "--lookup-stats", and the summary is printed at the end of the semantic analysis, and written to
+"_out/lookup_stats.txt".
+
+The lookup methods are wrapped when the statistics are started, and restored when they are stopped, so they cost
+nothing when the statistics aren't enabled; the caches cost a single check. Only the main process is counted, so
+function bodies analysed by worker processes ("-j") aren't included.
+"""
+
+from __future__ import annotations
+
+import functools
+from collections import Counter
+from typing import Any, Callable, Optional
+
+from src.SemanticAnalysis2.SymbolTable import Scope
+
+
+class LookupStats:
+    ENABLED = False
+
+    # The lookup methods of Scope, and which scope's sup-scopes each one merges into the symbol table it searches: the
+    # scope that where_to_look resolves a (possibly namespaced) name to ("where"), the scope itself ("self"), or none.
+    # has_symbol merges them through the has_symbol_exclusive call it makes, and get_child_scope searches the children
+    # of the sup-scopes, not their symbol tables.
+    KINDS = {
+        "get_symbol": "where",
+        "get_symbol_exclusive": "where",
+        "has_symbol": None,
+        "has_symbol_exclusive": "self",
+        "get_child_scope": None,
+    }
+
+    # The methods that the lookups call, which aren't lookups themselves, so only their calls are counted.
+    NESTED = ["where_to_look"]
+
+    # The counts of each kind of lookup, the lookups made from each scope, and the hits and misses of each cache. The
+    # lookup that is running is kept as a frame, which the calls it makes add their parent scopes and sup-scopes to,
+    # with the lookup methods that are running, for where_to_look to know which one it's resolving the scope for.
+    COUNTS: dict[str, dict] = {}
+    SCOPES: Counter = Counter()
+    CACHES: dict[str, dict[str, int]] = {}
+    FRAME: Optional[dict] = None
+    ORIGINALS: dict[str, Callable] = {}
+
+    @staticmethod
+    def start() -> None:
+        LookupStats.ENABLED = True
+        LookupStats.COUNTS = {kind: {"calls": 0, "lookups": 0, "found": 0, "depths": Counter(), "sup_scopes": 0} for kind in LookupStats.KINDS}
+        LookupStats.COUNTS |= {kind: {"calls": 0} for kind in LookupStats.NESTED}
+        LookupStats.SCOPES = Counter()
+        LookupStats.CACHES = {}
+        LookupStats.FRAME = None
+        for kind in LookupStats.KINDS:
+            LookupStats.ORIGINALS[kind] = getattr(Scope, kind)
+            setattr(Scope, kind, LookupStats.wrap(kind, getattr(Scope, kind)))
+        for kind in LookupStats.NESTED:
+            LookupStats.ORIGINALS[kind] = getattr(Scope, kind)
+            setattr(Scope, kind, LookupStats.wrap_nested(kind, getattr(Scope, kind)))
+
+    @staticmethod
+    def stop() -> None:
+        LookupStats.ENABLED = False
+        for kind, method in LookupStats.ORIGINALS.items():
+            setattr(Scope, kind, method)
+        LookupStats.ORIGINALS = {}
+
+    @staticmethod
+    def wrap(kind: str, method: Callable) -> Callable:
+        counts = LookupStats.COUNTS[kind]
+
+        @functools.wraps(method)
+        def wrapper(self: Scope, *args, **kwargs) -> Any:
+            counts["calls"] += 1
+            outermost = LookupStats.FRAME is None
+            if outermost:
+                LookupStats.FRAME = {"kind": kind, "depth": 0, "sup_scopes": 0, "running": []}
+            elif LookupStats.FRAME["kind"] == kind:
+                LookupStats.FRAME["depth"] += 1
+            if LookupStats.KINDS[kind] == "self":
+                LookupStats.FRAME["sup_scopes"] += len(self.sup_scopes)
+
+            # A lookup that raises (ie "get_symbol" with "error=True") didn't find anything.
+            result = None
+            LookupStats.FRAME["running"].append(kind)
+            try:
+                result = method(self, *args, **kwargs)
+                return result
+            finally:
+                LookupStats.FRAME["running"].pop()
+                if outermost:
+                    frame, LookupStats.FRAME = LookupStats.FRAME, None
+                    counts["lookups"] += 1
+                    counts["found"] += bool(result)
+                    counts["depths"][frame["depth"]] += 1
+                    counts["sup_scopes"] += frame["sup_scopes"]
+                    LookupStats.SCOPES[LookupStats.scope_name(self)] += 1
+        return wrapper
+
+    @staticmethod
+    def wrap_nested(kind: str, method: Callable) -> Callable:
+        counts = LookupStats.COUNTS[kind]
+
+        @functools.wraps(method)
+        def wrapper(self: Scope, *args, **kwargs) -> Any:
+            counts["calls"] += 1
+            result = method(self, *args, **kwargs)
+
+            # The lookups that merge the sup-scopes of the scope that the name resolves to call where_to_look first.
+            frame = LookupStats.FRAME
+            if kind == "where_to_look" and frame and frame["running"] and LookupStats.KINDS[frame["running"][-1]] == "where":
+                frame["sup_scopes"] += len(result[0].sup_scopes) if result[0] else 0
+            return result
+        return wrapper
+
+    @staticmethod
+    def scope_name(scope: Scope) -> str:
+        # The path of the scope from the global scope, ie "std.Num#SUP.__MOCK_add#SUP".
+        return ".".join(str(ancestor.name) for ancestor in reversed([scope] + scope.ancestors()[:-1]))
+
+    @staticmethod
+    def cache(name: str, hit: bool) -> None:
+        counts = LookupStats.CACHES.setdefault(name, {"hits": 0, "misses": 0})
+        counts["hits" if hit else "misses"] += 1
+
+    @staticmethod
+    def report() -> str:
+        report = f"{'lookup':<24}{'calls':>10}{'lookups':>10}{'found':>8}{'mean depth':>12}{'max depth':>11}{'mean sups':>11}\n"
+        for kind, counts in LookupStats.COUNTS.items():
+            if kind in LookupStats.NESTED:
+                report += f"{kind:<24}{counts['calls']:>10}{'(called by the lookups)':>52}\n"
+                continue
+            lookups = counts["lookups"] or 1
+            mean_depth = sum(depth * number for depth, number in counts["depths"].items()) / lookups
+            report += (
+                f"{kind:<24}{counts['calls']:>10}{counts['lookups']:>10}{counts['found'] / lookups:>8.1%}{mean_depth:>12.2f}"
+                f"{max(counts['depths'], default=0):>11}{counts['sup_scopes'] / lookups:>11.2f}\n")
+
+        report += "\nParent scopes walked up per lookup:\n"
+        for kind, counts in LookupStats.COUNTS.items():
+            if counts.get("depths"):
+                report += f"  {kind:<22}" + ", ".join(f"{depth}: {number}" for depth, number in sorted(counts["depths"].items())) + "\n"
+
+        report += "\nScopes looked up from the most:\n"
+        for scope, number in LookupStats.SCOPES.most_common(10):
+            report += f"  {number:>8}  {scope}\n"
+
+        report += "\nCaches:\n"
+        for name, counts in LookupStats.CACHES.items():
+            total = counts["hits"] + counts["misses"]
+            report += f"  {name:<22}{counts['hits']:>8} hits{counts['misses']:>8} misses{counts['hits'] / total:>8.1%} hit rate\n"
+        return report
+
+    @staticmethod
+    def save(path: str) -> None:
+        open(path, "w").write(LookupStats.report())
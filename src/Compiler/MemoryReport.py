@@ -0,0 +1,151 @@
+"""
+The memory report measures the memory held by the ASTs of the modules and by the scope tree, after each phase: "parse"
+and "ast_reduction" (the main module), and "symbol_generation", "ns_substitution", "semantic_analysis" and "codegen"
+(every module, and the scopes). It is enabled with "--memory-report", and written as JSON to "_out/memory_report.json",
+and as text to "_out/memory_report.txt", with the change in each node type between consecutive phases.
+
+The size of an object is its own size (sys.getsizeof), and the size of a node is its own size plus the size of the
+objects it holds that aren't nodes themselves (its strings, lists, tokens, ...). The AST nodes are the dataclasses of
+the Ast module, and the scope nodes are the scopes, symbol tables and symbols (which aren't counted as part of the AST
+when an AST node refers to them). Every object is counted once, against the first node it's found from: the ASTs are
+walked first, so an AST node that is found from the scopes is one that isn't in any module's AST, ie a copy made by the
+analysis. The function prototypes referenced by the symbols' "fn_proto" metadata are counted as shared (found in an
+AST) or copied (not found in an AST).
+
+When the report isn't enabled, each snapshot costs a single check.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import sys
+import types
+from collections import Counter
+from enum import Enum
+from typing import Any, Optional
+
+from src.SemanticAnalysis2.SymbolTable import Scope, ScopeHandler, SymbolTable, SymbolTypes
+from src.SyntacticAnalysis import Ast
+
+
+class MemoryReport:
+    ENABLED = False
+
+    # The snapshots taken after each phase, in order.
+    SNAPSHOTS: list[dict] = []
+
+    # Objects that are shared by the whole compiler (or are immutable singletons), and aren't counted.
+    SHARED = (type, Enum, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType, bool, type(None))
+    SCOPE_NODES = (Scope, SymbolTable, SymbolTypes.Symbol)
+
+    @staticmethod
+    def start() -> None:
+        MemoryReport.ENABLED = True
+        MemoryReport.SNAPSHOTS = []
+
+    @staticmethod
+    def stop() -> None:
+        MemoryReport.ENABLED = False
+
+    @staticmethod
+    def snapshot(phase: str, mods: list[Ast.ProgramAst], s: Optional[ScopeHandler] = None) -> None:
+        if not MemoryReport.ENABLED:
+            return
+
+        seen = set()
+        ast = {"total": 0, "modules": {}, "sizes": Counter(), "counts": Counter()}
+        for mod in mods:
+            size = MemoryReport.walk(mod, seen, ast["sizes"], ast["counts"], MemoryReport.SCOPE_NODES)
+            ast["modules"][str(mod.module.identifier)] = size
+            ast["total"] += size
+
+        # The scopes are grouped by the top level module scope they are in (the module's namespace, ie "std"), or
+        # "Global" for the members of the main module, which are in the global scope.
+        scopes = {"total": 0, "modules": Counter(), "sizes": Counter(), "counts": Counter(), "fn_proto": Counter()}
+        if s is not None:
+            for scope in MemoryReport.scopes(s.global_scope):
+                for symbol in scope.symbol_table.symbols.values():
+                    if "fn_proto" in getattr(symbol, "meta_data", {}):
+                        scopes["fn_proto"]["shared" if id(symbol.meta_data["fn_proto"]) in seen else "copied"] += 1
+                size = MemoryReport.walk(scope, seen, scopes["sizes"], scopes["counts"], Scope)
+                top = next((ancestor for ancestor in [scope] + scope.ancestors() if ancestor.parent is s.global_scope), s.global_scope)
+                scopes["modules"][str(top.name) if top.is_mod else "Global"] += size
+                scopes["total"] += size
+
+        MemoryReport.SNAPSHOTS.append({"phase": phase, "ast": ast, "scopes": scopes})
+
+    @staticmethod
+    def scopes(scope: Scope) -> list[Scope]:
+        # Every scope in the tree, parents before their children.
+        found, stack = [], [scope]
+        while stack:
+            current = stack.pop()
+            found.append(current)
+            stack.extend(reversed(current.children))
+        return found
+
+    @staticmethod
+    def is_node(obj: Any) -> bool:
+        return isinstance(obj, MemoryReport.SCOPE_NODES) or (dataclasses.is_dataclass(obj) and type(obj).__module__ == Ast.__name__)
+
+    @staticmethod
+    def walk(root: Any, seen: set[int], sizes: Counter, counts: Counter, skipped: type | tuple[type, ...]) -> int:
+        # Add the size of every object found from the root, that hasn't been seen yet, to the node it was found from.
+        # The ASTs don't include the symbols (and scopes) that their nodes refer to, and scopes are walked one by one,
+        # so any other scope that is found (a parent, child or sup-scope) is skipped.
+        total = 0
+        stack: list[tuple[Any, Optional[str]]] = [(root, None)]
+        while stack:
+            obj, owner = stack.pop()
+            if id(obj) in seen or isinstance(obj, MemoryReport.SHARED) or (isinstance(obj, skipped) and obj is not root):
+                continue
+            seen.add(id(obj))
+            if MemoryReport.is_node(obj):
+                owner = type(obj).__name__
+                counts[owner] += 1
+
+            size = sys.getsizeof(obj)
+            sizes[owner] += size
+            total += size
+
+            if isinstance(obj, dict):
+                stack.extend((item, owner) for pair in obj.items() for item in pair)
+            elif isinstance(obj, (list, tuple, set, frozenset)):
+                stack.extend((item, owner) for item in obj)
+            elif hasattr(obj, "__dict__"):
+                stack.append((vars(obj), owner))
+        return total
+
+    @staticmethod
+    def report() -> str:
+        report = ""
+        previous = None
+        for snapshot in MemoryReport.SNAPSHOTS:
+            ast, scopes = snapshot["ast"], snapshot["scopes"]
+            report += f"After {snapshot['phase']}: AST {ast['total']:,} bytes, scopes {scopes['total']:,} bytes\n"
+            for module, size in ast["modules"].items():
+                report += f"  AST of {module:<30}{size:>14,}\n"
+            for module, size in scopes["modules"].items():
+                report += f"  scopes of {module:<27}{size:>14,}\n"
+            if scopes["fn_proto"]:
+                report += f"  fn_proto metadata: {scopes['fn_proto']['shared']} shared, {scopes['fn_proto']['copied']} copied\n"
+
+            # The node types that changed the most since the previous phase.
+            if previous:
+                changes = Counter()
+                for part in ["ast", "scopes"]:
+                    for name in set(snapshot[part]["sizes"]) | set(previous[part]["sizes"]):
+                        changes[f"{part}: {name}"] = snapshot[part]["sizes"][name] - previous[part]["sizes"][name]
+                changes = sorted(((name, change) for name, change in changes.items() if change), key=lambda item: -abs(item[1]))
+                report += f"  Largest changes since {previous['phase']}:{'' if changes else ' none'}\n"
+                for name, change in changes[:10]:
+                    report += f"    {name:<45}{change:>+14,}\n"
+            report += "\n"
+            previous = snapshot
+        return report
+
+    @staticmethod
+    def save(json_path: str, text_path: str) -> None:
+        json.dump(MemoryReport.SNAPSHOTS, open(json_path, "w"), indent=4)
+        open(text_path, "w").write(MemoryReport.report())
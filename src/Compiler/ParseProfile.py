@@ -0,0 +1,136 @@
+"""
+The parse profile counts, for each parser rule (each "_parse_*" method, and "_parse_token" per token type), how many
+times it was invoked, how many of those succeeded and failed, the tokens consumed by its successes, and the tokens
+re-scanned because it failed and the parser was rolled back (by an optional, repeated, alternative or lookahead parse)
+to where it started. It is enabled with "--parse-profile", and written to "_out/parse_profile.txt", as a table ranked by
+the re-scanned tokens, and to "_out/parse_heatmap.html", as a heatmap of the rules and of the parsed code (how many
+times each token was matched against, which shows where in the code the parser backtracks).
+
+The counts of a rule include the rules nested in it, so the tokens consumed by a rule are also consumed by the rules it
+is made of. When the profile isn't enabled, each rule costs a single check.
+"""
+
+from __future__ import annotations
+
+import functools
+import html
+import math
+from typing import Any, Callable
+
+
+class ParseProfile:
+    ENABLED = False
+
+    # The counts of each rule, by the rule's name, and the number of times each token was matched against, per file.
+    RULES: dict[str, dict[str, int]] = {}
+    FILES: dict[str, tuple[list, list[int]]] = {}
+    SCANS: list[int] = []
+
+    @staticmethod
+    def start() -> None:
+        ParseProfile.ENABLED = True
+        ParseProfile.RULES = {}
+        ParseProfile.FILES = {}
+
+    @staticmethod
+    def stop() -> None:
+        ParseProfile.ENABLED = False
+
+    @staticmethod
+    def add_file(path: str, tokens: list) -> None:
+        ParseProfile.SCANS = [0] * len(tokens)
+        ParseProfile.FILES[path] = (tokens, ParseProfile.SCANS)
+
+    @staticmethod
+    def is_token(rule: Callable) -> bool:
+        return isinstance(rule, functools.partial) and rule.func.__name__ == "_match_token"
+
+    @staticmethod
+    def rule_name(rule: Callable) -> str:
+        # Rules are the "inner" functions of the "_parse_*" methods, ie "Parser._parse_program.<locals>.inner" (or a
+        # partial of one, with the rule's arguments), apart from tokens, which are a partial of "_match_token" with the
+        # token type.
+        if ParseProfile.is_token(rule):
+            return f"_parse_token({rule.args[0].name})"
+        if isinstance(rule, functools.partial):
+            rule = rule.func
+        return rule.__qualname__.split(".")[-3]
+
+    @staticmethod
+    def counts(rule: Callable) -> dict[str, int]:
+        name = ParseProfile.rule_name(rule)
+        if name not in ParseProfile.RULES:
+            ParseProfile.RULES[name] = {"invocations": 0, "successes": 0, "failures": 0, "consumed": 0, "rescanned": 0}
+        return ParseProfile.RULES[name]
+
+    @staticmethod
+    def parse(rule: Callable, parser: Any) -> Any:
+        # Parse the rule, counting its result. A token is matched against the token the parser is on, which the parser
+        # has moved past if it matched.
+        counts = ParseProfile.counts(rule)
+        counts["invocations"] += 1
+        start = parser.current
+        try:
+            result = rule()
+        except Exception:
+            counts["failures"] += 1
+            if ParseProfile.is_token(rule) and parser.current < len(ParseProfile.SCANS):
+                ParseProfile.SCANS[parser.current] += 1
+            raise
+
+        counts["successes"] += 1
+        counts["consumed"] += parser.current - start
+        if ParseProfile.is_token(rule):
+            ParseProfile.SCANS[parser.current - 1] += 1
+        return result
+
+    @staticmethod
+    def rollback(rule: Callable, tokens: int) -> None:
+        ParseProfile.counts(rule)["rescanned"] += tokens
+
+    @staticmethod
+    def ranked() -> list[tuple[str, dict[str, int]]]:
+        return sorted(ParseProfile.RULES.items(), key=lambda item: (-item[1]["rescanned"], -item[1]["invocations"]))
+
+    @staticmethod
+    def report() -> str:
+        total = sum(counts["rescanned"] for counts in ParseProfile.RULES.values()) or 1
+        report = f"{'rule':<50}{'invocations':>12}{'successes':>12}{'failures':>12}{'consumed':>12}{'rescanned':>12}  share\n"
+        for name, counts in ParseProfile.ranked():
+            share = counts["rescanned"] / total
+            report += f"{name:<50}{counts['invocations']:>12}{counts['successes']:>12}{counts['failures']:>12}{counts['consumed']:>12}{counts['rescanned']:>12}  {'#' * round(share * 40):<40} {share:.1%}\n"
+        return report
+
+    @staticmethod
+    def heat(value: int, maximum: int) -> str:
+        # A background colour from white (0) to red (the maximum), on a log scale.
+        level = math.log1p(value) / math.log1p(maximum) if maximum else 0
+        shade = round(255 * (1 - level))
+        return f"background: rgb(255, {shade}, {shade})"
+
+    @staticmethod
+    def heatmap() -> str:
+        rules = ParseProfile.ranked()
+        maximum = max((counts["rescanned"] for _, counts in rules), default=0)
+        page = ["<html><head><meta charset='utf-8'><title>Parse profile</title></head><body style='font-family: monospace'>"]
+        page.append("<h2>Rules, by tokens re-scanned</h2><table><tr><th>rule</th><th>invocations</th><th>failures</th><th>consumed</th><th>rescanned</th></tr>")
+        for name, counts in rules:
+            page.append(
+                f"<tr style='{ParseProfile.heat(counts['rescanned'], maximum)}'><td>{html.escape(name)}</td><td>{counts['invocations']}</td>"
+                f"<td>{counts['failures']}</td><td>{counts['consumed']}</td><td>{counts['rescanned']}</td></tr>")
+        page.append("</table>")
+
+        # The code of each file, with each token shaded by the number of times it was matched against.
+        for path, (tokens, scans) in ParseProfile.FILES.items():
+            maximum = max(scans, default=0)
+            page.append(f"<h2>{html.escape(path)}, by times matched (up to {maximum})</h2><pre>")
+            for token, count in zip(tokens, scans):
+                page.append(f"<span title='{count}' style='{ParseProfile.heat(count, maximum)}'>{html.escape(token.token_metadata)}</span>")
+            page.append("</pre>")
+        page.append("</body></html>")
+        return "".join(page)
+
+    @staticmethod
+    def save(report_path: str, heatmap_path: str) -> None:
+        open(report_path, "w").write(ParseProfile.report())
+        open(heatmap_path, "w").write(ParseProfile.heatmap())
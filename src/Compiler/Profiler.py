@@ -0,0 +1,144 @@
+"""
+The profiler measures the compiler's hot functions, which register themselves as hooks when their module is imported,
+with the "@Profiler.hook" decorator. The hooks are only wrapped once profiling is started, with one of the backends:
+"counter" counts the calls to each hook and times them, "cprofile" profiles every function called while a hook is
+running, and "line" times each line of the hooks (with the optional "line_profiler" package). It is enabled with
+"--profile <backend>", or the "SPP_PROFILE" environment variable, and the report is written to "_out/profile.txt".
+
+When profiling isn't enabled, the decorator returns the function unchanged, so the hooks cost nothing. Stopping the
+profiler restores the original functions. Only the main process is profiled, so function bodies analysed, and modules
+compiled, by worker processes ("-j") aren't included.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import inspect
+import io
+import pstats
+import sys
+import time
+from typing import Any, Callable, Optional
+
+
+class Profiler:
+    BACKENDS = ["counter", "cprofile", "line"]
+    BACKEND: Optional[str] = None
+
+    # The registered hooks, in the order they were imported in, and the attributes that were replaced by the wrapped
+    # hooks while profiling, for them to be restored when it stops.
+    HOOKS: list[Callable] = []
+    REPLACED: list[tuple[Any, str, Any]] = []
+
+    # The state of each backend: the calls and time of each hook (the time of recursive calls is only counted once, for
+    # the outermost call), the cProfile profiler with the depth of the hooks running, and the line profiler.
+    COUNTS: dict[str, dict] = {}
+    PROFILE: Optional[cProfile.Profile] = None
+    DEPTH = 0
+    LINE_PROFILER: Any = None
+
+    @staticmethod
+    def hook(function: Callable) -> Callable:
+        Profiler.HOOKS.append(function)
+        return function
+
+    @staticmethod
+    def start(backend: str) -> None:
+        if backend not in Profiler.BACKENDS:
+            raise SystemExit(f"Unknown profiler '{backend}', expected one of: {', '.join(Profiler.BACKENDS)}.")
+        if backend == "line":
+            try:
+                from line_profiler import LineProfiler
+            except ImportError:
+                raise SystemExit("The 'line' profiler requires the 'line_profiler' package.")
+            Profiler.LINE_PROFILER = LineProfiler(*Profiler.HOOKS)
+
+        Profiler.BACKEND = backend
+        Profiler.COUNTS = {}
+        Profiler.PROFILE = cProfile.Profile() if backend == "cprofile" else None
+        Profiler.DEPTH = 0
+
+        # Replace each hook on its class (or module) with the wrapped hook. Static methods are wrapped as static methods
+        # so they keep being called without an instance.
+        for function in Profiler.HOOKS:
+            owner, name = Profiler.owner(function)
+            original = inspect.getattr_static(owner, name)
+            wrapped = Profiler.wrap(function)
+            Profiler.REPLACED.append((owner, name, original))
+            setattr(owner, name, staticmethod(wrapped) if isinstance(original, staticmethod) else wrapped)
+
+    @staticmethod
+    def stop() -> None:
+        for owner, name, original in reversed(Profiler.REPLACED):
+            setattr(owner, name, original)
+        Profiler.REPLACED = []
+        Profiler.BACKEND = None
+
+    @staticmethod
+    def owner(function: Callable) -> tuple[Any, str]:
+        # The class (or module) that a hook is an attribute of, ie "TypeInfer" for "TypeInfer.infer_expression".
+        owner = sys.modules[function.__module__]
+        *path, name = function.__qualname__.split(".")
+        for attribute in path:
+            owner = getattr(owner, attribute)
+        return owner, name
+
+    @staticmethod
+    def wrap(function: Callable) -> Callable:
+        match Profiler.BACKEND:
+            case "counter":
+                counts = Profiler.COUNTS.setdefault(function.__qualname__, {"calls": 0, "time": 0.0, "depth": 0})
+
+                @functools.wraps(function)
+                def wrapper(*args, **kwargs):
+                    counts["calls"] += 1
+                    counts["depth"] += 1
+                    start = time.perf_counter()
+                    try:
+                        return function(*args, **kwargs)
+                    finally:
+                        counts["depth"] -= 1
+                        if not counts["depth"]:
+                            counts["time"] += time.perf_counter() - start
+
+            case "cprofile":
+                @functools.wraps(function)
+                def wrapper(*args, **kwargs):
+                    Profiler.DEPTH += 1
+                    if Profiler.DEPTH == 1:
+                        Profiler.PROFILE.enable()
+                    try:
+                        return function(*args, **kwargs)
+                    finally:
+                        Profiler.DEPTH -= 1
+                        if not Profiler.DEPTH:
+                            Profiler.PROFILE.disable()
+
+            case _:
+                wrapper = Profiler.LINE_PROFILER(function)
+        return wrapper
+
+    @staticmethod
+    def report() -> str:
+        match Profiler.BACKEND:
+            case "counter":
+                report = f"{'hook':<50}{'calls':>12}{'time':>12}{'per call':>12}\n"
+                for name, counts in sorted(Profiler.COUNTS.items(), key=lambda item: -item[1]["time"]):
+                    per_call = counts["time"] / counts["calls"] * 1e6 if counts["calls"] else 0.0
+                    report += f"{name:<50}{counts['calls']:>12}{counts['time']:>11.4f}s{per_call:>10.2f}us\n"
+                return report
+
+            case "cprofile":
+                stream = io.StringIO()
+                pstats.Stats(Profiler.PROFILE, stream=stream).sort_stats("tottime").print_stats(50)
+                return stream.getvalue()
+
+            case _:
+                stream = io.StringIO()
+                Profiler.LINE_PROFILER.print_stats(stream=stream)
+                return stream.getvalue()
+
+    @staticmethod
+    def save(path: str) -> None:
+        open(path, "w").write(Profiler.report())
@@ -0,0 +1,129 @@
+"""
+The time report records, for each phase of the compiler and each module it runs on, the wall time, the CPU time, the peak
+memory allocated during the phase (traced by tracemalloc), and the change in the number of live objects tracked by the
+garbage collector. It is enabled with "--time-report", and written as JSON to "_out/time_report.json", with the phases
+in the order they ran in, and the totals per phase and per module.
+
+The phases are: "lex", "parse", "ast_reduction", "symbol_generation", "ns_substitution", "semantic_analysis", and
+"codegen". Phases that run across every module at once, ie function bodies analysed in parallel, or modules compiled in a
+process pool, are recorded without a module. The CPU time is of the main process only.
+
+Tracing the memory slows the compiler down several times over, so it can be turned off (with TRACE_MEMORY) for the
+timings to be representative, in which case the peak memory and the objects are reported as 0. When the report isn't
+enabled, each phase costs a single check, and nothing is traced. Each phase is also a span in the trace (see Trace),
+whether the report is enabled or not.
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from src.Compiler.Trace import Trace
+
+
+class TimeReport:
+    ENABLED = False
+    TRACE_MEMORY = True
+
+    # The recorded phases, in the order they finished in, and the phases that are currently running (phases can be
+    # nested, in which case the time and memory of the inner phase is included in the outer one too).
+    PHASES: list[dict] = []
+    RUNNING: list[dict] = []
+
+    @staticmethod
+    def start() -> None:
+        TimeReport.ENABLED = True
+        TimeReport.PHASES = []
+        TimeReport.RUNNING = []
+        if TimeReport.TRACE_MEMORY:
+            tracemalloc.start()
+
+    @staticmethod
+    def stop() -> None:
+        TimeReport.ENABLED = False
+        if TimeReport.TRACE_MEMORY:
+            tracemalloc.stop()
+
+    @staticmethod
+    @contextmanager
+    def phase(name: str, module: Optional[str] = None) -> Iterator[None]:
+        with Trace.span(name, "phase", module=module):
+            if not TimeReport.ENABLED:
+                yield
+                return
+            with (TimeReport.record if TimeReport.TRACE_MEMORY else TimeReport.timed)(name, module):
+                yield
+
+    @staticmethod
+    @contextmanager
+    def record(name: str, module: Optional[str]) -> Iterator[None]:
+        # The peak memory is reset for each phase, so the (absolute) peak of the phase that is running is saved first,
+        # and is combined with the peak of the inner phase once it finishes. The objects are counted outside of the
+        # traced window, as counting them allocates a list of every object.
+        objects = len(gc.get_objects())
+        if TimeReport.RUNNING:
+            TimeReport.RUNNING[-1]["peak"] = max(TimeReport.RUNNING[-1]["peak"], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+        record = {"phase": name, "module": module, "peak": 0}
+        start_memory = tracemalloc.get_traced_memory()[0]
+        TimeReport.RUNNING.append(record)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record["wall"] = time.perf_counter() - wall
+            record["cpu"] = time.process_time() - cpu
+            peak = max(record.pop("peak"), tracemalloc.get_traced_memory()[1])
+            record["peak_memory"] = peak - start_memory
+            TimeReport.RUNNING.pop()
+            if TimeReport.RUNNING:
+                TimeReport.RUNNING[-1]["peak"] = max(TimeReport.RUNNING[-1]["peak"], peak)
+            record["objects"] = len(gc.get_objects()) - objects
+            tracemalloc.reset_peak()
+            TimeReport.PHASES.append(record)
+
+    @staticmethod
+    @contextmanager
+    def timed(name: str, module: Optional[str]) -> Iterator[None]:
+        record = {"phase": name, "module": module, "peak_memory": 0, "objects": 0}
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record["wall"] = time.perf_counter() - wall
+            record["cpu"] = time.process_time() - cpu
+            TimeReport.PHASES.append(record)
+
+    @staticmethod
+    def name_module(path: str, module: str) -> None:
+        # Files are lexed and parsed before their module's name is known, so their phases are recorded under the file's
+        # path, and renamed once the module has been parsed.
+        for record in TimeReport.PHASES:
+            if record["module"] == path:
+                record["module"] = module
+
+    @staticmethod
+    def report() -> dict:
+        # Sum the phases per phase, and per module and phase. The peak memory of a total is the highest peak of the
+        # phases in it.
+        def add(totals: dict, record: dict) -> None:
+            total = totals.setdefault(record["phase"], {"wall": 0.0, "cpu": 0.0, "peak_memory": 0, "objects": 0, "count": 0})
+            total["wall"] += record["wall"]
+            total["cpu"] += record["cpu"]
+            total["peak_memory"] = max(total["peak_memory"], record["peak_memory"])
+            total["objects"] += record["objects"]
+            total["count"] += 1
+
+        totals, modules = {}, {}
+        for record in TimeReport.PHASES:
+            add(totals, record)
+            add(modules.setdefault(str(record["module"]), {}), record)
+        return {"phases": TimeReport.PHASES, "totals": totals, "modules": modules}
+
+    @staticmethod
+    def save(path: str) -> None:
+        json.dump(TimeReport.report(), open(path, "w"), indent=4)
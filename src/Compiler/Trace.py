@@ -0,0 +1,85 @@
+"""
+The trace records a span for each phase of the compiler, and for each module and function that is parsed, generated and
+analysed, and writes them as Chrome trace events (the JSON format read by Perfetto and chrome://tracing). It is enabled
+with "--trace", and written to "_out/trace.json".
+
+Each span is a complete ("X") event, timed with the monotonic performance counter, which is system-wide, so the spans
+recorded by worker processes line up with those of the main process. Workers return their spans with their results,
+and each process is named in the trace, so the spans of each worker are shown on their own track.
+
+When the trace isn't enabled, each span returns the same empty context manager, without timing anything or building an
+event, so it only costs the call, the check and entering the empty context (well under a microsecond). The name and the
+arguments can also be given as functions, which are only called when the trace is enabled, for the spans whose names or
+arguments take work to build (ie the path of a function's scope).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager
+
+
+class TraceSpan:
+    # A span being recorded, which is added to the events when it ends.
+    def __init__(self, name: str, category: str, args: dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info) -> None:
+        Trace.EVENTS.append({
+            "name": self.name, "cat": self.category, "ph": "X", "ts": self.start / 1000, "dur": (time.perf_counter_ns() - self.start) / 1000,
+            "pid": os.getpid(), "tid": threading.get_ident(), "args": {key: str(value) for key, value in self.args.items() if value is not None}})
+
+
+class Trace:
+    ENABLED = False
+
+    # The events recorded by this process, since the trace was started (or since they were last taken by a worker), and
+    # the context manager returned by every span while the trace isn't enabled.
+    EVENTS: list[dict] = []
+    DISABLED = nullcontext()
+
+    @staticmethod
+    def start() -> None:
+        Trace.ENABLED = True
+        Trace.EVENTS = []
+        Trace.name_process("compiler")
+
+    @staticmethod
+    def stop() -> None:
+        Trace.ENABLED = False
+
+    @staticmethod
+    def span(name: str | Callable[[], str], category: str, **args) -> ContextManager:
+        if not Trace.ENABLED:
+            return Trace.DISABLED
+        args = {key: value() if callable(value) else value for key, value in args.items()}
+        return TraceSpan(name() if callable(name) else name, category, args)
+
+    @staticmethod
+    def name_process(name: str) -> None:
+        # Name the process's track in the trace, ie "compiler" or "analysis worker".
+        if Trace.ENABLED:
+            Trace.EVENTS.append({"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": name}})
+
+    @staticmethod
+    def take() -> list[dict]:
+        # Take the events recorded so far, for a worker to return them to the main process with its result.
+        events = Trace.EVENTS
+        Trace.EVENTS = []
+        return events
+
+    @staticmethod
+    def merge(events: list[dict]) -> None:
+        Trace.EVENTS.extend(events)
+
+    @staticmethod
+    def save(path: str) -> None:
+        json.dump({"traceEvents": Trace.EVENTS, "displayTimeUnit": "ms"}, open(path, "w"))
@@ -1,18 +1,95 @@
 import os
+import time
+
+from src.LexicalAnalysis.Tokens import Token, TokenType
+from src.SyntacticAnalysis import Ast
 
 
 class ModuleTree:
+    ROOT = ".\\TestCode\\"
+
+    # Only the modules that the main module references (transitively) are loaded, unless LAZY is turned off, in which
+    # case every module in the tree is. The std modules are always loaded.
+    LAZY = True
+    ALWAYS = ["std"]
+
+    # The index of the modules in the tree, from their name to their file, and the modules that were loaded (with the
+    # size of their file and the time taken to lex and parse them) and skipped (with the size of their file, and the
+    # time taken to read it, for the referenced files that turned out not to be modules, as they don't start with
+    # "mod ").
+    INDEX: dict[str, str] = {}
+    INDEX_TIME = 0.0
+    LOADED: dict[str, tuple[int, float]] = {}
+    SKIPPED: dict[str, tuple[int, float]] = {}
+
     @staticmethod
-    def grab() -> list[str]:
+    def index() -> dict[str, str]:
+        # The name of each module is the path of its file under the root, ie "std.std" for "std\std.spp", so the index
+        # is built from the paths alone, without opening any file. The main module isn't in the index.
         # todo : enforce that the path following "mod " matches the directory structure
-
-        root = ".\\TestCode\\"
-        tree = []
-        for path, dirs, files in os.walk(root):
+        start = time.perf_counter()
+        ModuleTree.INDEX = {}
+        ModuleTree.LOADED = {}
+        ModuleTree.SKIPPED = {}
+        for path, dirs, files in os.walk(ModuleTree.ROOT):
             for file in files:
-                if os.path.join(path, file).removeprefix(root) == "main.spp":
-                    continue
+                file_path = os.path.join(path, file)
+                relative = file_path.removeprefix(ModuleTree.ROOT).replace(os.sep, "\\").strip("\\")
+                if file.endswith(".spp") and relative != "main.spp":
+                    ModuleTree.INDEX[relative.removesuffix(".spp").replace("\\", ".")] = file_path
+        ModuleTree.INDEX_TIME = time.perf_counter() - start
+        return ModuleTree.INDEX
+
+    @staticmethod
+    def references(tokens: list[Token]) -> set[str]:
+        # The namespaces that some code might refer to: every chain of lowercase identifiers that are each followed by a
+        # ".", ie "std" in "std.Num", or "a.b" in "a.b.C". This includes variables whose attributes are accessed, so it
+        # over-approximates, which only means that a module might be loaded without being needed.
+        references, chain = set(), []
+        for token, next_token in zip(tokens, tokens[1:]):
+            if token.token_type == TokenType.LxIdentifier and token.token_metadata.islower() and next_token.token_type == TokenType.TkDot:
+                chain.append(token.token_metadata)
+            elif token.token_type != TokenType.TkDot and chain:
+                references.add(".".join(chain))
+                chain = []
+        if chain:
+            references.add(".".join(chain))
+        return references
+
+    @staticmethod
+    def imports(ast: Ast.ProgramAst) -> set[str]:
+        # The paths of the modules imported by a module's "use" statements, if it has any, ie "a.b.c".
+        import_block = ast.module.body.import_block
+        return {".".join(str(part) for part in statement.module.parts) for statement in import_block.imports} if import_block else set()
+
+    @staticmethod
+    def is_referenced(name: str, references: set[str]) -> bool:
+        # A module's members are in the scope of its namespace (the module's name without the last part), so a module
+        # might be referred to by a chain that is its namespace, or that starts with it, ie "a.b" or "a.b.c" for the
+        # module "a.b.m" (but not "a", which is the namespace of other modules).
+        namespace = name.rpartition(".")[0]
+        if not ModuleTree.LAZY or namespace.split(".")[0] in ModuleTree.ALWAYS:
+            return True
+        return bool(namespace) and any(reference == namespace or reference.startswith(namespace + ".") for reference in references)
+
+    @staticmethod
+    def skip(name: str, read_time: float = 0.0) -> None:
+        ModuleTree.SKIPPED[name] = (os.path.getsize(ModuleTree.INDEX[name]), read_time)
+
+    @staticmethod
+    def report() -> str:
+        loaded_size = sum(size for size, _ in ModuleTree.LOADED.values())
+        loaded_time = sum(seconds for _, seconds in ModuleTree.LOADED.values())
+        skipped_size = sum(size for size, _ in ModuleTree.SKIPPED.values())
 
-                if file.endswith(".spp") and open(os.path.join(path, file)).read().strip().startswith("mod "):
-                    tree.append(os.path.join(path, file))
-        return tree
+        # The time saved is estimated from the time taken per byte by the modules that were loaded, and only counts
+        # lexing and parsing, not the analysis and code generation of the skipped modules, which are saved too.
+        saved = skipped_size * loaded_time / loaded_size if loaded_size else 0.0
+        report = f"Indexed {len(ModuleTree.INDEX)} modules in {ModuleTree.INDEX_TIME:.4f}s\n"
+        report += f"Loaded {len(ModuleTree.LOADED)} modules ({loaded_size:,} bytes), lexed and parsed in {loaded_time:.4f}s:\n"
+        for name, (size, seconds) in ModuleTree.LOADED.items():
+            report += f"  {name:<40}{size:>12,} bytes{seconds:>10.4f}s\n"
+        report += f"Skipped {len(ModuleTree.SKIPPED)} unreferenced (or not \"mod\") modules ({skipped_size:,} bytes), saving an estimated {saved:.4f}s of lexing and parsing (at the loaded modules' time per byte):\n"
+        for name, (size, read_time) in ModuleTree.SKIPPED.items():
+            report += f"  {name:<40}{size:>12,} bytes" + (f"{read_time:>10.4f}s read, not a module\n" if read_time else "\n")
+        return report
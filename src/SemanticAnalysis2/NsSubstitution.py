@@ -29,14 +29,14 @@ class NsSubstitution:
 
     @staticmethod
     def substitute_for_class_prototype(ast: Ast.ClassPrototypeAst, s: ScopeHandler):
-        s.next_scope()
+        s.next_scope(ast)
         for member in ast.body.members:
             NsSubstitution.do_substitution(member.type_annotation, s)
         s.prev_scope()
 
     @staticmethod
     def substitute_for_sup_prototype(ast: Ast.SupPrototypeAst, s: ScopeHandler):
-        s.next_scope()
+        s.next_scope(ast)
 
         for member in ast.body.members:
             NsSubstitution.substitute_sup_member(member, s)
@@ -61,7 +61,7 @@ class NsSubstitution:
 
     @staticmethod
     def substitute_for_function_prototype(ast: Ast.FunctionPrototypeAst, s: ScopeHandler):
-        s.next_scope()
+        s.next_scope(ast)
         for param in ast.parameters:
             NsSubstitution.do_substitution(param.type_annotation, s)
         NsSubstitution.do_substitution(ast.return_type, s)
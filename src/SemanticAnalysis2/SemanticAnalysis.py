@@ -1,13 +1,16 @@
-import copy
+import dataclasses
 import inspect
+from concurrent.futures import ProcessPoolExecutor
 from typing import Iterable, Optional, TypeVar
 
+from src.Compiler.TimeReport import TimeReport
+from src.Compiler.Trace import Trace
 from src.LexicalAnalysis.Tokens import TokenType, Token
 from src.SemanticAnalysis2.NsSubstitution import NsSubstitution
 from src.SyntacticAnalysis import Ast
 from src.SyntacticAnalysis.Parser import ErrFmt
 
-from src.SemanticAnalysis2.SymbolTable import ScopeHandler, SymbolTypes
+from src.SemanticAnalysis2.SymbolTable import Scope, ScopeHandler, SymbolTypes
 from src.SemanticAnalysis2.CommonTypes import CommonTypes
 from src.SemanticAnalysis2.TypeInference import TypeInfer
 
@@ -22,6 +25,14 @@ def any_elem(iterable: Iterable[T]) -> Optional[T]:
 
 class SemanticAnalysis:
     ASSIGNMENTS = {}
+    CHECKED_OVERLOADS = set()
+    JOBS = 1
+    DEFERRED_FUNCTIONS = []
+    SNAPSHOT = None
+
+    # The attributes that the analysis adds to the nodes of a function body for code generation: the overload selected
+    # by a call (or binary expression), and the types its generic parameters were bound to.
+    ANNOTATIONS = ["_overload", "generic_map"]
 
     @staticmethod
     def analyse(ast: Ast.ProgramAst, s: ScopeHandler):
@@ -37,7 +48,7 @@ class SemanticAnalysis:
         # Analyse each module member
         match ast:
             case Ast.ClassPrototypeAst(): SemanticAnalysis.analyse_class_prototype(ast, s)
-            case Ast.EnumPrototypeAst(): s.skip_scope()
+            case Ast.EnumPrototypeAst(): s.skip_scope(ast)
             case Ast.SupPrototypeNormalAst(): SemanticAnalysis.analyse_sup_prototype(ast, s)
             case Ast.SupPrototypeInheritanceAst(): SemanticAnalysis.analyse_sup_prototype(ast, s)
             case Ast.LetStatementAst(): pass  # SemanticAnalysis.analyse_let_statement(ast, s)
@@ -126,7 +137,7 @@ class SemanticAnalysis:
     def analyse_function_prototype(ast: Ast.FunctionPrototypeAst, s: ScopeHandler, **kwargs):
         # Enter the next scope, which will be the function scope. This is to load in the parameters and subsequently
         # declared variables into the sy,bol table in the correct scope.
-        s.next_scope()
+        s.next_scope(ast)
 
         # Analyse all the decorators, parameters, generic type parameters, and the return type. This is to ensure
         # correct parameter order and that all the return types are valid.
@@ -135,9 +146,22 @@ class SemanticAnalysis:
         SemanticAnalysis.analyse_type_generic_parameters(ast.generic_parameters, s)
         TypeInfer.check_type(ast.return_type, s)
 
+        # When analysing in parallel, the function body is analysed later, by a worker process. The body only reads the
+        # module-level scopes, and only writes to its own function scope, so it can be analysed once every module-level
+        # scope is complete (ie all the super-impositions have been registered as sup-scopes).
+        if SemanticAnalysis.JOBS > 1:
+            SemanticAnalysis.DEFERRED_FUNCTIONS.append((s.current_scope, ast, ErrFmt.TOKENS, ErrFmt.FILE_PATH))
+        else:
+            SemanticAnalysis.analyse_function_body(ast, s)
+
+        s.prev_scope()
+
+    @staticmethod
+    def analyse_function_body(ast: Ast.FunctionPrototypeAst, s: ScopeHandler):
         # Analyse each statement in the body of the function.
-        for statement in ast.body.statements:
-            SemanticAnalysis.analyse_statement(statement, s)
+        with Trace.span(lambda: SemanticAnalysis.function_name(s.current_scope), "semantic_analysis", module=ErrFmt.FILE_PATH):
+            for statement in ast.body.statements:
+                SemanticAnalysis.analyse_statement(statement, s)
 
         # Make sure the return type of the last statement matches the return type of the function, unless the method is
         # abstract, in which case it is allowed to not have a return statement. An empty function body has special
@@ -168,7 +192,148 @@ class SemanticAnalysis:
                 ErrFmt.err(ast.return_type._tok) + f"Function return type is '{ast.return_type}'.\n..." +
                 ErrFmt.err(err_ast._tok) + f"Final statement returns type '{t}'.")
 
-        s.prev_scope()
+    @staticmethod
+    def analyse_deferred_functions(s: ScopeHandler):
+        # Analyse the function bodies deferred by analyse_function_prototype() in a process pool. Each worker receives a
+        # snapshot of the scope tree once (when it starts), and then analyses function bodies by their index into the
+        # deferred functions list. The results are merged in the order the functions were deferred in, so the first
+        # error reported, and the final symbol tables and annotations, are the same regardless of how the work was
+        # scheduled.
+        deferred = SemanticAnalysis.DEFERRED_FUNCTIONS
+        SemanticAnalysis.DEFERRED_FUNCTIONS = []
+        if not deferred:
+            return
+
+        # The scopes of the tree, in the order that the workers list them in, as the overloads that the workers select
+        # are returned as their position in this list (see symbol_reference()).
+        tree_scopes = SemanticAnalysis.function_scopes(s.global_scope)
+
+        jobs = min(SemanticAnalysis.JOBS, len(deferred))
+        chunk_size = max(1, len(deferred) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=SemanticAnalysis.init_function_worker, initargs=((s, deferred),)) as pool:
+            results = list(pool.map(SemanticAnalysis.analyse_deferred_function, range(len(deferred)), chunksize=chunk_size))
+
+        for (scope, ast, tokens, file_path), (error, local_scopes, annotations, events) in zip(deferred, results):
+            Trace.merge(events)
+            if error is not None:
+                ErrFmt.TOKENS = tokens
+                ErrFmt.FILE_PATH = file_path
+                raise error
+
+            # The function scope and its nested scopes are listed in the same order in the worker, so the scopes that
+            # existed before the analysis line up with the scopes here. The scopes created by the analysis, ie for "if"
+            # and "while" blocks, are re-created under the same parent, so they keep the same order among the children.
+            existing_scopes = iter(SemanticAnalysis.function_scopes(scope))
+            merged_scopes = []
+            for parent_index, name, hidden, is_existing, symbol_table in local_scopes:
+                local_scope = next(existing_scopes) if is_existing else Scope(name, merged_scopes[parent_index], hidden=hidden)
+                local_scope.symbol_table = symbol_table
+                merged_scopes.append(local_scope)
+
+            # The annotations are added to the nodes of this process's copy of the function body, at the same positions
+            # as the nodes that the worker annotated, with the selected overloads resolved to the symbols in this tree.
+            nodes = SemanticAnalysis.function_nodes(ast)
+            for position, attributes in annotations:
+                for name, value in attributes.items():
+                    if name == "_overload":
+                        kind, index, key = value
+                        value = (tree_scopes if kind == "tree" else merged_scopes)[index].symbol_table.symbols[key]
+                    setattr(nodes[position], name, value)
+
+    @staticmethod
+    def init_function_worker(snapshot: tuple[ScopeHandler, list]):
+        # Function bodies analysed in a worker are analysed immediately, including nested function prototypes. Workers
+        # don't record phases, as the time report is only kept by the main process.
+        SemanticAnalysis.JOBS = 1
+        TimeReport.stop()
+        Trace.take()
+        Trace.name_process("analysis worker")
+
+        # Index every symbol in the tree by its scope's position and its key in the scope's symbol table, as it was when
+        # the snapshot was taken, which is the same in the main process.
+        s, deferred = snapshot
+        symbols = {
+            id(symbol): ("tree", index, key) for index, scope in enumerate(SemanticAnalysis.function_scopes(s.global_scope))
+            for key, symbol in scope.symbol_table.symbols.items()}
+        SemanticAnalysis.SNAPSHOT = s, deferred, symbols
+
+    @staticmethod
+    def analyse_deferred_function(index: int) -> tuple[Optional[BaseException], Optional[list], Optional[list], list[dict]]:
+        s, deferred, symbols = SemanticAnalysis.SNAPSHOT
+        scope, ast, ErrFmt.TOKENS, ErrFmt.FILE_PATH = deferred[index]
+        s.current_scope = scope
+        existing_scopes = set(SemanticAnalysis.function_scopes(scope))
+
+        # The nodes are listed before the analysis, as the analysis can modify the body, and the positions must match
+        # the nodes of the main process's copy of the body, which hasn't been analysed.
+        nodes = SemanticAnalysis.function_nodes(ast)
+
+        # Errors are returned rather than raised, so the main process can report the first one in order. This includes
+        # internal errors, as a later function's internal error mustn't hide an earlier function's error.
+        try:
+            SemanticAnalysis.analyse_function_body(ast, s)
+        except (SystemExit, Exception) as e:
+            return e, None, None, Trace.take()
+
+        # Return each local scope's symbol table, with the position of its parent in the list, so the main process can
+        # re-create the scopes added by the analysis. The scopes themselves aren't returned, as their parent links would
+        # pull the whole scope tree into the result.
+        local_scopes = SemanticAnalysis.function_scopes(scope)
+        positions = {local_scope: i for i, local_scope in enumerate(local_scopes)}
+        merged_scopes = [(positions.get(local_scope.parent, -1), local_scope.name, local_scope.hidden, local_scope in existing_scopes, local_scope.symbol_table) for local_scope in local_scopes]
+
+        # Return the annotations of each node by its position in the body, so code generation in the main process sees
+        # the same annotations as it would after analysing the body itself, and doesn't resolve the calls again.
+        annotations = []
+        for position, node in enumerate(nodes):
+            attributes = {name: getattr(node, name) for name in SemanticAnalysis.ANNOTATIONS if getattr(node, name, None)}
+            if "_overload" in attributes:
+                attributes["_overload"] = SemanticAnalysis.symbol_reference(attributes["_overload"], local_scopes, symbols)
+            if attributes:
+                annotations.append((position, attributes))
+        return None, merged_scopes, annotations, Trace.take()
+
+    @staticmethod
+    def symbol_reference(symbol: SymbolTypes.VariableSymbol, local_scopes: list[Scope], symbols: dict[int, tuple]) -> tuple[str, int, int]:
+        # A symbol is referred to by the position of its scope, in the tree (as indexed when the worker started) or in
+        # the function's local scopes, and its key in the scope's symbol table.
+        if id(symbol) in symbols:
+            return symbols[id(symbol)]
+        for index, local_scope in enumerate(local_scopes):
+            for key, local_symbol in local_scope.symbol_table.symbols.items():
+                if local_symbol is symbol:
+                    return "local", index, key
+        raise SystemExit(f"Symbol '{symbol.name}' is not in the scope tree. Report as bug.")
+
+    @staticmethod
+    def function_nodes(ast: Ast.FunctionPrototypeAst) -> list:
+        # The nodes of a function's body, depth first, in the order of their fields.
+        nodes = []
+        def visit(obj) -> None:
+            if isinstance(obj, list):
+                for item in obj:
+                    visit(item)
+            elif dataclasses.is_dataclass(obj) and not isinstance(obj, Token):
+                nodes.append(obj)
+                for field in dataclasses.fields(obj):
+                    visit(getattr(obj, field.name))
+        visit(ast.body)
+        return nodes
+
+    @staticmethod
+    def function_name(scope: Scope) -> str:
+        # The name of the function whose scope this is, for the trace, ie "std.Num.add" for the scope of a
+        # "call_[ref|mut|one]" method in the "__MOCK_add" super-imposition on "Num" in the "std" module.
+        names = [str(name) for name in reversed(scope.ancestors_names()) if name != "Global"]
+        return ".".join(name.removeprefix("__MOCK_").removesuffix("#SUP") for name in names)
+
+    @staticmethod
+    def function_scopes(scope: Scope) -> list[Scope]:
+        # The scope (ie of a function) followed by all of its nested scopes, depth first.
+        scopes = [scope]
+        for child in scope.children:
+            scopes.extend(SemanticAnalysis.function_scopes(child))
+        return scopes
 
     @staticmethod
     def analyse_function_parameter(ast: Ast.FunctionParameterAst, s: ScopeHandler):
@@ -216,7 +381,7 @@ class SemanticAnalysis:
 
     @staticmethod
     def analyse_class_prototype(ast: Ast.ClassPrototypeAst, s: ScopeHandler):
-        s.next_scope()
+        s.next_scope(ast)
 
         SemanticAnalysis.analyse_type_generic_parameters(ast.generic_parameters, s)
         [SemanticAnalysis.analyse_decorator(ast, d, s) for d in ast.decorators]
@@ -231,7 +396,7 @@ class SemanticAnalysis:
 
     @staticmethod
     def analyse_sup_prototype(ast: Ast.SupPrototypeAst, s: ScopeHandler):
-        s.next_scope()
+        s.next_scope(ast)
         SemanticAnalysis.analyse_type_generic_parameters(ast.generic_parameters, s)
 
         for type_part in ast.identifier.parts:
@@ -243,52 +408,14 @@ class SemanticAnalysis:
                 [TypeInfer.check_type(g, s) for g in type_part.generic_arguments]
 
         # If it's for a function (__MOCK_...) then check there are no duplicate overloads. Get all the super-impositions
-        # of the __MOCK_... class.
+        # of the __MOCK_... class. Every overload is checked in one go, so only the first super-imposition of each
+        # __MOCK_... class that is analysed needs to do the check.
         if str(ast.identifier).startswith("__MOCK_"):
             scope = s.current_scope.parent.get_child_scope(ast.identifier)
-            overloads = [x for x in scope.all_symbols_exclusive(SymbolTypes.VariableSymbol) if x.name.identifier in ["call_ref", "call_mut", "call_one"]]
-            fn_protos = [f.meta_data["fn_proto"] for f in overloads]
-
-            # identify duplicates by parameters
-            fn_protos = [copy.deepcopy(f) for f in fn_protos]
-
-            # firstly, replace type parameters by a number for each type, so f[T](a: T) matches f[U](a: U) - this is the
-            # same signature
-            generic_mappers = []
-            for f in fn_protos:
-                generic_mapper = {}
-                generic_mappers.append(generic_mapper)
-                for i, g in enumerate(f.generic_parameters):
-                    if g not in generic_mapper:
-                        replacement_generic = Ast.TypeSingleAst([Ast.GenericIdentifierAst(f"__GENERIC_{i}", [], -1)], -1)
-                        generic_mapper[g.identifier] = replacement_generic
-
-            for i, f in enumerate(fn_protos):
-                for p in f.parameters:
-                    for g in f.generic_parameters:
-                        TypeInfer.substitute_generic_type(p.type_annotation, g.identifier, generic_mappers[i][g.identifier])
-
-            for i, f in enumerate(fn_protos[:-1]):
-                for g in fn_protos[i + 1:]:
-                    required_f_params = [p for p in f.parameters if p.is_required()]
-                    required_g_params = [p for p in g.parameters if p.is_required()]
-                    if all([(f_param.type_annotation == g_param.type_annotation) and (f_param.calling_convention == g_param.calling_convention) for f_param, g_param in zip(required_f_params, required_g_params)]) and len(required_f_params) == len(required_g_params):
-                        extra = ""
-                        if len(f.parameters) != len(g.parameters):
-                            extra = (
-                                " One overload\ncannot be a 'subset' of another overload, ie the same but\nwith optional or"
-                                "variadic parameters, as calling the function\nwithout any optional or variadic parameters "
-                                "would lead to\neither overload being available to call.\n")
-                        elif len(required_f_params) == len(required_g_params):
-                            extra = (
-                                " One overload\ncannot have the same required parameters but different optional or\n"
-                                "variadic parameters, as calling the function without any optional or\nvariadic parameters "
-                                "would lead to either overload being available\nto call.\n")
-                        raise SystemExit(
-                            "Duplicate function overloads are not allowed." + extra +
-                            ErrFmt.err(f._tok) + f"First overload\n..." +
-                            ErrFmt.err(g._tok) + f"Second overload.")
-
+            if (s.version, scope) not in SemanticAnalysis.CHECKED_OVERLOADS:
+                SemanticAnalysis.CHECKED_OVERLOADS.add((s.version, scope))
+                overloads = [x for x in scope.all_symbols_exclusive(SymbolTypes.VariableSymbol) if x.name.identifier in ["call_ref", "call_mut", "call_one"]]
+                SemanticAnalysis.analyse_function_overloads([f.meta_data["fn_proto"] for f in overloads])
 
         if isinstance(ast, Ast.SupPrototypeInheritanceAst): # and (super_class_type_parts := ast.super_class.parts_as_strings()) and super_class_type_parts[0] == "std" and super_class_type_parts[1] not in ["FnRef", "FnMut", "FnOne"]:
             cls_scope = s.current_scope.parent.get_child_scope(ast.identifier)
@@ -297,13 +424,73 @@ class SemanticAnalysis:
             # if not super_class_scope:
             #     raise SystemExit(ErrFmt.err(ast.super_class._tok) + f"Super class '{ast.super_class}' not found.")
 
-            cls_scope.sup_scopes.append(super_class_scope)
-            cls_scope.sup_scopes.extend(super_class_scope.sup_scopes)
+            cls_scope.add_sup_scopes([super_class_scope] + super_class_scope.sup_scopes)
 
         [SemanticAnalysis.analyse_sup_member(ast, m, s) for m in ast.body.members]
 
         s.prev_scope()
 
+    @staticmethod
+    def analyse_function_overloads(fn_protos: list[Ast.FunctionPrototypeAst]):
+        # Identify duplicates by their required parameters. Each overload's canonical signature is hashed into a map, so
+        # a duplicate is found as soon as a signature has been seen before, and the overload it was first seen on is
+        # kept for the error message.
+        signatures = {}
+        for g in fn_protos:
+            signature = SemanticAnalysis.overload_signature(g)
+            if signature not in signatures:
+                signatures[signature] = g
+                continue
+
+            f = signatures[signature]
+            if len(f.parameters) != len(g.parameters):
+                extra = (
+                    " One overload\ncannot be a 'subset' of another overload, ie the same but\nwith optional or"
+                    "variadic parameters, as calling the function\nwithout any optional or variadic parameters "
+                    "would lead to\neither overload being available to call.\n")
+            else:
+                extra = (
+                    " One overload\ncannot have the same required parameters but different optional or\n"
+                    "variadic parameters, as calling the function without any optional or\nvariadic parameters "
+                    "would lead to either overload being available\nto call.\n")
+            raise SystemExit(
+                "Duplicate function overloads are not allowed." + extra +
+                ErrFmt.err(f._tok) + f"First overload\n..." +
+                ErrFmt.err(g._tok) + f"Second overload.")
+
+    @staticmethod
+    def overload_signature(ast: Ast.FunctionPrototypeAst) -> tuple:
+        # The canonical signature is the type and calling convention of each required parameter. Generic parameters are
+        # replaced by their index, so f[T](a: T) matches f[U](a: U) - this is the same signature. Any other kind of type
+        # is compared by its text, so it can't match a different type.
+        generic_indexes = {g.identifier: i for i, g in enumerate(ast.generic_parameters)}
+
+        def canonical_type(ty: Ast.TypeAst | Ast.TypeGenericArgumentAst) -> tuple | str:
+            match ty:
+                case Ast.TypeSingleAst() if len(ty.parts) == 1 and isinstance(ty.parts[0], Ast.GenericIdentifierAst) and not ty.parts[0].generic_arguments and ty.to_identifier() in generic_indexes:
+                    return f"__GENERIC_{generic_indexes[ty.to_identifier()]}",
+                case Ast.TypeSingleAst():
+                    return tuple(canonical_part(part) for part in ty.parts)
+                case Ast.TypeGenericArgumentAst():
+                    return str(ty.identifier) if ty.identifier else None, canonical_type(ty.value)
+                case Ast.TypeTupleAst():
+                    return "()", tuple(canonical_type(t) for t in ty.types)
+                case _:
+                    return str(ty)
+
+        def canonical_part(part: Ast.GenericIdentifierAst | int) -> tuple | int:
+            # A part is either an identifier with its generic arguments, or the index into a tuple type.
+            if isinstance(part, int):
+                return part
+            return part.identifier, tuple(canonical_type(g) for g in part.generic_arguments)
+
+        def calling_convention(p: Ast.FunctionParameterAst) -> str:
+            if p.calling_convention is None:
+                return "mov"
+            return "&mut" if p.calling_convention.is_mutable else "&"
+
+        return tuple((canonical_type(p.type_annotation), calling_convention(p)) for p in ast.parameters if p.is_required())
+
     @staticmethod
     def analyse_sup_member(owner: Ast.SupPrototypeAst, ast: Ast.SupMemberAst, s: ScopeHandler):
         match ast:
@@ -496,20 +683,27 @@ class SemanticAnalysis:
 
     @staticmethod
     def analyse_binary_expression(ast: Ast.BinaryExpressionAst, s: ScopeHandler):
-        # Remodel the binary expression into a function call, then analyse the function call. Start with constructing a
-        # postfix call to the correct method name. For example, for "x + y", begin with constructing "x.add".
-        pos = ast.op._tok
-        fn = Ast.IdentifierAst(Ast.BIN_FN[ast.op.tok.token_type], pos)
-        fn = Ast.PostfixMemberAccessAst(fn, pos)
-        fn = Ast.PostfixExpressionAst(ast.lhs, fn, pos)
-
-        # Next, convert the right-hand side into a function argument, and construct the function call. The function call
-        # creates the "(y)" that is the postfix expression for "x.add", creating "x.add(y)". This is then analysed.
-        rhs = Ast.FunctionArgumentAst(None, ast.rhs, None, False, pos)
-        fn_call = Ast.PostfixFunctionCallAst([], [rhs], pos)
-        fn_call = Ast.PostfixExpressionAst(fn, fn_call, pos)
-        # print(fn_call)
-        SemanticAnalysis.analyse_expression(fn_call, s)
+        # A binary expression has the semantics of a call to the operator method on the left-hand side, so "x + y" is
+        # analysed as "x.add(y)". Resolve the operator method directly from the type of the left-hand side, rather than
+        # constructing the function call and running the general function call analysis on it.
+        resolved = TypeInfer.resolve_binary_operator(ast, s)
+
+        # If the operator method can't be resolved directly, ie it has generic or ambiguous overloads, or doesn't exist,
+        # then remodel the binary expression into the function call, and analyse that. This also produces the errors.
+        if not resolved:
+            fn_call = TypeInfer.binary_expression_as_function_call(ast)
+            SemanticAnalysis.analyse_expression(fn_call, s)
+            setattr(ast, "_overload", getattr(fn_call.op, "_overload", None))
+            return
+
+        # Record the operator method on the expression, as for function calls, so that code generation can call it.
+        setattr(ast, "_overload", resolved[0])
+
+        # Check the left-hand side is initialized, as the member access "x.add" would, and then analyse the operands as
+        # the arguments to the operator method. The left-hand side is added as the "self" argument.
+        SemanticAnalysis.analyse_receiver_initialized(ast.lhs, s)
+        rhs = Ast.FunctionArgumentAst(None, ast.rhs, None, False, ast.op._tok)
+        SemanticAnalysis.analyse_function_arguments(ast, resolved[0], [rhs], s)
 
     @staticmethod
     def analyse_postfix_member_access(ast: Ast.PostfixExpressionAst, s: ScopeHandler, **kwargs):
@@ -542,28 +736,44 @@ class SemanticAnalysis:
             raise SystemExit(ErrFmt.err(ast.op.identifier._tok) + f"{what} '{ast.op.identifier}' not found on type '{lhs_type}'.")
 
         # Check the parts are all initialized.
-        while isinstance(ast, Ast.PostfixExpressionAst) and isinstance(ast.lhs, Ast.PostfixExpressionAst):
+        SemanticAnalysis.analyse_receiver_initialized(ast.lhs, s)
+
+    @staticmethod
+    def analyse_receiver_initialized(ast: Ast.ExpressionAst, s: ScopeHandler):
+        # The outermost part of a receiver, ie "a" for "a.b.c", must be initialized for an attribute or method to be
+        # accessed on it. The result of a function call is a new value, so a receiver like "f(a).b" is always
+        # initialized (and "f" names the function, not a variable to check).
+        while isinstance(ast, Ast.PostfixExpressionAst):
+            if isinstance(ast.op, Ast.PostfixFunctionCallAst):
+                return
             ast = ast.lhs
 
-        if not isinstance(ast.lhs, Ast.IdentifierAst):
+        if not isinstance(ast, Ast.IdentifierAst):
             return
 
-        sym = s.current_scope.get_symbol(ast.lhs, SymbolTypes.VariableSymbol)
+        sym = s.current_scope.get_symbol(ast, SymbolTypes.VariableSymbol)
         if not sym.mem_info.is_initialized:
             raise SystemExit(
                 "Cannot use a value that is not initialized:\n" +
-                ErrFmt.err(sym.mem_info.consume_ast._tok) + f"Value '{ast.lhs}' moved here.\n..." +
-                ErrFmt.err(ast.lhs._tok) + f"Value '{ast.lhs}' not initialized.")
-        
+                ErrFmt.err(sym.mem_info.consume_ast._tok) + f"Value '{ast}' moved here.\n..." +
+                ErrFmt.err(ast._tok) + f"Value '{ast}' not initialized.")
+
     @staticmethod
-    def analyse_function_arguments(func: Ast.PostfixExpressionAst, fn_target: SymbolTypes.VariableSymbol, asts: list[Ast.FunctionArgumentAst], s: ScopeHandler, **kwargs):
+    def analyse_function_arguments(func: Ast.PostfixExpressionAst | Ast.BinaryExpressionAst, fn_target: SymbolTypes.VariableSymbol, asts: list[Ast.FunctionArgumentAst], s: ScopeHandler, **kwargs):
         # Number of memory checks need to occur here. This function handles all function calls, assignment and variable
-        # declaration (through the __set__) function.
+        # declaration (through the __set__) function, and binary expressions (through the operator methods).
         ref_borrows = set()
         mut_borrows = set()
 
+        # The callee is the expression being called, ie "x.f" for "x.f(y)". A binary expression has no callee, as it is
+        # analysed as a direct call to the operator method, with the left-hand side as the receiver.
+        callee = func.lhs if isinstance(func, Ast.PostfixExpressionAst) else None
+
         if fn_target and fn_target.meta_data.get("is_method", False) and fn_target.meta_data.get("fn_proto").parameters and fn_target.meta_data.get("fn_proto").parameters[0].is_self:
-            asts.insert(0, Ast.FunctionArgumentAst(None, func.lhs.lhs, fn_target.meta_data.get("fn_proto").parameters[0].calling_convention, False, func._tok))
+            # The receiver is prepended to a new list, as the given list is the call's own arguments, which are inferred
+            # again later (ie for the return type check), and then by code generation.
+            receiver = callee.lhs if callee else func.lhs
+            asts = [Ast.FunctionArgumentAst(None, receiver, fn_target.meta_data.get("fn_proto").parameters[0].calling_convention, False, func._tok)] + asts
 
         def collapse_ast_to_list_of_identifiers(ast: Ast.PostfixExpressionAst | Ast.IdentifierAst | Ast.TokenAst):
             match ast:
@@ -572,6 +782,9 @@ class SemanticAnalysis:
                 case Ast.PostfixExpressionAst() if isinstance(ast.op, Ast.PostfixMemberAccessAst): return collapse_ast_to_list_of_identifiers(ast.lhs) + [ast.op.identifier]
                 case _: return []
 
+        callee_identifiers = collapse_ast_to_list_of_identifiers(callee)
+        callee_name = callee_identifiers[-1].identifier if callee_identifiers else ""
+
         for i, arg in enumerate(asts):
             if type(arg.value) in Ast.TypeAst.__args__:
                 raise SystemExit(
@@ -580,12 +793,12 @@ class SemanticAnalysis:
 
             SemanticAnalysis.analyse_expression(arg.value, s)
 
-            check_for_move = isinstance(func.lhs, Ast.IdentifierAst) and (not func.lhs.is_special() or (func.lhs.is_special() and i > 0))
+            check_for_move = isinstance(callee, Ast.IdentifierAst) and (not callee.is_special() or (callee.is_special() and i > 0))
             sym = s.current_scope.get_symbol(arg.value, SymbolTypes.VariableSymbol, error=False)
 
             # Record the initialization of single identifier let statements, so if their mutability checks fail later,
             # this AST can be pointed back to to show a immutable variable declaration.
-            if isinstance(func.lhs, Ast.IdentifierAst) and func.lhs.is_special() and isinstance(arg.value, Ast.IdentifierAst) and not sym.mem_info.is_initialized:
+            if isinstance(callee, Ast.IdentifierAst) and callee.is_special() and isinstance(arg.value, Ast.IdentifierAst) and not sym.mem_info.is_initialized:
                 sym.mem_info.initialization_ast = arg.value
 
             # Check if the argument being borrowed is valid to borrow from, ie it hasn't yet been moved elsewhere. The
@@ -613,18 +826,18 @@ class SemanticAnalysis:
                 # borrows of non-overlapping parts of an object to occur at the same time, however, such as
                 # &mut x.a, &mut x.b, as there is no overlap and is therefore safe.
                 case Ast.ParameterPassingConventionReferenceAst():
-                    if arg.calling_convention.is_mutable and collapse_ast_to_list_of_identifiers(func.lhs)[-1].identifier != "__set__":  # and ((isinstance(func.lhs, Ast.IdentifierAst) and not func.lhs.identifier == "__set__") or not isinstance(func.lhs, Ast.IdentifierAst)):
+                    if arg.calling_convention.is_mutable and callee_name != "__set__":  # and ((isinstance(func.lhs, Ast.IdentifierAst) and not func.lhs.identifier == "__set__") or not isinstance(func.lhs, Ast.IdentifierAst)):
                         identifiers = collapse_ast_to_list_of_identifiers(arg.value)
                         if identifiers is None:
                             raise SystemExit(
-                                "Cannot borrow from a value that is not a variable:\n" if func.lhs.identifier != "__assign__" else "Cannot assign to a value that's not a variable:\n" +
+                                "Cannot borrow from a value that is not a variable:\n" if callee_name != "__assign__" else "Cannot assign to a value that's not a variable:\n" +
                                 ErrFmt.err(arg.value._tok) + f"Value '{arg.value}' is not a variable.")
 
                         outermost_identifier = collapse_ast_to_list_of_identifiers(arg.value)[0]
                         outermost_symbol = s.current_scope.get_symbol(outermost_identifier, SymbolTypes.VariableSymbol)
 
                         if not outermost_symbol.is_mutable and not outermost_symbol.mem_info.is_borrowed_mut:
-                            if collapse_ast_to_list_of_identifiers(func.lhs)[-1].identifier == "__assign__":
+                            if callee_name == "__assign__":
                                 final_error_message = ErrFmt.err(arg.value._tok) + f"Assignment to '{arg.value}' attempted here."
                             else:
                                 final_error_message = ErrFmt.err(arg.value._tok) + f"Value '{arg.value}' borrowed mutably here."
@@ -727,7 +940,7 @@ class SemanticAnalysis:
         for given_field in ast.op.fields:
             SemanticAnalysis.analyse_expression(given_field.value or given_field.identifier, s)
 
-            if isinstance(given_field.value or given_field.identifier, Ast.IdentifierAst) and not s.current_scope.get_symbol(given_field, SymbolTypes.VariableSymbol).mem_info.is_initialized:
+            if isinstance(given_field.value or given_field.identifier, Ast.IdentifierAst) and not s.current_scope.get_symbol(given_field.value or given_field.identifier, SymbolTypes.VariableSymbol).mem_info.is_initialized:
                 raise SystemExit(ErrFmt.err(given_field._tok) + f"Argument {given_field} is not initialized or has been moved.")
             if isinstance(given_field.value or given_field.identifier, Ast.IdentifierAst):
                 s.current_scope.get_symbol(given_field.value or given_field.identifier, SymbolTypes.VariableSymbol).mem_info.is_initialized = False
@@ -1,11 +1,23 @@
+from src.LexicalAnalysis.Tokens import Token
 from src.SyntacticAnalysis import Ast
 
+from src.Compiler.Dump import Dump
+from src.Compiler.LookupStats import LookupStats
+
 from src.SemanticAnalysis2.SymbolGeneration import SymbolGeneration
-from src.Compiler.Printer import save_json
 
 
 class Semantics:
-    def __init__(self, ast: Ast.ProgramAst):
+    def __init__(self, ast: Ast.ProgramAst, tokens: list[Token]):
         self._ast = ast
-        s = SymbolGeneration.generate(ast)
-        save_json(s.json(), "_out/symbol_table.json")
+        s = SymbolGeneration.generate(ast, tokens)
+        Dump.symbols(s)
+
+        # Print the summary of the symbol lookups made by the analysis, if they were counted.
+        if LookupStats.ENABLED:
+            print(LookupStats.report())
+            LookupStats.save("_out/lookup_stats.txt")
+
+        # Keep the scopes (and the analysed modules) for code generation.
+        self.scope_handler = s
+        self.modules = SymbolGeneration.ALL_MODS
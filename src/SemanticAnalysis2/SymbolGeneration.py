@@ -1,12 +1,17 @@
-import copy
+import time
 
+from src.Compiler.Dump import Dump
+from src.Compiler.MemoryReport import MemoryReport
+from src.Compiler.TimeReport import TimeReport
 from src.LexicalAnalysis.Lexer import Lexer
+from src.LexicalAnalysis.Tokens import Token
 from src.SemanticAnalysis2.NsSubstitution import NsSubstitution
 from src.SemanticAnalysis2.SemanticAnalysis import SemanticAnalysis
 from src.SyntacticAnalysis import Ast
 from src.SyntacticAnalysis.Parser import ErrFmt, Parser
 from src.SemanticAnalysis2.AstReduction import AstReduction
-from src.SemanticAnalysis2.SymbolTable import ScopeHandler, SymbolTypes
+from src.SemanticAnalysis2.SymbolTable import ScopeHandler, ScopeHandlerSnapshot, SymbolTypes
+from src.SemanticAnalysis2.TypeInference import TypeInfer
 from src.SemanticAnalysis2.ModuleTree import ModuleTree
 
 
@@ -14,42 +19,59 @@ class SymbolGeneration:
     ALL_MODS = []
 
     @staticmethod
-    def generate(ast: Ast.ProgramAst) -> ScopeHandler:
+    def generate(ast: Ast.ProgramAst, tokens: list[Token]) -> ScopeHandler:
+        # Clear the state kept in class attributes by the previous compilation (if any), so that the compiler can be run
+        # more than once in the same process, ie for the "--run" mode.
+        AstReduction.REDUCED_FUNCTIONS = {}
+        SemanticAnalysis.CHECKED_OVERLOADS = set()
+        TypeInfer.BINARY_OPERATORS = {}
+        ScopeHandlerSnapshot.ACTIVE = []
+
         s = ScopeHandler()
 
-        module_tree = ModuleTree.grab()
+        module_index = ModuleTree.index()
         SymbolGeneration.ALL_MODS = [(s.global_scope, ast)]
         SymbolGeneration.generate_program(ast, s)
-        SymbolGeneration.generate_imports(ast, module_tree, s)
+        SymbolGeneration.generate_imports(ast, tokens, module_index, s)
+        MemoryReport.snapshot("symbol_generation", [mod for _, mod in SymbolGeneration.ALL_MODS], s)
 
-        t = copy.deepcopy(s)
         for scope, mod in SymbolGeneration.ALL_MODS:
             # set the scope to the entry point of the module, and perform type-ns substitutions.
             # s.current_scope = scope
 
-            ErrFmt.TOKENS = Lexer(open(".\\TestCode\\" + mod.module.identifier.as_file_path(), "r").read()).lex()
+            ErrFmt.TOKENS = Lexer(open(ModuleTree.ROOT + mod.module.identifier.as_file_path(), "r").read()).lex()
             ErrFmt.FILE_PATH = str(mod.module.identifier)
-            NsSubstitution.substitute_for_program(mod, s)
-
+            with TimeReport.phase("ns_substitution", str(mod.module.identifier)):
+                NsSubstitution.substitute_for_program(mod, s)
+        MemoryReport.snapshot("ns_substitution", [mod for _, mod in SymbolGeneration.ALL_MODS], s)
 
         s.switch_to_global_scope()
         for scope, mod in SymbolGeneration.ALL_MODS:
             # set the scope to the entry point of the module, and perform semantic analysis.
             # s.current_scope = scope
 
-            ErrFmt.TOKENS = Lexer(open(".\\TestCode\\" + mod.module.identifier.as_file_path(), "r").read()).lex()
+            ErrFmt.TOKENS = Lexer(open(ModuleTree.ROOT + mod.module.identifier.as_file_path(), "r").read()).lex()
             ErrFmt.FILE_PATH = str(mod.module.identifier)
-            SemanticAnalysis.analyse(mod, s)
+            with TimeReport.phase("semantic_analysis", str(mod.module.identifier)):
+                SemanticAnalysis.analyse(mod, s)
 
+        # Analyse the function bodies that were deferred to run in parallel (if any), across every module at once.
+        with TimeReport.phase("semantic_analysis"):
+            SemanticAnalysis.analyse_deferred_functions(s)
+        MemoryReport.snapshot("semantic_analysis", [mod for _, mod in SymbolGeneration.ALL_MODS], s)
 
         s.switch_to_global_scope()
         return s
 
     @staticmethod
     def generate_program(ast: Ast.ProgramAst, s: ScopeHandler):
-        AstReduction.reduce(ast)
-        for member in ast.module.body.members:
-            SymbolGeneration.generate_module_member(member, s)
+        with TimeReport.phase("ast_reduction", str(ast.module.identifier)):
+            AstReduction.reduce(ast)
+        if ast is SymbolGeneration.ALL_MODS[0][1]:
+            MemoryReport.snapshot("ast_reduction", [ast])
+        with TimeReport.phase("symbol_generation", str(ast.module.identifier)):
+            for member in ast.module.body.members:
+                SymbolGeneration.generate_module_member(member, s)
 
     @staticmethod
     def generate_module_member(ast: Ast.ModuleMemberAst, s: ScopeHandler):
@@ -64,45 +86,68 @@ class SymbolGeneration:
                 raise SystemExit(ErrFmt.err(ast._tok) + f"Unknown module member {ast} being generated. Report as bug.")
 
     @staticmethod
-    def generate_imports(root: Ast.ProgramAst, files: list[str], s: ScopeHandler):
-        for mod_name in files:
-            mod_code = open(mod_name, "r").read()
-
-            ts = ErrFmt.TOKENS.copy()
-            fp = ErrFmt.FILE_PATH
-            open("_out/new_code.spp", "a").write(mod_code)
+    def generate_imports(root: Ast.ProgramAst, tokens: list[Token], index: dict[str, str], s: ScopeHandler):
+        # Load the modules that are referenced from the main module (from its tokens), and from the modules it loads in
+        # turn, until no more are referenced. The modules that are never referenced aren't lexed or parsed at all.
+        references = ModuleTree.references(tokens) | ModuleTree.imports(root)
+        pending = list(index)
+        while referenced := [name for name in pending if ModuleTree.is_referenced(name, references)]:
+            for name in referenced:
+                pending.remove(name)
+                SymbolGeneration.generate_import(name, index[name], references, s)
+        for name in pending:
+            ModuleTree.skip(name)
 
+    @staticmethod
+    def generate_import(name: str, mod_name: str, references: set[str], s: ScopeHandler):
+        # A referenced file that doesn't start with "mod " isn't a module, so it's skipped, with the time taken to
+        # read it.
+        start = time.perf_counter()
+        mod_code = open(mod_name, "r").read()
+        if not mod_code.strip().startswith("mod "):
+            ModuleTree.skip(name, time.perf_counter() - start)
+            return
+
+        ts = ErrFmt.TOKENS.copy()
+        fp = ErrFmt.FILE_PATH
+        Dump.code(mod_code, append=True)
+
+        with TimeReport.phase("lex", mod_name):
             new_toks = Lexer(mod_code).lex()
+        with TimeReport.phase("parse", mod_name):
             new_mod = Parser(new_toks, mod_name).parse()
+        TimeReport.name_module(mod_name, str(new_mod.module.identifier))
+        ModuleTree.LOADED[str(new_mod.module.identifier)] = (len(mod_code), time.perf_counter() - start)
+        references |= ModuleTree.references(new_toks) | ModuleTree.imports(new_mod)
+
+        # Separate all the scopes -- for example, if the module is `a.b.c`, then we need to separate the scopes "a",
+        # "b", and "c". Set the current scope to the global scope (where modules are all found, then layered from)
+        scopes = new_mod.module.identifier.remove_last().parts
+        current = s.global_scope
+
+        # Iterate through the scopes.
+        for scope in scopes:
+
+            # If the scope already exists, ie a module in the same directory, then we can just set the current scope
+            # to that scope, and generate the program if it's the last scope.
+            if scope in [y.name for y in current.children]:
+                c = s.current_scope
+                s.current_scope = current.get_child_scope(scope)
+                if scope == scopes[-1]:
+                    SymbolGeneration.generate_program(new_mod, s)
+                    SymbolGeneration.ALL_MODS.append((s.current_scope, new_mod))
+                current = s.current_scope
+
+            # Otherwise, we need to create a new scope, and generate the program if it's the last scope.
+            else:
+                s.enter_scope(scope, is_mod=True)
+                if scope == scopes[-1]:
+                    SymbolGeneration.generate_program(new_mod, s)
+                    SymbolGeneration.ALL_MODS.append((s.current_scope, new_mod))
 
-            # Separate all the scopes -- for example, if the module is `a.b.c`, then we need to separate the scopes "a",
-            # "b", and "c". Set the current scope to the global scope (where modules are all found, then layered from)
-            scopes = new_mod.module.identifier.remove_last().parts
-            current = s.global_scope
-
-            # Iterate through the scopes.
-            for scope in scopes:
-
-                # If the scope already exists, ie a module in the same directory, then we can just set the current scope
-                # to that scope, and generate the program if it's the last scope.
-                if scope in [y.name for y in current.children]:
-                    c = s.current_scope
-                    s.current_scope = current.get_child_scope(scope)
-                    if scope == scopes[-1]:
-                        SymbolGeneration.generate_program(new_mod, s)
-                        SymbolGeneration.ALL_MODS.append((s.current_scope, new_mod))
-                    current = s.current_scope
-
-                # Otherwise, we need to create a new scope, and generate the program if it's the last scope.
-                else:
-                    s.enter_scope(scope, is_mod=True)
-                    if scope == scopes[-1]:
-                        SymbolGeneration.generate_program(new_mod, s)
-                        SymbolGeneration.ALL_MODS.append((s.current_scope, new_mod))
-
-            s.switch_to_global_scope()
-            ErrFmt.TOKENS = ts
-            ErrFmt.FILE_PATH = fp
+        s.switch_to_global_scope()
+        ErrFmt.TOKENS = ts
+        ErrFmt.FILE_PATH = fp
 
     @staticmethod
     def generate_function_prototype(ast: Ast.FunctionPrototypeAst, s: ScopeHandler):
@@ -114,7 +159,7 @@ class SymbolGeneration:
         sym.meta_data["is_method"] = is_method
         s.current_scope.add_symbol(sym)
 
-        s.enter_scope(ast.identifier)
+        s.enter_scope(ast.identifier, ast=ast)
         [s.current_scope.add_symbol(SymbolTypes.TypeSymbol(g.identifier, SymbolGeneration.dummy_generic_type(g.identifier))) for g in ast.generic_parameters]
         s.exit_scope()
 
@@ -123,7 +168,7 @@ class SymbolGeneration:
         ty = Ast.TypeSingleAst([ast.identifier.to_generic_identifier()], ast._tok)
         s.current_scope.add_symbol(SymbolTypes.TypeSymbol(ty.to_identifier(), ast))
 
-        s.enter_scope(ty, hidden=hidden)
+        s.enter_scope(ty, hidden=hidden, ast=ast)
         [s.current_scope.add_symbol(SymbolTypes.TypeSymbol(g.identifier, SymbolGeneration.dummy_generic_type(g.identifier))) for g in ast.generic_parameters]
 
         if not ast.identifier.identifier.startswith("__"):
@@ -136,7 +181,7 @@ class SymbolGeneration:
 
     @staticmethod
     def generate_sup_prototype(ast: Ast.SupPrototypeAst, s: ScopeHandler, hidden: bool = False):
-        s.enter_scope(ast.identifier.to_identifier().identifier + "#SUP", hidden=hidden)
+        s.enter_scope(ast.identifier.to_identifier().identifier + "#SUP", hidden=hidden, ast=ast)
 
         # todo : ultimately, i want to remove this constraint, but it throws some errors at the moment that i will
         #  handle another time.
@@ -159,7 +204,7 @@ class SymbolGeneration:
         if not cls_scope:
             raise SystemExit(ErrFmt.err(ast.identifier._tok) + f"Class '{ast.identifier}' not found.")
 
-        cls_scope.sup_scopes.append(s.current_scope)
+        cls_scope.add_sup_scopes([s.current_scope])
         # if isinstance(ast, Ast.SupPrototypeInheritanceAst) and ast.super_class.parts[-1].identifier not in ["FnRef", "FnMut", "FnOne"]:
         #     super_class_scope = s.global_scope.get_child_scope(ast.super_class)
         #
@@ -197,7 +242,7 @@ class SymbolGeneration:
 
         old_type_scope = s.global_scope.get_child_scope(ast.old_type)
         s.current_scope.add_symbol(SymbolTypes.TypeSymbol(ast.new_type.to_identifier(), old_type_sym.type))
-        s.current_scope.sup_scopes.extend(old_type_scope.sup_scopes)
+        s.current_scope.add_sup_scopes(old_type_scope.sup_scopes)
 
     @staticmethod
     def dummy_generic_type(ast: Ast.IdentifierAst) -> Ast.TypeAst:
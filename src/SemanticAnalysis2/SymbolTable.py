@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import builtins
+import copy
 import inspect
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from typing import Any, Hashable, Optional, TypeVar, Callable
 
+from src.Compiler.Profiler import Profiler
 from src.SyntacticAnalysis import Ast
 from src.SyntacticAnalysis.Parser import ErrFmt
 
@@ -36,9 +38,22 @@ class VariableSymbolMemoryStatus:
         self.initialization_ast = None
         self.partially_moved_asts = []
 
+    def __setattr__(self, key, value):
+        # The status is changed by setting its attributes, so this is where an active snapshot records its state before
+        # the first change. The attributes set for the first time, by __init__(), don't need recording.
+        if ScopeHandlerSnapshot.ACTIVE and key in vars(self):
+            ScopeHandlerSnapshot.record_mem_info(self)
+        super().__setattr__(key, value)
+
     def is_borrowed(self):
         return self.is_borrowed_ref or self.is_borrowed_mut
 
+    def copy(self) -> VariableSymbolMemoryStatus:
+        # The ASTs are shared, but the list of partial moves is copied, as it is appended to.
+        other = copy.copy(self)
+        vars(other)["partially_moved_asts"] = self.partially_moved_asts.copy()
+        return other
+
 
 class SymbolTypes:
     @dataclass
@@ -111,6 +126,8 @@ class SymbolTable:
         self.symbols = {}
 
     def add(self, symbol: SymbolTypes.Symbol):
+        if ScopeHandlerSnapshot.ACTIVE:
+            ScopeHandlerSnapshot.record_table(self)
         self.symbols[hash(symbol.name)] = symbol
 
     def get(self, name: Hashable, expected_sym_type: type) -> SymbolTypes.Symbol | list[SymbolTypes.Symbol]:
@@ -150,8 +167,15 @@ class Scope:
         self.hidden = hidden
 
         if parent is not None:
+            if ScopeHandlerSnapshot.ACTIVE:
+                ScopeHandlerSnapshot.record_scope(parent)
             parent.children.append(self)
 
+    def add_sup_scopes(self, sup_scopes: list[Scope]) -> None:
+        if ScopeHandlerSnapshot.ACTIVE:
+            ScopeHandlerSnapshot.record_scope(self)
+        self.sup_scopes.extend(sup_scopes)
+
     def level_of_sup_scope(self, other: Scope) -> int:
         def inner(s: Scope, t: Scope, level: int) -> int:
 
@@ -195,6 +219,7 @@ class Scope:
                 ErrFmt.err(symbol.type.identifier._tok) + "Symbol redefined here")
         self.symbol_table.add(symbol)
 
+    @Profiler.hook
     def get_symbol(self, name: Hashable, expected_sym_type: type[T], error=True) -> T:
         where, name = self.where_to_look(name, expected_sym_type, error=error)
 
@@ -346,15 +371,39 @@ class ScopeHandler:
     def __init__(self):
         self.global_scope  = Scope(Ast.IdentifierAst("Global", -1), None)
         self.current_scope = self.global_scope
+        self.scopes = []
+        self.visited_scopes = []
 
-    def enter_scope(self, name: Hashable, hidden: bool = False, is_mod: bool = False) -> None:
+        # The version of the scope tree, which changes when the tree is rolled back to a snapshot. The caches keyed by
+        # scopes, ie of the resolved binary operators, include the version in their keys, as their entries might refer
+        # to symbols or sup-scopes that the rollback dropped.
+        self.version = 0
+
+    def enter_scope(self, name: Hashable, hidden: bool = False, is_mod: bool = False, ast: Any = None) -> None:
         self.current_scope = Scope(name, self.current_scope, hidden=hidden, is_mod=is_mod)
 
+        # The AST that opens the scope is given the index of the scope, so that later phases can move straight to the
+        # scope with next_scope(ast), rather than walking the tree in the order the scopes were created. An index is
+        # stored rather than the scope itself, so that copying an AST doesn't copy the scope tree along with it.
+        if ast is not None:
+            setattr(ast, "_scope_index", len(self.scopes))
+            self.scopes.append(self.current_scope)
+
     def exit_scope(self) -> None:
         self.current_scope = self.current_scope.parent
 
-    def next_scope(self) -> None:
-        if any([not scope.visited for scope in self.current_scope.children]):
+    def next_scope(self, ast: Any = None) -> None:
+        # A scope moved to by its AST is marked as visited too, so that walking the children of its parent later skips
+        # it, and switch_to_global_scope() resets it.
+        if ast is not None and hasattr(ast, "_scope_index"):
+            self.current_scope = self.scopes[getattr(ast, "_scope_index")]
+            if not self.current_scope.visited:
+                self.current_scope.visited = True
+                self.visited_scopes.append(self.current_scope)
+
+        # Scopes that aren't addressed by an AST, ie ones opened during analysis, are found by walking the children of
+        # the current scope in the order they were created in.
+        elif any([not scope.visited for scope in self.current_scope.children]):
             unvisited_scopes = [scope for scope in self.current_scope.children if not scope.visited]
             next_scope = unvisited_scopes[0]
 
@@ -364,6 +413,7 @@ class ScopeHandler:
 
             else:
                 next_scope.visited = True
+                self.visited_scopes.append(next_scope)
                 self.current_scope = next_scope
 
             # next_scope.visited = True
@@ -375,13 +425,26 @@ class ScopeHandler:
     def prev_scope(self) -> None:
         self.current_scope = self.current_scope.parent
 
-    def skip_scope(self) -> None:
-        self.next_scope()
+    def skip_scope(self, ast: Any = None) -> None:
+        self.next_scope(ast)
         self.prev_scope()
 
+    def rewind_scope(self) -> None:
+        # Mark every scope nested in the current scope as unvisited, so that they can be walked again, ie once for each
+        # instantiation of a generic function.
+        def rewind_scope_helper(scope: Scope) -> None:
+            for child in scope.children:
+                child.visited = False
+                rewind_scope_helper(child)
+
+        rewind_scope_helper(self.current_scope)
+
     def switch_to_global_scope(self) -> None:
+        # Only the scopes visited by walking need resetting, rather than every scope in the tree.
         self.current_scope = self.global_scope
-        self.visit_every_scope(lambda scope: setattr(scope, "visited", False))
+        for scope in self.visited_scopes:
+            scope.visited = False
+        self.visited_scopes = []
 
     def visit_every_scope(self, func: Callable) -> None:
         # Apply some function to every scope, starting from the current scope and recursively visiting children
@@ -393,18 +456,86 @@ class ScopeHandler:
         current_scope = self.current_scope
         visit_every_scope_helper(current_scope, func)
 
-    def json(self) -> dict:
-        def scope_to_json(scope: Scope) -> dict:
-            return {
-                "id": scope.id,
-                "name": str(scope.name),
-                "parent": scope.parent.id if scope.parent is not None else None,
-                "symbol_table": {
-                    "symbols": {str(v.name): v.json() for k, v in scope.symbol_table.symbols.items()}
-                },
-                "scope-id": scope.id,
-                "children": [scope_to_json(child) for child in scope.children],
-                "sup-scopes": [str(sup_scope.name) for sup_scope in scope.sup_scopes]
-            }
-
-        return scope_to_json(self.global_scope)
+    def snapshot(self) -> ScopeHandlerSnapshot:
+        # Take a snapshot that the scope tree can be rolled back to, until it is released.
+        snapshot = ScopeHandlerSnapshot(self)
+        ScopeHandlerSnapshot.ACTIVE.append(snapshot)
+        return snapshot
+
+    def rollback(self, snapshot: ScopeHandlerSnapshot) -> None:
+        snapshot.restore(self)
+        self.version += 1
+
+    def release(self, snapshot: ScopeHandlerSnapshot) -> None:
+        # Stop recording changes for the snapshot, once it won't be rolled back to (again).
+        ScopeHandlerSnapshot.ACTIVE.remove(snapshot)
+
+
+class ScopeHandlerSnapshot:
+    # A snapshot of the scope tree, that the scope handler can be rolled back to, ie after speculatively analysing some
+    # code. Taking a snapshot copies nothing. Instead, while the snapshot is active, the first change to each symbol
+    # table, to the children or sup-scopes of each scope, and to each variable's memory status, records the previous
+    # state (copy on write), so the cost is in proportion to what changes rather than to the size of the tree. Rolling
+    # back restores the recorded states, which drops any scopes or symbols added after the snapshot. ASTs modified after
+    # the snapshot, ie by type substitution or the annotations added for code generation, are not restored.
+    ACTIVE: list[ScopeHandlerSnapshot] = []
+
+    tables: dict[SymbolTable, dict]
+    scopes: dict[Scope, tuple[SymbolTable, int, int]]
+    mem_infos: dict[int, tuple[VariableSymbolMemoryStatus, VariableSymbolMemoryStatus]]
+    current_scope: Scope
+    num_addressed_scopes: int
+    visited_scopes: list[Scope]
+
+    def __init__(self, s: ScopeHandler):
+        self.tables = {}
+        self.scopes = {}
+        self.mem_infos = {}
+        self.current_scope = s.current_scope
+        self.num_addressed_scopes = len(s.scopes)
+        self.visited_scopes = s.visited_scopes.copy()
+
+    @staticmethod
+    def record_table(table: SymbolTable) -> None:
+        for snapshot in ScopeHandlerSnapshot.ACTIVE:
+            if table not in snapshot.tables:
+                snapshot.tables[table] = table.symbols.copy()
+
+    @staticmethod
+    def record_scope(scope: Scope) -> None:
+        # The children and sup-scopes are only appended to, so only their number is recorded. The symbol table is
+        # recorded too, as merging the results of the parallel analysis replaces it.
+        for snapshot in ScopeHandlerSnapshot.ACTIVE:
+            if scope not in snapshot.scopes:
+                snapshot.scopes[scope] = (scope.symbol_table, len(scope.children), len(scope.sup_scopes))
+
+    @staticmethod
+    def record_mem_info(mem_info: VariableSymbolMemoryStatus) -> None:
+        for snapshot in ScopeHandlerSnapshot.ACTIVE:
+            if id(mem_info) not in snapshot.mem_infos:
+                snapshot.mem_infos[id(mem_info)] = (mem_info, mem_info.copy())
+
+    def restore(self, s: ScopeHandler) -> None:
+        # The recorded states are copied back in, rather than moved, so the same snapshot can be restored more than
+        # once. Nothing is recorded while restoring, as the snapshots taken after this one are dropped by it.
+        active = ScopeHandlerSnapshot.ACTIVE
+        ScopeHandlerSnapshot.ACTIVE = []
+
+        for scope, (symbol_table, num_children, num_sup_scopes) in self.scopes.items():
+            scope.symbol_table = symbol_table
+            del scope.children[num_children:]
+            del scope.sup_scopes[num_sup_scopes:]
+        for table, symbols in self.tables.items():
+            table.symbols = symbols.copy()
+        for mem_info, recorded in self.mem_infos.values():
+            vars(mem_info).update(vars(recorded.copy()))
+
+        for scope in s.visited_scopes:
+            scope.visited = False
+        for scope in self.visited_scopes:
+            scope.visited = True
+        s.current_scope = self.current_scope
+        del s.scopes[self.num_addressed_scopes:]
+        s.visited_scopes = self.visited_scopes.copy()
+
+        ScopeHandlerSnapshot.ACTIVE = active[:active.index(self) + 1]
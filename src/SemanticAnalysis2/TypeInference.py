@@ -3,12 +3,14 @@ from typing import Generator, Optional, Any
 import copy
 import inspect
 
+from src.Compiler.LookupStats import LookupStats
+from src.Compiler.Profiler import Profiler
 from src.LexicalAnalysis.Tokens import TokenType
 from src.SemanticAnalysis2.NsSubstitution import NsSubstitution
 from src.SyntacticAnalysis import Ast
 from src.SyntacticAnalysis.Parser import ErrFmt
 
-from src.SemanticAnalysis2.SymbolTable import ScopeHandler, SymbolTypes
+from src.SemanticAnalysis2.SymbolTable import Scope, ScopeHandler, SymbolTypes
 from src.SemanticAnalysis2.CommonTypes import CommonTypes
 
 
@@ -20,7 +22,11 @@ def enumerable_any(args: list) -> tuple[int, bool]:
 
 
 class TypeInfer:
+    BINARY_OPERATORS = {}
+    CHECK_BINARY_OPERATORS = False
+
     @staticmethod
+    @Profiler.hook
     def infer_expression(ast: Ast.ExpressionAst, s: ScopeHandler, **kwargs) -> Ast.TypeAst:
         # Match the AST node by its type, and call the appropriate function to infer the type. For example, if the AST
         # node is an identifier, call infer_identifier() to infer the type of the identifier. Literals will always
@@ -160,22 +166,118 @@ class TypeInfer:
 
     @staticmethod
     def infer_binary_expression(ast: Ast.BinaryExpressionAst, s: ScopeHandler) -> Ast.TypeAst:
-        # todo : this is currently a duplicate of SemanticAnalysis.analyse_binary_expression()
+        # The type of a binary expression is the return type of the operator method it calls. Resolve the operator
+        # method directly if possible, otherwise remodel the binary expression into the function call and infer that.
+        resolved = TypeInfer.resolve_binary_operator(ast, s)
+        if resolved:
+            return resolved[1]
+        return TypeInfer.infer_expression(TypeInfer.binary_expression_as_function_call(ast), s)
 
-        # Remodel the binary expression into a function call, then analyse the function call. Start with constructing a
-        # postfix call to the correct method name. For example, for "x + y", begin with constructing "x.add".
-        pos = ast._tok
+    @staticmethod
+    def binary_expression_as_function_call(ast: Ast.BinaryExpressionAst) -> Ast.PostfixExpressionAst:
+        # Remodel the binary expression into a function call. Start with constructing a postfix call to the correct
+        # method name. For example, for "x + y", begin with constructing "x.add".
+        pos = ast.op._tok
         fn = Ast.IdentifierAst(Ast.BIN_FN[ast.op.tok.token_type], pos)
         fn = Ast.PostfixMemberAccessAst(fn, pos)
         fn = Ast.PostfixExpressionAst(ast.lhs, fn, pos)
 
         # Next, convert the right-hand side into a function argument, and construct the function call. The function call
-        # creates the "(y)" that is the postfix expression for "x.add", creating "x.add(y)". This is then analysed.
+        # creates the "(y)" that is the postfix expression for "x.add", creating "x.add(y)".
         rhs = Ast.FunctionArgumentAst(None, ast.rhs, None, False, pos)
         fn_call = Ast.PostfixFunctionCallAst([], [rhs], pos)
         fn_call = Ast.PostfixExpressionAst(fn, fn_call, pos)
+        return fn_call
+
+    @staticmethod
+    def resolve_binary_operator(ast: Ast.BinaryExpressionAst, s: ScopeHandler) -> Optional[tuple[SymbolTypes.VariableSymbol, Ast.TypeAst]]:
+        # Binary expressions are by far the most common function calls, and the operands are nearly always of the same
+        # few types, so the operator overload for "(lhs type, operator, rhs type)" is resolved once and cached. This
+        # avoids constructing the "x.add(y)" function call, and deep-copying every overload of "add", for every binary
+        # expression in the program. None is returned (and cached) when the overload can't be resolved directly, ie for
+        # generic types or generic overloads, ambiguous overloads, or missing operator methods, and the caller then goes
+        # back to analysing the full function call, which handles these cases and produces the errors.
+        lhs_ty = TypeInfer.infer_expression(ast.lhs, s)
+        rhs_ty = TypeInfer.infer_expression(ast.rhs, s)
+        if not isinstance(lhs_ty, Ast.TypeSingleAst) or not isinstance(rhs_ty, Ast.TypeSingleAst):
+            return None
+
+        # The class scopes are part of the key, because the same type name can refer to different types from different
+        # modules. Generic types have no class scope, so aren't resolved directly. The version of the scope tree is too,
+        # as rolling the tree back to a snapshot can drop the resolved overload.
+        lhs_scope = s.global_scope.get_child_scope(lhs_ty)
+        rhs_scope = s.global_scope.get_child_scope(rhs_ty)
+        if not lhs_scope or not rhs_scope:
+            return None
+
+        key = (s.version, lhs_scope, lhs_ty, ast.op.tok.token_type, rhs_scope, rhs_ty)
+        if LookupStats.ENABLED:
+            LookupStats.cache("binary_operators", key in TypeInfer.BINARY_OPERATORS)
+        if key in TypeInfer.BINARY_OPERATORS:
+            return TypeInfer.BINARY_OPERATORS[key]
+
+        resolved = TypeInfer.resolve_binary_operator_overload(ast, lhs_ty, lhs_scope, rhs_ty, s)
+
+        # When checking is enabled, compare the directly resolved overload against the overload that the full function
+        # call resolution selects, to make sure the cache never changes which overload is called.
+        if resolved and TypeInfer.CHECK_BINARY_OPERATORS:
+            expected = TypeInfer.infer_postfix_function_call(TypeInfer.binary_expression_as_function_call(ast), s)
+            if expected[0] is not resolved[0] or expected[1] != resolved[1]:
+                raise SystemExit(
+                    ErrFmt.err(ast.op._tok) + f"Binary operator resolved to '{resolved[0].meta_data['fn_proto']}', but should resolve to '{expected[0].meta_data['fn_proto']}'. Report as bug.")
 
-        return TypeInfer.infer_expression(fn_call, s)
+        TypeInfer.BINARY_OPERATORS[key] = resolved
+        return resolved
+
+    @staticmethod
+    def resolve_binary_operator_overload(ast: Ast.BinaryExpressionAst, lhs_ty: Ast.TypeSingleAst, lhs_scope: Scope, rhs_ty: Ast.TypeSingleAst, s: ScopeHandler) -> Optional[tuple[SymbolTypes.VariableSymbol, Ast.TypeAst]]:
+        # Generic arguments on the left-hand side type would have to be substituted into the overloads' types, which is
+        # done by the full function call resolution.
+        if any(part.generic_arguments for part in lhs_ty.parts if isinstance(part, Ast.GenericIdentifierAst)):
+            return None
+
+        # Get the operator method, ie "add", on the left-hand side type, and then the overload manager for the method,
+        # ie the "__MOCK_add" class scope, which holds the "call_[ref|mut|one]" overloads.
+        method_symbol = lhs_scope.get_symbol_exclusive(Ast.IdentifierAst(Ast.BIN_FN[ast.op.tok.token_type], ast.op._tok), SymbolTypes.VariableSymbol, error=False)
+        if not method_symbol:
+            return None
+
+        overload_manager_scope = lhs_scope.get_child_scope(method_symbol.type)
+        if not overload_manager_scope:
+            return None
+
+        overload_symbols = [x for x in overload_manager_scope.all_symbols_exclusive_no_fn(SymbolTypes.VariableSymbol) if x.name.identifier in ["call_ref", "call_mut", "call_one"]]
+        if any(f.meta_data["fn_proto"].generic_parameters for f in overload_symbols):
+            return None
+
+        # Check each overload against the operand types and calling conventions, in the same way as the full function
+        # call resolution. The left-hand side is the "self" argument for methods, and the right-hand side is always
+        # passed by value.
+        valid_overloads = []
+        for f in overload_symbols:
+            fn_proto = f.meta_data["fn_proto"]
+            parameters = fn_proto.parameters
+            if f.meta_data.get("is_method", False) and parameters and parameters[0].is_self:
+                argument_tys = [lhs_ty, rhs_ty]
+                argument_ccs = [parameters[0].calling_convention, None]
+            else:
+                argument_tys = [rhs_ty]
+                argument_ccs = [None]
+
+            num_required_parameters = len([p for p in parameters if p.is_required()])
+            if len(argument_tys) < num_required_parameters or len(argument_tys) > len(parameters):
+                continue
+
+            if not all(TypeInfer.types_equal_account_for_generic(p.type_annotation, arg_ty, {}, s)[0] for p, arg_ty in zip(parameters, argument_tys)):
+                continue
+
+            if any(arg_cc != p.calling_convention for arg_cc, p in zip(argument_ccs, parameters)):
+                continue
+
+            valid_overloads.append((f, fn_proto.return_type))
+
+        # Selecting the most constraining of multiple valid overloads is left to the full function call resolution.
+        return valid_overloads[0] if len(valid_overloads) == 1 else None
 
     @staticmethod
     def infer_postfix_expression(ast: Ast.PostfixExpressionAst, s: ScopeHandler, **kwargs) -> Ast.TypeAst:
@@ -226,6 +328,7 @@ class TypeInfer:
                 ErrFmt.err(ast._tok) + f"{type(ast).__name__} is being inferred an an postfix member access here.")
 
     @staticmethod
+    @Profiler.hook
     def infer_postfix_function_call(ast: Ast.PostfixExpressionAst, s: ScopeHandler) -> tuple[Optional[SymbolTypes.VariableSymbol], Ast.TypeAst]:
         if type(ast.lhs) in Ast.TypeAst.__args__:
             raise SystemExit(
@@ -299,8 +402,10 @@ class TypeInfer:
         original_args_ccs = argument_ccs.copy()
 
         # Create a list to store all valid overloads in -- this is so that the list can be scanned and ordered based on
-        # how constraining the parameters are, in order to select the most constraining overload.
+        # how constraining the parameters are, in order to select the most constraining overload. The generic map that
+        # each valid overload was checked with is kept too, keyed by the id of its entry in the list.
         valid_overloads = []
+        generic_maps = {}
 
         # Check each overload in the function prototypes list.
         for i, fn_type in enumerate(function_prototypes):
@@ -383,23 +488,28 @@ class TypeInfer:
                 errs.append(f"Expected argument {mismatch_index + 1} to be passed by '{param_ccs[mismatch_index]}', but got '{argument_ccs[mismatch_index]}'.")
                 continue
 
-            # Add the generic map from any previous member accesses into this one too.
+            # Add the generic map from any previous member accesses into this one too. The generic map is keyed by the
+            # identifiers of the generic parameters, so a return type that is just a generic parameter is replaced by
+            # the type bound to it (substitution compares whole types, so wouldn't match the identifier).
             return_type = copy.deepcopy(fn_type.return_type)
             for g, h in ast.op.generic_map.items():
+                if h is not None and isinstance(return_type, Ast.TypeSingleAst) and return_type.to_identifier() == g:
+                    return_type = copy.deepcopy(h)
                 TypeInfer.substitute_generic_type(return_type, g, h)
             ast.op.arguments = original_call_arguments
             if not is_special_function:
                 valid_overloads.append((overload_symbols[i], return_type))
             else:
                 valid_overloads.append((None, return_type))
+            generic_maps[id(valid_overloads[-1])] = ast.op.generic_map
 
         # Selection of the most constraining overload will occur here
         # todo : generic constraints will need to be merged into this at some point too
         if valid_overloads:
 
-            # If there is only one valid overload, then return it.
+            # If there is only one valid overload, then select it.
             if len(valid_overloads) == 1:
-                return valid_overloads[0]
+                selected = valid_overloads[0]
 
             # The most constraining is the overload with the least number of parameters whose types are generic types.
             # This is because the generic types are the least constraining, as they can be any type, and fixed types are
@@ -411,9 +521,9 @@ class TypeInfer:
                 least_generic_param_count = min(generic_param_counts)
                 indexes_of_least_generic_param_count = [i for i, x in enumerate(generic_param_counts) if x == least_generic_param_count]
 
-                # Only 1 function with the least number of generics, so return this function.
+                # Only 1 function with the least number of generics, so select this function.
                 if len(indexes_of_least_generic_param_count) == 1:
-                    return valid_overloads[indexes_of_least_generic_param_count[0]]
+                    selected = valid_overloads[indexes_of_least_generic_param_count[0]]
 
                 # Multiple functions with the least number of generics, so select the function with the most
                 # constraining types. If B super-imposes A, and the argument is of the type B, and there is an overload
@@ -445,13 +555,22 @@ class TypeInfer:
                         lowest = min([overload_type_level_differences[x][i] for x in active_indexes])
                         active_indexes = [x for x in active_indexes if overload_type_level_differences[x][i] == lowest]
 
-                    # If there is only one valid overload, then return it.
+                    # If there is only one valid overload, then select it.
                     if len(active_indexes) == 1:
-                        return valid_overloads[active_indexes[0]]
+                        selected = valid_overloads[active_indexes[0]]
 
                     # If there are multiple valid overloads, then there is an ambiguity, so raise an error.
-                    raise SystemExit("Should never reach this error. Report as bug.")
-
+                    else:
+                        raise SystemExit("Should never reach this error. Report as bug.")
+
+            # Keep the generic map of the selected overload on the call (rather than the map of the last overload that
+            # was checked), so that later phases know the types that its generic parameters were bound to. The selected
+            # overload is recorded on the call too, so that code generation can call it directly, without resolving the
+            # overloads again.
+            ast.op.generic_map = generic_maps[id(selected)]
+            if selected[0] is not None:
+                setattr(ast.op, "_overload", selected[0])
+            return selected
 
         ast.op.arguments = original_call_arguments
 
@@ -406,6 +406,12 @@ class BinaryExpressionAst:
     def __str__(self):
         return str(self.lhs) + " " + str(self.op) + " " + str(self.rhs)
 
+    def __hash__(self):
+        return hash(self.lhs) + hash(self.op) + hash(self.rhs)
+
+    def __eq__(self, other):
+        return isinstance(other, BinaryExpressionAst) and self.lhs == other.lhs and self.op == other.op and self.rhs == other.rhs
+
 @dataclass
 class AssignmentExpressionAst:
     lhs: list[ExpressionAst]
@@ -7,6 +7,9 @@ import re
 from typing import Callable, Any, Optional, ParamSpec, TypeVar, Generic
 from src.SyntacticAnalysis import Ast
 from src.LexicalAnalysis.Tokens import TokenType, Token
+from src.Compiler.ParseProfile import ParseProfile
+from src.Compiler.Profiler import Profiler
+from src.Compiler.Trace import Trace
 
 
 class ParseSyntaxError(Exception):
@@ -149,7 +152,7 @@ class BoundParser(Generic[T]):
         # Try to parse the rule once. If there is an error whilst parsing the rule, then catch it, append the current
         # BoundParser's error to the error message, and re-raise the error. This allows for the error message to be
         # propagated up the call stack.
-        results = self._rule()
+        results = self._rule() if not ParseProfile.ENABLED else ParseProfile.parse(self._rule, self._parser)
 
         # Remove None from a list of results (where a parse_optional has added a None to the list).
         while isinstance(results, list) and None in results:
@@ -174,7 +177,7 @@ class BoundParser(Generic[T]):
         # If there is an error in the optional parse, then the token index of the parser is restored, and the ast is set
         # to None. The None value is also returned, and functions can specify alternatives ie '.parse_optional() or []'
         except (ParseSyntaxError, ParseSyntaxMultiError):
-            self._parser._current = restore_index
+            self._restore(restore_index)
             self._ast = None
             return self._ast
 
@@ -197,7 +200,7 @@ class BoundParser(Generic[T]):
             # If an error is caught, then the next parse has failed, so restore the index, and don't append anything to
             # the result list. Set the ast to the list of results (usually a list of other asts), and return this list.
             except (ParseSyntaxError, ParseSyntaxMultiError):
-                self._parser.current = restore_index
+                self._restore(restore_index)
                 self._ast = results
                 return self._ast
 
@@ -213,18 +216,25 @@ class BoundParser(Generic[T]):
             _ = self.parse_once()
             raise ParseNegativeLookaheadError("Expected no result")
         except (ParseSyntaxError, ParseSyntaxMultiError):
-            self._parser.current = restore_index
+            self._restore(restore_index)
             return
 
     def parse_positive_lookahead(self) -> None:
         restore_index = self._parser.current
         try:
             _ = self.parse_once()
-            self._parser.current = restore_index
+            self._restore(restore_index)
             return
         except (ParseSyntaxError, ParseSyntaxMultiError):
             raise ParsePositiveLookaheadError("Expected a result")
 
+    def _restore(self, restore_index: int) -> None:
+        # Roll the parser back to where this rule started. The tokens rolled back over will be scanned again by the next
+        # rule, so they are counted against this rule when the parse is being profiled.
+        if ParseProfile.ENABLED:
+            ParseProfile.rollback(self._rule, self._parser.current - restore_index)
+        self._parser.current = restore_index
+
     def delay_parse(self) -> BoundParser:
         self._delayed = True
         return self
@@ -265,7 +275,7 @@ class MultiBoundParser(BoundParser):
                 result = bound_parser.parse_once()
                 return result
             except ParseSyntaxError:
-                self._parser._current = restore_index
+                bound_parser._restore(restore_index)
 
         raise ParseSyntaxError("Error parsing from selection")
 
@@ -285,8 +295,11 @@ class Parser:
         return self._current
 
     def parse(self) -> Ast.ProgramAst:
+        if ParseProfile.ENABLED:
+            ParseProfile.add_file(ErrFmt.FILE_PATH, self._tokens)
         try:
-            program = self._parse_program().parse_once()
+            with Trace.span("Parser.parse", "parse", file=ErrFmt.FILE_PATH):
+                program = self._parse_program().parse_once()
             return program
         except ParseSyntaxError: # todo : experimental
             final_error = None
@@ -394,11 +407,12 @@ class Parser:
 
     def _parse_module_member(self) -> BoundParser:
         def inner():
-            p1 = self._parse_function_prototype().delay_parse()
-            p2 = self._parse_enum_prototype().delay_parse()
-            p3 = self._parse_class_prototype().delay_parse()
-            p4 = self._parse_sup_prototype().delay_parse()
-            p5 = (p1 | p2 | p3 | p4).parse_once()
+            with Trace.span("module member", "parse", token=self._current_token_index):
+                p1 = self._parse_function_prototype().delay_parse()
+                p2 = self._parse_enum_prototype().delay_parse()
+                p3 = self._parse_class_prototype().delay_parse()
+                p4 = self._parse_sup_prototype().delay_parse()
+                p5 = (p1 | p2 | p3 | p4).parse_once()
             return p5
         return BoundParser(self, inner)
 
@@ -1995,45 +2009,49 @@ class Parser:
     # Misc
 
     def _parse_token(self, token: TokenType) -> BoundParser:
-        def inner():
-            if token != TokenType.TkNewLine: self._skip(TokenType.TkNewLine)
-            self._skip(TokenType.TkWhitespace)
-            c1 = self._current_token_index()
-
-            if self._current >= len(self._tokens):
-                raise ParseSyntaxError(f"Expected '{token.value}', got <EOF>")
-
-            global EXPECTED_TOKENS
-            current_token = self._tokens[self._current]
-            if current_token.token_type != token:
-                got_token = current_token.token_type.value if not current_token.token_type.name.startswith("Lx") else current_token.token_type.name[2:]
-                exp_token = token.value if not token.name.startswith("Lx") else token.name[2:]
-
-                error = ParseSyntaxError(
-                    f"{self._current} Expected one of ¬, got: '{got_token}'.")
-
-                global CUR_ERR_IND
-                if CUR_ERR_IND == self._current:
-                    if "'" + exp_token + "'" not in EXPECTED_TOKENS:
-                        EXPECTED_TOKENS.append(str("'" + exp_token + "'"))
-                    if ERRS:
-                        ERRS[-1] = str(error).replace("¬", ", ".join(EXPECTED_TOKENS))
-                    else:
-                        ERRS.append(str(error).replace("¬", ", ".join(EXPECTED_TOKENS)))
-                    raise error
+        # The token is matched when the rule is parsed, not when it's created, so the match is its own method, which is
+        # the one profiled: creating the rule is only a partial.
+        return BoundParser(self, functools.partial(self._match_token, token))
+
+    @Profiler.hook
+    def _match_token(self, token: TokenType) -> Ast.TokenAst:
+        if token != TokenType.TkNewLine: self._skip(TokenType.TkNewLine)
+        self._skip(TokenType.TkWhitespace)
+        c1 = self._current_token_index()
+
+        if self._current >= len(self._tokens):
+            raise ParseSyntaxError(f"Expected '{token.value}', got <EOF>")
+
+        global EXPECTED_TOKENS
+        current_token = self._tokens[self._current]
+        if current_token.token_type != token:
+            got_token = current_token.token_type.value if not current_token.token_type.name.startswith("Lx") else current_token.token_type.name[2:]
+            exp_token = token.value if not token.name.startswith("Lx") else token.name[2:]
+
+            error = ParseSyntaxError(
+                f"{self._current} Expected one of ¬, got: '{got_token}'.")
+
+            global CUR_ERR_IND
+            if CUR_ERR_IND == self._current:
+                if "'" + exp_token + "'" not in EXPECTED_TOKENS:
+                    EXPECTED_TOKENS.append(str("'" + exp_token + "'"))
+                if ERRS:
+                    ERRS[-1] = str(error).replace("¬", ", ".join(EXPECTED_TOKENS))
                 else:
-                    CUR_ERR_IND = self._current
-                    EXPECTED_TOKENS = [str("'" + exp_token + "'")]
                     ERRS.append(str(error).replace("¬", ", ".join(EXPECTED_TOKENS)))
-                    raise ParseSyntaxError("\n".join(ERRS))
+                raise error
+            else:
+                CUR_ERR_IND = self._current
+                EXPECTED_TOKENS = [str("'" + exp_token + "'")]
+                ERRS.append(str(error).replace("¬", ", ".join(EXPECTED_TOKENS)))
+                raise ParseSyntaxError("\n".join(ERRS))
 
-            EXPECTED_TOKENS.clear()
-            if ERRS: ERRS.pop(-1)
+        EXPECTED_TOKENS.clear()
+        if ERRS: ERRS.pop(-1)
 
-            self._current += 1
+        self._current += 1
 
-            return Ast.TokenAst(self._tokens[self._current - 1], c1)
-        return BoundParser(self, inner)
+        return Ast.TokenAst(self._tokens[self._current - 1], c1)
 
     def _parse_lexeme(self, lexeme: TokenType) -> BoundParser:
         def inner():
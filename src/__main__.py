@@ -1,15 +1,39 @@
-import cProfile
-from src.Compiler.Compiler import Compiler
+import argparse
+import os
+import sys
+from src.Compiler.Compiler import Compiler, CompilerOptions
+from src.Compiler.Dump import Dump
+from src.Compiler.Profiler import Profiler
+from src.CodeGen.CodeGen import CodeGen
+from src.SemanticAnalysis2.SemanticAnalysis import SemanticAnalysis
 
 __version__ = "1.0.0"
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="spp")
+    parser.add_argument("-O", dest="opt_level", type=int, choices=[0, 1, 2, 3], default=0, help="optimisation level")
+    parser.add_argument("--run", action="store_true", help="compile the program in memory and run it")
+    parser.add_argument("--count-allocations", action="store_true", help="count the objects the program creates at runtime")
+    parser.add_argument("--time-report", action="store_true", help="write the time and memory taken by each compiler phase to _out/time_report.json")
+    parser.add_argument("--trace", action="store_true", help="write a Chrome trace of the compiler's activity to _out/trace.json")
+    parser.add_argument("--profile", choices=Profiler.BACKENDS, default=os.environ.get("SPP_PROFILE") or None, help="profile the compiler's hot functions, and write the report to _out/profile.txt")
+    parser.add_argument("--parse-profile", action="store_true", help="count the invocations and backtracking of each parser rule, and write them to _out/parse_profile.txt and _out/parse_heatmap.html")
+    parser.add_argument("--lookup-stats", action="store_true", help="count the symbol lookups of the semantic analysis, and print a summary of them")
+    parser.add_argument("--memory-report", action="store_true", help="write the memory held by the ASTs and scopes after each phase to _out/memory_report.txt")
+    parser.add_argument("--dump", nargs="+", choices=Dump.ARTEFACTS, default=[], help="write the intermediate artefacts to _out/ for debugging")
+    parser.add_argument("--dump-format", choices=Dump.FORMATS, default="json", help="format of the dumped AST and symbol table")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of processes for analysis and code generation")
+    args = parser.parse_args()
+    SemanticAnalysis.JOBS = CodeGen.JOBS = args.jobs
+    CodeGen.COUNT_ALLOCATIONS = args.count_allocations
+
     ROOT = "./TestCode/main.spp"
     code = open(ROOT).read()
 
-    # pr = cProfile.Profile()
-    # pr.enable()
-    Compiler(code, ROOT)
-    # pr.disable()
-    # pr.print_stats(sort="tottime")
+    options = CompilerOptions(
+        opt_level=args.opt_level, run=args.run, time_report=args.time_report, trace=args.trace, profile=args.profile,
+        parse_profile=args.parse_profile, lookup_stats=args.lookup_stats, memory_report=args.memory_report, dump=args.dump,
+        dump_format=args.dump_format)
+    compiler = Compiler(code, ROOT, options)
+    sys.exit(compiler.exit_code)
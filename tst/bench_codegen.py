@@ -0,0 +1,104 @@
+import ctypes
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Benchmark the code generated for an S++ program against the equivalent Python. The program is compiled with the full
+# compiler, and the generated main module is JIT compiled (with MCJIT) and called through ctypes. Run from the directory
+# containing the ".\TestCode\" folder (with the std library in it), as for the compiler itself:
+#   python tst/bench_codegen.py [loop iterations] [repeats]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = ".\\TestCode\\"
+
+PROGRAM = """mod main
+
+fn work(n: std.Num) -> std.Num {
+    let mut total = 0
+    let mut i = 0
+    while i < n {
+        if total < 1000000 {
+            true { total = i + total }
+            else { total = total - 1000000 }
+        }
+        i = i + 1
+    }
+    ret total
+}
+
+fn main() -> std.Void {
+}
+"""
+
+
+def work(n: float) -> float:
+    total = 0.0
+    i = 0.0
+    while i < n:
+        if total < 1000000:
+            total = i + total
+        else:
+            total = total - 1000000
+        i = i + 1
+    return total
+
+
+def best_of(function, n: float, repeats: int) -> tuple[float, float]:
+    times = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(n)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def compile_program(program: str) -> str:
+    # Compile the program with the full compiler, and return the (unoptimised) IR of the main module, which it dumps.
+    # The test code is copied into a temporary directory, and the main module replaced with the program, so the real
+    # main module isn't overwritten.
+    sys.path.insert(0, REPO_ROOT)
+    from src.Compiler.Compiler import Compiler, CompilerOptions
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(ROOT, os.path.join(tmp, ROOT), ignore=shutil.ignore_patterns("main.spp"))
+        open(os.path.join(tmp, ROOT, "main.spp"), "w").write(program)
+        os.makedirs(os.path.join(tmp, "_out"))
+        os.chdir(tmp)
+
+        try:
+            Compiler(program, ROOT + "main.spp", CompilerOptions(dump=["ir"]))
+            return open("_out/main.ll").read()
+        finally:
+            os.chdir(cwd)
+
+
+def main(n: int, repeats: int):
+    sys.path.insert(0, REPO_ROOT)
+    import llvmlite.binding as llvm
+    from src.CodeGen.CodeGen import CodeGen
+
+    start = time.perf_counter()
+    ir = compile_program(PROGRAM)
+    print(f"compile: {time.perf_counter() - start:.3f}s")
+
+    llvm.initialize_native_asmparser()
+    engine = llvm.create_mcjit_compiler(llvm.parse_assembly(ir), CodeGen.create_target_machine(0))
+    engine.finalize_object()
+    compiled = ctypes.CFUNCTYPE(ctypes.c_double, ctypes.c_double)(engine.get_function_address("main.work#0"))
+
+    native_time, native_result = best_of(compiled, float(n), repeats)
+    python_time, python_result = best_of(work, float(n), repeats)
+    assert native_result == python_result, (native_result, python_result)
+
+    print(f"{n} iterations, {repeats} repeats, result {native_result}")
+    print(f"generated: median {native_time:.4f}s")
+    print(f"python:    median {python_time:.4f}s, {python_time / native_time:.1f}x slower")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000, int(sys.argv[2]) if len(sys.argv) > 2 else 5)
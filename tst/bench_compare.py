@@ -0,0 +1,113 @@
+import argparse
+import itertools
+import json
+import math
+import statistics
+import sys
+
+# Compare two result files of tst/bench_compiler.py (a baseline and a candidate), and fail if any phase got slower, or
+# used more memory, by more than the threshold. For each program size in both files, and each phase, the repeated
+# samples of the wall time and the peak memory are compared with a one-sided Mann-Whitney U test, so a change is only
+# flagged if it is both larger than the threshold (comparing the medians) and significant:
+#   python tst/bench_compare.py baseline.json candidate.json [--threshold 0.1] [--alpha 0.05]
+# The exit code is 1 if any regression is found, and 0 otherwise. Both files should be from the same machine.
+
+METRICS = ["wall", "peak_memory"]
+
+# Above this many ways of splitting the pooled samples, the p-value is approximated with the normal distribution,
+# instead of counting every split.
+MAX_EXACT_SPLITS = 20000
+
+
+def ranks(values: list[float]) -> list[float]:
+    # The rank of each value (from 1), with tied values given the mean of the ranks they span.
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    result = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            result[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return result
+
+
+def mann_whitney(baseline: list[float], candidate: list[float]) -> float:
+    # The p-value of the candidate's samples being larger than the baseline's. The U statistic counts the pairs where
+    # the candidate is larger (ties count a half), and is compared against every split of the pooled samples into two
+    # groups of the same sizes (exact, with ties), or against its normal approximation (with the tie correction) if
+    # there are too many splits.
+    n1, n2 = len(baseline), len(candidate)
+    pooled = ranks(baseline + candidate)
+    u = sum(pooled[n1:]) - n2 * (n2 + 1) / 2
+
+    if math.comb(n1 + n2, n2) <= MAX_EXACT_SPLITS:
+        splits = [sum(pooled[i] for i in indices) - n2 * (n2 + 1) / 2 for indices in itertools.combinations(range(n1 + n2), n2)]
+        return sum(split >= u - 1e-9 for split in splits) / len(splits)
+
+    n = n1 + n2
+    ties = sum(count ** 3 - count for count in (pooled.count(rank) for rank in set(pooled)))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    if sigma == 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / sigma
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(baseline: dict, candidate: dict, threshold: float, alpha: float) -> list[str]:
+    # Print a row for each size, phase and metric in both files, and return the regressions.
+    regressions = []
+    candidates = {json.dumps(result["size"], sort_keys=True): result for result in candidate["results"]}
+    print(f"{'scale':<10}{'phase':<20}{'metric':<13}{'baseline':>12}{'candidate':>12}{'change':>9}{'p':>8}")
+
+    for old in baseline["results"]:
+        new = candidates.get(json.dumps(old["size"], sort_keys=True))
+        if new is None:
+            print(f"size {old['size']} is only in the baseline, skipping it")
+            continue
+
+        for phase in old["phases"]:
+            if phase not in new["phases"]:
+                continue
+            for metric in METRICS:
+                old_samples, new_samples = old["phases"][phase][metric], new["phases"][phase][metric]
+                old_median, new_median = statistics.median(old_samples), statistics.median(new_samples)
+                if not old_median:
+                    continue
+
+                change = new_median / old_median - 1
+                p = mann_whitney(old_samples, new_samples)
+                regressed = change > threshold and p <= alpha
+                print(f"{old['scale']:<10}{phase:<20}{metric:<13}{old_median:>12.4g}{new_median:>12.4g}{change:>+8.1%}{p:>8.3f}{'  REGRESSION' if regressed else ''}")
+                if regressed:
+                    regressions.append(f"{phase} {metric} at scale {old['scale']}: {change:+.1%} (p = {p:.3f})")
+    return regressions
+
+
+def main(baseline_path: str, candidate_path: str, threshold: float, alpha: float) -> int:
+    baseline, candidate = json.load(open(baseline_path)), json.load(open(candidate_path))
+    if baseline["machine"] != candidate["machine"]:
+        print(f"warning: the results are from different machines ({baseline['machine']} and {candidate['machine']})")
+    if 1 / math.comb(baseline["repeats"] + candidate["repeats"], candidate["repeats"]) > alpha:
+        print(f"warning: too few repeats ({baseline['repeats']} and {candidate['repeats']}) for any change to be significant at {alpha}")
+
+    regressions = compare(baseline, candidate, threshold, alpha)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nno regressions over {threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two runs of tst/bench_compiler.py, and fail on regressions.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="smallest relative slowdown (or memory increase) that fails")
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance level of the Mann-Whitney U test")
+    args = parser.parse_args()
+    sys.exit(main(args.baseline, args.candidate, args.threshold, args.alpha))
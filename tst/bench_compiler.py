@@ -0,0 +1,173 @@
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Benchmark the compiler itself on generated programs of increasing size, and write the time and peak memory of each
+# phase (see TimeReport) for every run to a JSON file, to track how each phase scales with the size of the program, ie
+# the parse time against the number of tokens. Run from the directory containing the ".\TestCode\" folder (with the std
+# library in it), as for the compiler itself:
+#   python tst/bench_compiler.py [--scales 1,2,4] [--scaled modules,classes] [--repeats 3] [--output file] [sizes]
+# The sizes set the size of the smallest program, and the sizes listed in "--scaled" are multiplied by each scale.
+# Each run compiles the program in a fresh process, in a temporary copy of the test code, so the object cache and the
+# compiler's class attributes don't carry over between runs. Tracing the memory slows the compiler down, so each repeat
+# is two runs: one for the times, and one for the peak memory. Two result files can be compared with
+# tst/bench_compare.py.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = ".\\TestCode\\"
+SIZES = ["modules", "classes", "overloads", "depth", "generics"]
+
+
+def generate_expression(depth: int) -> str:
+    # A chain of operator calls, nested on the right, so each right-hand operand is a temporary that is moved once, and
+    # the parameter is only borrowed. The literal is innermost, so constant folding can't fold any of the chain.
+    operators = ["+", "*", "-"]
+    expression = "1"
+    for i in range(depth):
+        expression = f"a {operators[i % len(operators)]} ({expression})"
+    return expression
+
+
+def generate_module(name: str, size: dict) -> str:
+    # Each module has its own classes, a generic function instantiated with up to "generics" different types (the std
+    # types and the module's classes), and functions with "overloads" overloads each (one per number of parameters),
+    # which are all called from the module's "run" function. There is one function per class, so the number of
+    # functions grows with the number of classes too.
+    classes = [f"C{i}" for i in range(size["classes"])]
+    code = [f"mod {name}\n"]
+    for cls in classes:
+        code.append(f"cls {cls} {{\n    x: std.Num\n    y: std.Num\n}}\n")
+    code.append("fn ident[T](a: T) -> T {\n    ret a\n}\n")
+
+    for i in range(len(classes)):
+        for k in range(size["overloads"]):
+            parameters = ", ".join(["a: std.Num"] + [f"p{j}: std.Num" for j in range(k)])
+            code.append(f"fn f{i}({parameters}) -> std.Num {{\n    ret {generate_expression(size['depth'])}\n}}\n")
+
+    values = ["1", "true"] + [f"{cls} {{ x = 1, y = 2 }}" for cls in classes]
+    calls = [f"    ident({value})" for value in values[:size["generics"]]]
+    for i in range(len(classes)):
+        calls += [f"    f{i}({', '.join(['1'] * (k + 1))})" for k in range(size["overloads"])]
+    code.append("fn run() -> std.Void {\n" + "\n".join(calls) + "\n}\n")
+    return "\n".join(code)
+
+
+def generate_program(size: dict) -> dict[str, str]:
+    # The program's files, by their path under the test code folder. The main module is one of the modules. A module's
+    # members are in the scope of its parent, so each module is in its own folder, ie "m1.m1" (as for "std.std"). Only
+    # the modules that the main module references are loaded, so "main" has a function taking a class of each of the
+    # other modules (initializing a struct of another module's class isn't supported yet).
+    uses = [f"fn take{i}(c: m{i}.C0) -> std.Num {{\n    ret 1\n}}\n" for i in range(1, size["modules"]) if size["classes"]]
+    files = {"main.spp": generate_module("main", size) + "\n" + "".join(uses) + "\nfn main() -> std.Void {\n}\n"}
+    for i in range(1, size["modules"]):
+        files[f"m{i}\\m{i}.spp"] = generate_module(f"m{i}.m{i}", size)
+    return files
+
+
+def write_file(tmp: str, path: str, code: str):
+    path = os.path.join(tmp, ROOT + path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "w").write(code)
+
+
+def measure(size: dict, trace_memory: bool):
+    # Runs in the child process: generate the program into a temporary copy of the test code, compile it with the time
+    # report enabled, and print the totals of each phase, and the size of the program, as JSON.
+    sys.path.insert(0, REPO_ROOT)
+    from src.Compiler.Compiler import Compiler, CompilerOptions
+    from src.Compiler.TimeReport import TimeReport
+    from src.LexicalAnalysis.Lexer import Lexer
+
+    TimeReport.TRACE_MEMORY = trace_memory
+
+    files = generate_program(size)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(ROOT, os.path.join(tmp, ROOT), ignore=shutil.ignore_patterns("main.spp"))
+        for path, code in files.items():
+            write_file(tmp, path, code)
+        os.makedirs(os.path.join(tmp, "_out"))
+        os.chdir(tmp)
+
+        try:
+            Compiler(files["main.spp"], ROOT + "main.spp", CompilerOptions(time_report=True))
+            totals = json.load(open("_out/time_report.json"))["totals"]
+        finally:
+            os.chdir(cwd)
+
+    tokens = sum(len(Lexer(code).lex()) for code in files.values())
+    lines = sum(code.count("\n") for code in files.values())
+    print(json.dumps({"tokens": tokens, "lines": lines, "phases": totals}))
+
+
+def run(size: dict, trace_memory: bool) -> dict:
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", json.dumps(size), str(int(trace_memory))], capture_output=True, text=True)
+    if out.returncode:
+        raise SystemExit(f"Compiling the program of size {size} failed:\n{out.stdout}{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def scaling(results: list[dict], phase: str) -> float:
+    # The exponent of the phase's (median) time against the number of tokens, between the smallest and the largest
+    # programs: 1 is linear, and anything much higher is superlinear.
+    first, last = results[0], results[-1]
+    if phase not in first["phases"] or phase not in last["phases"] or last["tokens"] == first["tokens"]:
+        return math.nan
+    return math.log(statistics.median(last["phases"][phase]["wall"]) / statistics.median(first["phases"][phase]["wall"])) / math.log(last["tokens"] / first["tokens"])
+
+
+def main(base: dict, scales: list[int], scaled: list[str], repeats: int, output: str):
+    results = []
+    for scale in scales:
+        size = {key: value * scale if key in scaled else value for key, value in base.items()}
+        result = {"scale": scale, "size": size, "phases": {}, "total": []}
+        for _ in range(repeats):
+            sample, memory = run(size, False), run(size, True)
+            result["tokens"], result["lines"] = sample["tokens"], sample["lines"]
+            for phase, total in sample["phases"].items():
+                samples = result["phases"].setdefault(phase, {"wall": [], "cpu": [], "peak_memory": []})
+                samples["wall"].append(total["wall"])
+                samples["cpu"].append(total["cpu"])
+                samples["peak_memory"].append(memory["phases"][phase]["peak_memory"])
+            result["total"].append(sum(total["wall"] for total in sample["phases"].values()))
+        results.append(result)
+
+        parse = statistics.median(result["phases"]["parse"]["wall"])
+        print(f"scale {scale}: {result['tokens']} tokens, {result['lines']} lines, parse {parse:.3f}s ({parse / result['tokens'] * 1e6:.1f}us/token), total {statistics.median(result['total']):.3f}s")
+
+    phases = list(dict.fromkeys(phase for result in results for phase in result["phases"]))
+    exponents = {phase: scaling(results, phase) for phase in phases}
+    for phase, exponent in exponents.items():
+        print(f"{phase:<20} time ~ tokens^{exponent:.2f}{'  (superlinear)' if exponent > 1.2 else ''}")
+
+    json.dump({
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor()},
+        "base": base, "scales": scales, "scaled": scaled, "repeats": repeats, "results": results,
+        "scaling": {phase: None if math.isnan(exponent) else exponent for phase, exponent in exponents.items()}}, open(output, "w"), indent=4)
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(json.loads(sys.argv[2]), sys.argv[3] == "1")
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Benchmark the compiler's phases on generated programs of increasing size.")
+    parser.add_argument("--modules", type=int, default=2, help="number of modules, including the main module")
+    parser.add_argument("--classes", type=int, default=4, help="number of classes (and functions) in each module")
+    parser.add_argument("--overloads", type=int, default=2, help="number of overloads of each function")
+    parser.add_argument("--depth", type=int, default=4, help="depth of the expression in each function")
+    parser.add_argument("--generics", type=int, default=2, help="number of instantiations of the generic function in each module, up to classes + 2")
+    parser.add_argument("--scales", default="1,2,4", help="comma separated multipliers of the sizes")
+    parser.add_argument("--scaled", default="modules,classes", help="comma separated sizes that are multiplied by the scales")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default="bench_compiler.json")
+    args = parser.parse_args()
+    main({key: getattr(args, key) for key in SIZES}, [int(scale) for scale in args.scales.split(",")], args.scaled.split(","), args.repeats, args.output)
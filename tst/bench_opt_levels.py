@@ -0,0 +1,154 @@
+import ctypes
+import os
+import statistics
+import sys
+import time
+
+from bench_codegen import REPO_ROOT, compile_program
+
+# Benchmark the "-O" levels on a suite of numeric S++ kernels: for each level, the time to optimise and compile the main
+# module to machine code (with MCJIT), and the run time of each kernel. Run from the directory containing the
+# ".\TestCode\" folder (with the std library in it), as for the compiler itself:
+#   python tst/bench_opt_levels.py [loop iterations] [repeats]
+# Array literals aren't lowered by the code generator yet, so the streaming kernel streams over an index range.
+
+PROGRAM = """mod main
+
+fn triangle(n: std.Num) -> std.Num {
+    let mut total = 0
+    let mut i = 0
+    while i < n {
+        let j = i + 0
+        total = i * j + total
+        i = i + 1
+    }
+    ret total
+}
+
+fn poly(x: std.Num) -> std.Num {
+    ret x * (x * (x * 3 + 2) + 1) + 5
+}
+
+fn horner(n: std.Num) -> std.Num {
+    let mut total = 0
+    let mut i = 0
+    while i < n {
+        total = poly(i + 0) + total
+        i = i + 1
+    }
+    ret total
+}
+
+fn nested(n: std.Num) -> std.Num {
+    let mut total = 0
+    let mut i = 0
+    while i < n {
+        let mut j = 0
+        while j < i + 0 {
+            total = j + total
+            j = j + 1
+        }
+        i = i + 1
+    }
+    ret total
+}
+
+fn stream(n: std.Num) -> std.Num {
+    let mut acc = 0
+    let mut i = 0
+    while i < n {
+        acc = acc * 0.5 + (i + 0)
+        i = i + 1
+    }
+    ret acc
+}
+
+fn main() -> std.Void {
+}
+"""
+
+def triangle(n: float) -> float:
+    total, i = 0.0, 0.0
+    while i < n:
+        total = i * i + total
+        i = i + 1
+    return total
+
+
+def horner(n: float) -> float:
+    total, i = 0.0, 0.0
+    while i < n:
+        total = i * (i * (i * 3 + 2) + 1) + 5 + total
+        i = i + 1
+    return total
+
+
+def nested(n: float) -> float:
+    total, i = 0.0, 0.0
+    while i < n:
+        j = 0.0
+        while j < i:
+            total = j + total
+            j = j + 1
+        i = i + 1
+    return total
+
+
+def stream(n: float) -> float:
+    acc, i = 0.0, 0.0
+    while i < n:
+        acc = acc * 0.5 + i
+        i = i + 1
+    return acc
+
+
+# Each kernel, with the size of its input relative to the number of loop iterations given (the nested kernel is
+# quadratic), and the equivalent Python, which the results at every level are checked against.
+KERNELS = {
+    "triangle": (1.0, triangle),
+    "horner": (1.0, horner),
+    "nested": (0.001, nested),
+    "stream": (1.0, stream),
+}
+
+
+def main(n: int, repeats: int):
+    sys.path.insert(0, REPO_ROOT)
+    import llvmlite.binding as llvm
+    from src.CodeGen.CodeGen import CodeGen
+
+    ir = compile_program(PROGRAM)
+    llvm.initialize_native_asmparser()
+    expected = {kernel: python(float(int(n * scale))) for kernel, (scale, python) in KERNELS.items()}
+
+    print(f"{n} iterations, {repeats} repeats")
+    print(f"{'level':<6}{'compile':>10}" + "".join(f"{kernel:>12}" for kernel in KERNELS))
+    for opt_level in CodeGen.OPT_LEVELS:
+        # The compile time covers parsing the IR, the optimisation pipeline, and generating the machine code.
+        compile_times = []
+        engine = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            llvm_module = llvm.parse_assembly(ir)
+            CodeGen.optimise(llvm_module, opt_level)
+            engine = llvm.create_mcjit_compiler(llvm_module, CodeGen.create_target_machine(opt_level))
+            engine.finalize_object()
+            compile_times.append(time.perf_counter() - start)
+
+        run_times = []
+        for kernel, (scale, _) in KERNELS.items():
+            function = ctypes.CFUNCTYPE(ctypes.c_double, ctypes.c_double)(engine.get_function_address(f"main.{kernel}#0"))
+            size = float(int(n * scale))
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                result = function(size)
+                times.append(time.perf_counter() - start)
+            run_times.append(statistics.median(times))
+            assert result == expected[kernel], (kernel, opt_level, result, expected[kernel])
+
+        print(f"-O{opt_level:<4}{statistics.median(compile_times):>9.4f}s" + "".join(f"{t:>11.4f}s" for t in run_times))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000000, int(sys.argv[2]) if len(sys.argv) > 2 else 5)
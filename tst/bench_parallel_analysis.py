@@ -0,0 +1,89 @@
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmark the parallel analysis of function bodies (SemanticAnalysis.JOBS) on a generated module with many functions.
+# Run from the directory containing the ".\TestCode\" folder (with the std library in it), as for the compiler itself:
+#   python tst/bench_parallel_analysis.py [number of functions] [repeats]
+# Each measurement runs in a fresh process, as the compiler keeps state in class attributes between compilations.
+#
+# Results for 500 functions and 3 repeats, on a machine with a single CPU, so only the overhead of the workers shows:
+#   jobs=1: median 28.573s, min 25.770s, speedup 1.00x
+#   jobs=2: median 28.937s, min 28.141s, speedup 0.99x
+#   jobs=4: median 26.726s, min 24.196s, speedup 1.07x
+#   jobs=8: median 31.151s, min 27.681s, speedup 0.92x
+# Only the function bodies are analysed in parallel, which is 31% of the time of the symbol generation and analysis of
+# this module (7.3s of 23.4s, timed in a single process), so the speed-up is at most 1.45x with any number of CPUs.
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = ".\\TestCode\\"
+JOBS = [1, 2, 4, 8]
+
+
+def generate_module(num_functions: int) -> str:
+    # Every function does some operator calls, and then calls a common function, so that the bodies exercise the
+    # overload resolution and the memory checks. Each right-hand operand is moved, so is only used once.
+    code = ["mod main\n", "fn base(x: std.Num, y: std.Num) -> std.Num {\n    ret x + y\n}\n"]
+    for i in range(num_functions):
+        code.append(
+            f"fn f{i}(a: std.Num, b: std.Num, c: std.Num, d: std.Num, e: std.Num, g: std.Num) -> std.Num {{\n"
+            f"    a + b\n"
+            f"    a < c\n"
+            f"    a + d\n"
+            f"    ret base(e, g)\n"
+            f"}}\n")
+    code.append("fn main() -> std.Void {\n}\n")
+    return "\n".join(code)
+
+
+def measure(jobs: int):
+    # Runs in the child process: parse the generated module, and time the symbol generation and semantic analysis.
+    sys.path.insert(0, REPO_ROOT)
+    from src.LexicalAnalysis.Lexer import Lexer
+    from src.SyntacticAnalysis.Parser import Parser
+    from src.SemanticAnalysis2.SemanticAnalysis import SemanticAnalysis
+    from src.SemanticAnalysis2.SymbolGeneration import SymbolGeneration
+
+    tokens = Lexer(open(ROOT + "main.spp").read()).lex()
+    ast = Parser(tokens, ROOT + "main.spp").parse()
+    SemanticAnalysis.JOBS = jobs
+
+    start = time.perf_counter()
+    SymbolGeneration.generate(ast, tokens)
+    print(time.perf_counter() - start)
+
+
+def main(num_functions: int, repeats: int):
+    # Copy the test code into a temporary directory, and replace the main module with the generated one, so the real
+    # main module isn't overwritten.
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copytree(ROOT, os.path.join(tmp, ROOT), ignore=shutil.ignore_patterns("main.spp"))
+        open(os.path.join(tmp, ROOT, "main.spp"), "w").write(generate_module(num_functions))
+        os.chdir(tmp)
+
+        try:
+            print(f"{num_functions} functions, {repeats} repeats")
+            baseline = None
+            for jobs in JOBS:
+                times = []
+                for _ in range(repeats):
+                    out = subprocess.run([sys.executable, os.path.abspath(os.path.join(cwd, __file__)), "--measure", str(jobs)], capture_output=True, text=True, check=True)
+                    times.append(float(out.stdout.strip().splitlines()[-1]))
+
+                median = statistics.median(times)
+                baseline = baseline or median
+                print(f"jobs={jobs}: median {median:.3f}s, min {min(times):.3f}s, speedup {baseline / median:.2f}x")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--measure"]:
+        measure(int(sys.argv[2]))
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, int(sys.argv[2]) if len(sys.argv) > 2 else 3)
@@ -0,0 +1,105 @@
+import ctypes
+import statistics
+import sys
+import time
+
+from bench_codegen import REPO_ROOT, compile_program
+
+# Benchmark passing structs between functions: moved structs passed by pointer (CodeGen.MOVE_BY_POINTER), against
+# copying them into each call, at each "-O" level. Every iteration of the kernel builds structs, moves them into
+# functions, and borrows them. Run from the directory containing the ".\TestCode\" folder (with the std library in it),
+# as for the compiler itself:
+#   python tst/bench_struct_passing.py [loop iterations] [repeats]
+
+PROGRAM = """mod main
+
+cls Vec3 {
+    x: std.Num
+    y: std.Num
+    z: std.Num
+}
+
+fn make(x: std.Num, y: std.Num, z: std.Num) -> Vec3 {
+    ret Vec3 { x = x, y = y, z = z }
+}
+
+fn sum(v: Vec3) -> std.Num {
+    ret v.x + (v.y + (v.z + 0))
+}
+
+fn scale(v: Vec3, k: std.Num) -> Vec3 {
+    ret Vec3 { x = v.x * (k + 0), y = v.y * (k + 0), z = v.z * k }
+}
+
+fn dot(a: &Vec3, b: &Vec3) -> std.Num {
+    ret a.x * (b.x + 0) + (a.y * (b.y + 0) + a.z * (b.z + 0))
+}
+
+fn kernel(n: std.Num) -> std.Num {
+    let mut total = 0
+    let mut i = 0
+    while i < n {
+        let v = make(i + 0, 1, 2)
+        let w = scale(v, 0.5)
+        let u = make(1, 2, 3)
+        total = dot(&w, &u) + total
+        total = sum(w) + total
+        i = i + 1
+    }
+    ret total
+}
+
+fn main() -> std.Void {
+}
+"""
+
+
+def kernel(n: float) -> float:
+    total, i = 0.0, 0.0
+    while i < n:
+        v = (i, 1.0, 2.0)
+        w = (v[0] * 0.5, v[1] * 0.5, v[2] * 0.5)
+        u = (1.0, 2.0, 3.0)
+        total = w[0] * u[0] + (w[1] * u[1] + w[2] * u[2]) + total
+        total = w[0] + (w[1] + w[2]) + total
+        i = i + 1
+    return total
+
+
+def main(n: int, repeats: int):
+    sys.path.insert(0, REPO_ROOT)
+    import llvmlite.binding as llvm
+    from src.CodeGen.CodeGen import CodeGen
+
+    llvm.initialize_native_asmparser()
+    expected = kernel(float(n))
+
+    print(f"{n} iterations, {repeats} repeats")
+    print(f"{'level':<6}{'copy':>10}{'move':>10}{'speedup':>10}")
+    irs = {}
+    for move_by_pointer in [False, True]:
+        CodeGen.MOVE_BY_POINTER = move_by_pointer
+        irs[move_by_pointer] = compile_program(PROGRAM)
+
+    for opt_level in CodeGen.OPT_LEVELS:
+        times = {}
+        for move_by_pointer, ir in irs.items():
+            llvm_module = llvm.parse_assembly(ir)
+            CodeGen.optimise(llvm_module, opt_level)
+            engine = llvm.create_mcjit_compiler(llvm_module, CodeGen.create_target_machine(opt_level))
+            engine.finalize_object()
+            function = ctypes.CFUNCTYPE(ctypes.c_double, ctypes.c_double)(engine.get_function_address("main.kernel#0"))
+
+            run_times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                result = function(float(n))
+                run_times.append(time.perf_counter() - start)
+            assert result == expected, (opt_level, move_by_pointer, result, expected)
+            times[move_by_pointer] = statistics.median(run_times)
+
+        print(f"-O{opt_level:<4}{times[False]:>9.4f}s{times[True]:>9.4f}s{times[False] / times[True]:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000, int(sys.argv[2]) if len(sys.argv) > 2 else 5)
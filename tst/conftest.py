@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+# The fixtures shared by the tests. Run from the repository root:
+#   python -m pytest tst
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from src.CodeGen.CodeGen import CodeGen, CompiledModule
+from src.LexicalAnalysis.Lexer import Lexer
+from src.SemanticAnalysis2.ModuleTree import ModuleTree
+from src.SemanticAnalysis2.Semantics import Semantics
+from src.SyntacticAnalysis import Ast
+from src.SyntacticAnalysis.Parser import Parser
+
+# The parts of the std module that the tests' programs use.
+STD = """mod std.std
+
+cls Void {}
+cls Bool {}
+cls Str {}
+cls Num {}
+cls FnRef[R, ...Args] {}
+cls FnMut[R, ...Args] {}
+cls FnOne[R, ...Args] {}
+
+sup Num {
+    fn add(&self, other: std.Num) -> std.Num {}
+    fn sub(&self, other: std.Num) -> std.Num {}
+    fn mul(&self, other: std.Num) -> std.Num {}
+    fn div(&self, other: std.Num) -> std.Num {}
+    fn rem(&self, other: std.Num) -> std.Num {}
+    fn eq(&self, other: std.Num) -> std.Bool {}
+    fn lt(&self, other: std.Num) -> std.Bool {}
+    fn le(&self, other: std.Num) -> std.Bool {}
+    fn gt(&self, other: std.Num) -> std.Bool {}
+    fn ge(&self, other: std.Num) -> std.Bool {}
+}
+"""
+
+
+class Program:
+    # Writes a program's modules (the std module and "main.spp", keyed by their path under the module tree's root) to
+    # the test's folder, and compiles it in stages.
+    def __init__(self, files: dict[str, str]):
+        self.files = {"std\\std.spp": STD} | files
+
+        # The compiler opens the files by their Windows-style paths, and finds the modules by walking the root, so on
+        # other systems each file is written both to the root folder and to the file named by its full path.
+        for path, code in self.files.items():
+            for file_path in {ModuleTree.ROOT + path, os.path.join(ModuleTree.ROOT, path)}:
+                if os.path.dirname(file_path):
+                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, "w") as file:
+                    file.write(code)
+
+    def analyse(self) -> Semantics:
+        tokens = Lexer(self.files["main.spp"]).lex()
+        return Semantics(Parser(tokens, ModuleTree.ROOT + "main.spp").parse(), tokens)
+
+    def compile(self, opt_level: int = 0) -> list[CompiledModule]:
+        semantics = self.analyse()
+        return CodeGen.compile(semantics.modules, semantics.scope_handler, opt_level, emit_objects=False)
+
+
+@pytest.fixture
+def parse():
+    def parse(code: str) -> Ast.ProgramAst:
+        return Parser(Lexer(code).lex(), "test.spp").parse()
+    return parse
+
+
+@pytest.fixture
+def program(tmp_path, monkeypatch):
+    # The compiler writes its outputs to "_out/", relative to the working directory.
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("_out")
+    return Program
@@ -0,0 +1,34 @@
+import pytest
+
+import bench_compare
+
+# The p-values of the one-sided Mann-Whitney U test that tst/bench_compare.py flags regressions with, against values
+# worked out by hand.
+
+
+def test_exact_separated():
+    # Of the 20 ways of splitting 6 samples into two groups of 3, only one puts the 3 largest in the candidate.
+    assert bench_compare.mann_whitney([1, 2, 3], [4, 5, 6]) == pytest.approx(1 / 20)
+    assert bench_compare.mann_whitney([4, 5, 6], [1, 2, 3]) == pytest.approx(1)
+
+
+def test_exact_identical():
+    # U = 4.5 (the 3 ties count a half each), and 14 of the 20 splits have a U of at least 4.5.
+    assert bench_compare.mann_whitney([1, 2, 3], [1, 2, 3]) == pytest.approx(14 / 20)
+    assert bench_compare.mann_whitney([1, 1, 1], [1, 1, 1]) == pytest.approx(1)
+
+
+def test_normal_approximation():
+    # 184756 splits, so the normal approximation is used: U = 90 of the 100 pairs, with a mean of 50 and a standard
+    # deviation of sqrt(10 * 10 * 21 / 12), so with the continuity correction, z = 39.5 / sqrt(175) = 2.986.
+    baseline = list(range(10))
+    candidate = [x + 0.5 for x in range(5, 15)]
+    assert bench_compare.mann_whitney(baseline, candidate) == pytest.approx(0.0014136, rel=1e-4)
+
+
+def test_normal_approximation_close_to_exact(monkeypatch):
+    baseline = list(range(8))
+    candidate = [x + 0.5 for x in range(2, 10)]
+    exact = bench_compare.mann_whitney(baseline, candidate)
+    monkeypatch.setattr(bench_compare, "MAX_EXACT_SPLITS", 0)
+    assert bench_compare.mann_whitney(baseline, candidate) == pytest.approx(exact, abs=1e-3)
@@ -0,0 +1,54 @@
+from src.SemanticAnalysis2.TypeInference import TypeInfer
+
+# The cached binary operator overloads (TypeInfer.resolve_binary_operator) must be the ones that the full function call
+# resolution selects. With CHECK_BINARY_OPERATORS on, every overload resolved directly is compared against the full
+# resolution, which fails the analysis on a mismatch.
+
+MAIN = """mod main
+
+cls Point {
+    x: std.Num
+    y: std.Num
+}
+
+sup Point {
+    fn add(&self, other: std.Num) -> std.Num {
+        ret other * 2
+    }
+    fn add(&self, other: Point) -> Point {
+        ret other
+    }
+    fn lt(&self, other: Point) -> std.Bool {
+        ret other.x * 2 < other.y * 3
+    }
+}
+
+fn poly(a: std.Num, b: std.Num, c: std.Num) -> std.Num {
+    let d = a * 2 - b / 3 + c % 4
+    ret (d + 1) * (a - 2) / (d - a)
+}
+
+fn compare(a: std.Num, b: std.Num) -> std.Bool {
+    ret a <= b
+}
+
+fn points(a: std.Num, b: std.Num) -> std.Num {
+    let p = Point { x = a, y = b }
+    let q = Point { x = 1, y = 2 }
+    let sum = p + q
+    ret sum + 1
+}
+
+fn main() -> std.Void {
+}
+"""
+
+
+def test_cache_agrees_with_full_resolution(program, monkeypatch):
+    monkeypatch.setattr(TypeInfer, "CHECK_BINARY_OPERATORS", True)
+    program({"main.spp": MAIN}).analyse()
+
+    # Every operator was resolved directly, so the checks above covered all of them.
+    resolved = [key for key, overload in TypeInfer.BINARY_OPERATORS.items() if overload]
+    assert {(str(key[2]), str(key[5])) for key in resolved} >= {("std.Num", "std.Num"), ("Point", "Point"), ("Point", "std.Num")}
+    assert all(TypeInfer.BINARY_OPERATORS.values())
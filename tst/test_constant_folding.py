@@ -0,0 +1,58 @@
+import pytest
+
+from src.CodeGen.ConstantFolding import ConstantFolding
+from src.SyntacticAnalysis import Ast
+
+# The values of the expressions folded by ConstantFolding, which must be the values that the generated instructions
+# compute, and the expressions that are left for the code generator.
+
+
+@pytest.fixture
+def fold(parse, monkeypatch):
+    monkeypatch.setattr(ConstantFolding, "FOLDED", {"main": 0})
+    monkeypatch.setattr(ConstantFolding, "MODULE", "main")
+
+    def fold(expression: str) -> Ast.ExpressionAst:
+        function = parse(f"mod main\nfn f() -> std.Num {{\n    ret {expression}\n}}\n").module.body.members[0]
+        return ConstantFolding.fold_expression(function.body.statements[0].value)
+    return fold
+
+
+@pytest.mark.parametrize("expression, value", [
+    ("1 + 2 * 3", 7.0),
+    ("10 - 4 / 8", 9.5),
+    ("7 % 3", 1.0),
+    ("-7 % 3", -1.0),
+    ("1.5 + 0.25", 1.75),
+    ("0x10 + 0b11", 19.0),
+    ("0.1 + 0.2", 0.1 + 0.2),
+    ("1 < 2", True),
+    ("2 <= 1", False),
+    ("1 + 1 == 2", True),
+    ("true && false", False),
+    ("false || true", True),
+])
+def test_folded(fold, expression, value):
+    folded = fold(expression)
+    assert isinstance(folded, Ast.NumberLiteralBase10Ast | Ast.BoolLiteralAst)
+    assert ConstantFolding.literal_value(folded) == value
+    # Every operator is folded, and each is surrounded by spaces.
+    assert ConstantFolding.FOLDED["main"] == expression.count(" ") // 2
+
+
+@pytest.mark.parametrize("expression", [
+    "1 / 0",
+    "1 % 0",
+    "1" + "0" * 308 + " * 10",
+    "1 == true",
+    "a + 1",
+])
+def test_not_folded(fold, expression):
+    assert isinstance(fold(expression), Ast.BinaryExpressionAst)
+    assert ConstantFolding.FOLDED["main"] == 0
+
+
+@pytest.mark.parametrize("value", [0.1, 1 / 3, -2.5e-10, 1e300, 123456789.0, -0.0])
+def test_literal_round_trip(value):
+    literal = ConstantFolding.number_literal(value, 0)
+    assert repr(ConstantFolding.literal_value(literal)) == repr(value)
@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+
+from src.Compiler.Compiler import Compiler, CompilerOptions
+from src.Compiler.Dump import Dump
+from src.Compiler.LookupStats import LookupStats
+from src.Compiler.Profiler import Profiler
+from src.Compiler.Trace import Trace
+from src.SemanticAnalysis2.ModuleTree import ModuleTree
+from src.SemanticAnalysis2.SymbolTable import Scope
+
+# The artefacts dumped by the compiler (the streamed JSON must be valid), and the instrumentation being stopped when the
+# compilation fails.
+
+MAIN = """mod main
+
+cls Point {
+    x: std.Num
+    y: std.Num
+}
+
+fn sum(p: Point) -> std.Num {
+    ret p.x + p.y
+}
+
+fn main() -> std.Void {
+}
+"""
+
+REPORTS = ["modules.txt", "pass_timings.txt", "folding.txt", "monomorphisation.txt", "dispatch.txt", "escape.txt"]
+
+
+def test_json_dumps(program):
+    program({"main.spp": MAIN})
+    Compiler(MAIN, ModuleTree.ROOT + "main.spp", CompilerOptions(dump=Dump.ARTEFACTS))
+
+    ast = json.load(open("_out/ast.json"))
+    assert ast["node"] == "ProgramAst"
+    assert ast["module"]["node"] == "ModulePrototypeAst"
+
+    symbols = json.load(open("_out/symbol_table.json"))
+    assert symbols["parent"] is None
+    assert {"id", "name", "symbols", "sup-scopes", "children"} <= symbols.keys()
+    assert symbols["children"] and all(child["parent"] == symbols["id"] for child in symbols["children"])
+
+    for file in REPORTS + ["main.ll", "main.opt.ll", "main.o", "tokens.txt", "new_code.spp"]:
+        assert os.path.exists(f"_out/{file}"), file
+    assert not Dump.ENABLED
+
+
+def test_no_dumps(program):
+    program({"main.spp": MAIN})
+    Compiler(MAIN, ModuleTree.ROOT + "main.spp")
+    assert sorted(file for file in os.listdir("_out") if file != "cache") == ["main.o", "std.std.o"]
+
+
+def test_instrumentation_stopped_on_error(program):
+    code = MAIN.replace("ret p.x + p.y", "ret q")
+    program({"main.spp": code})
+    get_symbol = Scope.get_symbol
+    options = CompilerOptions(trace=True, profile="counter", lookup_stats=True, dump=["ast"])
+    with pytest.raises(SystemExit):
+        Compiler(code, ModuleTree.ROOT + "main.spp", options)
+
+    assert Scope.get_symbol is get_symbol and not LookupStats.ENABLED
+    assert not Profiler.REPLACED and not Trace.ENABLED and not Dump.ENABLED
@@ -0,0 +1,79 @@
+import re
+
+from src.CodeGen.CodeGen import CodeGen
+from src.SemanticAnalysis2.SemanticAnalysis import SemanticAnalysis
+from src.SyntacticAnalysis import Ast
+
+# The objects that escape their function (EscapeAnalysis), which are built as values, and the ones that don't, which are
+# constructed in place in their variable's stack slot (CodeGen.generate_postfix_struct_initializer_into).
+
+MAIN = """mod main
+
+cls Point {
+    x: std.Num
+    y: std.Num
+}
+
+cls Line {
+    a: Point
+}
+
+fn take(p: Point) -> std.Num {
+    ret 1
+}
+
+fn returned(a: std.Num) -> Point {
+    ret Point { x = a, y = 1 }
+}
+
+fn bound(a: std.Num) -> Point {
+    let p = Point { x = a, y = 1 }
+    ret p
+}
+
+fn written(l: &mut Line, a: std.Num) -> std.Void {
+    l.a = Point { x = a, y = 1 }
+}
+
+fn local(a: std.Num) -> std.Num {
+    let p = Point { x = a, y = 2 }
+    ret take(p)
+}
+
+fn main() -> std.Void {
+    let a = local(1)
+    let b = local(2)
+    let c = returned(3)
+}
+"""
+
+
+def escapes() -> dict[str, list[bool]]:
+    # Whether each object created in each function of the main module escapes, by the function's name.
+    return {
+        CodeGen.FUNCTION_NAMES[key].removeprefix("main.").split("#")[0]: [
+            getattr(node, "_escapes") for node in SemanticAnalysis.function_nodes(fn_proto) if isinstance(node, Ast.PostfixStructInitializerAst)]
+        for key, (module, fn_proto) in CodeGen.FUNCTIONS.items() if module == "main"}
+
+
+def test_escapes(program):
+    program({"main.spp": MAIN}).compile()
+    assert escapes() == {"take": [], "returned": [True], "bound": [True], "written": [True], "local": [False], "main": []}
+
+
+def test_constructed_in_place(program):
+    [main] = [module for module in program({"main.spp": MAIN}).compile() if module.name == "main"]
+    body = main.ir.split('@"main.local#0"')[1].split("\n}")[0]
+    assert '%"p" = alloca %"Point"' in body and "insertvalue" not in body
+
+    # Each field is stored through a pointer to it in the variable's slot.
+    for index in [0, 1]:
+        gep = re.search(rf'(%"\.\d+") = getelementptr %"Point", %"Point"\* %"p", i32 0, i32 {index}', body)
+        assert gep and re.search(rf"store double .*, double\* {re.escape(gep.group(1))}\n", body)
+
+
+def test_count_allocations(program, monkeypatch):
+    monkeypatch.setattr(CodeGen, "COUNT_ALLOCATIONS", True)
+    modules = program({"main.spp": MAIN}).compile()
+    assert CodeGen.run(modules, 0) == 0
+    assert "Module main: 2 objects created on the stack, 1 escaping\n" in CodeGen.allocation_report(modules, 0)
@@ -0,0 +1,74 @@
+import pytest
+
+from src.Compiler.LookupStats import LookupStats
+from src.SemanticAnalysis2.SymbolTable import Scope, SymbolTypes
+from src.SyntacticAnalysis import Ast
+
+# The sup-scopes that LookupStats counts for each lookup must be the ones that the lookup merges. The sup-scopes of
+# every scope are replaced with lists that count their iterations, which is how the lookups merge them, and each lookup
+# is made from every scope.
+
+MAIN = """mod main
+
+cls Point {
+    x: std.Num
+}
+
+sup Point {
+    fn f(&self) -> std.Num {
+        ret self.x
+    }
+}
+
+fn main() -> std.Void {
+}
+"""
+
+NAMES = [
+    (Ast.IdentifierAst("self", 0), SymbolTypes.VariableSymbol),
+    (Ast.IdentifierAst("x", 0), SymbolTypes.VariableSymbol),
+    (Ast.IdentifierAst("missing", 0), SymbolTypes.VariableSymbol),
+    (Ast.IdentifierAst("Point", 0), SymbolTypes.TypeSymbol),
+    (Ast.IdentifierAst("std.Num", 0), SymbolTypes.TypeSymbol),
+]
+
+
+class CountingList(list):
+    ITERATED = 0
+
+    def __iter__(self):
+        for item in super().__iter__():
+            CountingList.ITERATED += 1
+            yield item
+
+
+def scopes(scope: Scope) -> list[Scope]:
+    return [scope] + [descendant for child in scope.children for descendant in scopes(child)]
+
+
+@pytest.fixture
+def lookup_stats():
+    LookupStats.start()
+    yield
+    LookupStats.stop()
+
+
+@pytest.mark.parametrize("kind", ["get_symbol", "get_symbol_exclusive", "has_symbol", "has_symbol_exclusive"])
+def test_sup_scopes_merged(program, lookup_stats, kind):
+    all_scopes = scopes(program({"main.spp": MAIN}).analyse().scope_handler.global_scope)
+    for scope in all_scopes:
+        scope.sup_scopes = CountingList(scope.sup_scopes)
+    assert any(scope.sup_scopes for scope in all_scopes)
+
+    for scope in all_scopes:
+        for name, symbol_type in NAMES:
+            counted, CountingList.ITERATED = LookupStats.COUNTS[kind]["sup_scopes"], 0
+            getattr(scope, kind)(name, symbol_type, **({} if kind.startswith("has_") else {"error": False}))
+            assert LookupStats.COUNTS[kind]["sup_scopes"] - counted == CountingList.ITERATED, (str(scope.name), str(name))
+
+
+def test_nested_kinds(program, lookup_stats):
+    program({"main.spp": MAIN}).analyse()
+    assert LookupStats.COUNTS["where_to_look"]["calls"]
+    assert "lookups" not in LookupStats.COUNTS["where_to_look"]
+    assert "where_to_look" in LookupStats.report()
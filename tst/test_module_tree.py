@@ -0,0 +1,43 @@
+import pytest
+
+from src.LexicalAnalysis.Lexer import Lexer
+from src.SemanticAnalysis2.ModuleTree import ModuleTree
+
+# The namespaces that a module's code might refer to (ModuleTree.references), and the modules that they load.
+
+
+def test_references():
+    code = "fn f(p: a.b.C, q: m1.D) -> std.Num {\n    ret p.x + q.y.z\n}\n"
+    assert ModuleTree.references(Lexer(code).lex()) == {"a.b", "m1", "std", "p", "q.y"}
+
+
+@pytest.mark.parametrize("name, references, referenced", [
+    ("a.b.m", {"a.b"}, True),
+    ("a.b.m", {"a.b.c"}, True),
+    ("a.b.m", {"a"}, False),
+    ("a.b.m", {"b"}, False),
+    ("a.b.m", {"a.bc"}, False),
+    ("a.b.m", {"x.a.b"}, False),
+    ("m1.m1", {"m1"}, True),
+    ("m1.m1", {"m2"}, False),
+    ("std.io.file", set(), True),
+])
+def test_is_referenced(name, references, referenced):
+    assert ModuleTree.is_referenced(name, references) == referenced
+
+
+def test_not_lazy(monkeypatch):
+    monkeypatch.setattr(ModuleTree, "LAZY", False)
+    assert ModuleTree.is_referenced("a.b.m", set())
+
+
+def test_referenced_file_not_a_module(program):
+    # "m1" is referenced (by a variable's attribute access), but its file isn't a module, so it's skipped.
+    main = "mod main\n\ncls Point {\n    x: std.Num\n}\n\nfn f(m1: Point) -> std.Num {\n    ret m1.x\n}\n\nfn main() -> std.Void {\n}\n"
+    program({"main.spp": main, "m1\\m1.spp": "cls C {}\n", "m2\\m2.spp": "mod m2.m2\n"}).analyse()
+
+    assert "m1.m1" not in ModuleTree.LOADED and "m2.m2" not in ModuleTree.LOADED
+    size, read_time = ModuleTree.SKIPPED["m1.m1"]
+    assert size == len("cls C {}\n") and read_time > 0
+    assert ModuleTree.SKIPPED["m2.m2"] == (len("mod m2.m2\n"), 0.0)
+    assert "m1.m1" in ModuleTree.report() and "read, not a module" in ModuleTree.report()
@@ -0,0 +1,67 @@
+from src.CodeGen.CodeGen import CodeGen
+from src.SemanticAnalysis2.SemanticAnalysis import SemanticAnalysis
+from src.SyntacticAnalysis import Ast
+
+# The instantiations of generic functions (CodeGen.monomorphise): each is generated once, whatever the number of calls
+# requesting it, by the module that declares the generic function, and only declared by the modules calling it.
+
+IDENT = """mod main
+
+fn ident[T](a: T) -> T {
+    ret a
+}
+
+"""
+
+M1 = """mod m1.m1
+
+cls C0 {
+    x: std.Num
+}
+
+sup C0 {
+    fn get[T](&self, a: T) -> T {
+        ret a
+    }
+}
+"""
+
+
+def totals() -> tuple[int, int]:
+    # The numbers of instantiations requested and generated, from the last line of the report.
+    requested, generated = CodeGen.monomorphisation_report().splitlines()[-1].removeprefix("Instantiations: ").split(", ")
+    return int(requested.split()[0]), int(generated.split()[0])
+
+
+def definitions(module, keyword: str) -> list[str]:
+    return [line.split('@"')[1].split('"')[0] for line in module.ir.splitlines() if line.startswith(keyword + " ")]
+
+
+def test_same_instantiation(program):
+    code = IDENT + "fn f(a: std.Num, b: std.Num) -> std.Num {\n    let x = ident(a)\n    let y = ident(b)\n    ret x + y\n}\n"
+    [main] = [module for module in program({"main.spp": code + "\nfn main() -> std.Void {\n}\n"}).compile() if module.name == "main"]
+    assert totals() == (2, 1)
+    assert [name for name in definitions(main, "define") if "ident" in name] == ["main.ident#0[std.Num]"]
+
+    # The calls keep the generic map of the overload the analysis selected, and the type of "x + y" could only be
+    # inferred because the calls' return types were substituted with it.
+    [f] = [proto for key, (module, proto) in CodeGen.FUNCTIONS.items() if CodeGen.FUNCTION_NAMES[key].startswith("main.f#")]
+    calls = [node for node in SemanticAnalysis.function_nodes(f) if isinstance(node, Ast.PostfixFunctionCallAst)]
+    assert [{str(key): str(value) for key, value in call.generic_map.items()} for call in calls] == [{"T": "std.Num"}] * 2
+
+
+def test_different_instantiations(program):
+    code = IDENT + "fn f(a: std.Num) -> std.Num {\n    ret ident(a)\n}\n\nfn g(a: std.Str) -> std.Str {\n    ret ident(a)\n}\n"
+    [main] = [module for module in program({"main.spp": code + "\nfn main() -> std.Void {\n}\n"}).compile() if module.name == "main"]
+    assert totals() == (2, 2)
+    assert sorted(name for name in definitions(main, "define") if "ident" in name) == ["main.ident#0[std.Num]", "main.ident#0[std.Str]"]
+
+
+def test_instantiation_in_declaring_module(program):
+    code = "mod main\n\nfn f(c: m1.C0, a: std.Num) -> std.Num {\n    ret c.get(a)\n}\n\nfn g(c: m1.C0, a: std.Num) -> std.Num {\n    ret c.get(a)\n}\n"
+    modules = {module.name: module for module in program({"main.spp": code + "\nfn main() -> std.Void {\n}\n", "m1\\m1.spp": M1}).compile()}
+    assert totals() == (2, 1)
+
+    name = "m1.m1.C0.get#0[std.Num]"
+    assert name in definitions(modules["m1.m1"], "define") and name not in definitions(modules["m1.m1"], "declare")
+    assert name in definitions(modules["main"], "declare") and name not in definitions(modules["main"], "define")
@@ -0,0 +1,49 @@
+import pytest
+
+from src.CodeGen.CodeGen import CodeGen
+
+# The keys of the object file cache (CodeGen.cache_keys): a module's object file is reused as long as its own source,
+# and the interfaces of the other modules, don't change.
+
+MAIN = """mod main
+
+fn g(c: m1.C0) -> std.Num {
+    ret 1
+}
+
+fn main() -> std.Void {
+}
+"""
+
+M1 = """mod m1.m1
+
+cls C0 {
+    x: std.Num
+    y: std.Num
+}
+
+fn f(a: std.Num) -> std.Num {
+    ret a
+}
+"""
+
+
+def cache_keys(program, m1: str) -> dict[str, str]:
+    semantics = program({"main.spp": MAIN, "m1\\m1.spp": m1}).analyse()
+    CodeGen.prepare(semantics.modules, semantics.scope_handler)
+    keys = CodeGen.cache_keys(semantics.modules, 0)
+    return {str(mod.module.identifier): key for (scope, mod), key in zip(semantics.modules, keys)}
+
+
+@pytest.mark.parametrize("m1, main_changes", [
+    (M1.replace("    y: std.Num\n", "    y: std.Num\n    z: std.Num\n"), True),
+    (M1.replace("fn f(a: std.Num)", "fn f(a: std.Num, b: std.Num)"), True),
+    (M1.replace("    ret a\n", "    ret a + 1\n"), False),
+])
+def test_imported_module_changes(program, m1, main_changes):
+    before = cache_keys(program, M1)
+    after = cache_keys(program, m1)
+    assert set(before) == {"main", "m1.m1", "std.std"}
+    assert after["m1.m1"] != before["m1.m1"]
+    assert (after["main"] != before["main"]) == main_changes
+    assert (after["std.std"] != before["std.std"]) == main_changes
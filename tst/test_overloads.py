@@ -0,0 +1,46 @@
+import pytest
+
+from src.SemanticAnalysis2.SemanticAnalysis import SemanticAnalysis
+from src.SyntacticAnalysis import Ast
+
+# Duplicate overload detection (SemanticAnalysis.analyse_function_overloads), on the function prototypes of a module.
+
+
+def prototypes(parse, code: str) -> list[Ast.FunctionPrototypeAst]:
+    ast = parse("mod main\n\n" + code)
+    return [member for member in ast.module.body.members if isinstance(member, Ast.FunctionPrototypeAst)]
+
+
+@pytest.mark.parametrize("code", [
+    "fn f(a: std.Num) -> std.Void {}\nfn f(a: std.Num) -> std.Void {}\n",
+    "fn f[T](a: T) -> std.Void {}\nfn f[U](a: U) -> std.Void {}\n",
+    "fn f(a: std.Num) -> std.Void {}\nfn f(b: std.Num) -> std.Num {}\n",
+    "fn f(a: std.Num) -> std.Void {}\nfn f(a: std.Num, b: std.Num = 1) -> std.Void {}\n",
+    "fn f(a: (std.Num, std.Bool)) -> std.Void {}\nfn f(a: (std.Num, std.Bool)) -> std.Void {}\n",
+])
+def test_duplicates(parse, code):
+    with pytest.raises(SystemExit, match="Duplicate function overloads"):
+        SemanticAnalysis.analyse_function_overloads(prototypes(parse, code))
+
+
+@pytest.mark.parametrize("code", [
+    "fn f(a: std.Num) -> std.Void {}\nfn f(a: std.Bool) -> std.Void {}\n",
+    "fn f(a: std.Num) -> std.Void {}\nfn f(a: std.Num, b: std.Num) -> std.Void {}\n",
+    "fn f(a: std.Num) -> std.Void {}\nfn f(a: &std.Num) -> std.Void {}\n",
+    "fn f(a: &std.Num) -> std.Void {}\nfn f(a: &mut std.Num) -> std.Void {}\n",
+    "fn f[T](a: T, b: std.Num) -> std.Void {}\nfn f[T](a: std.Num, b: T) -> std.Void {}\n",
+    "fn f[T, U](a: T, b: U) -> std.Void {}\nfn f[T](a: T, b: T) -> std.Void {}\n",
+    "fn f(a: std.Vec[std.Num]) -> std.Void {}\nfn f(a: std.Vec[std.Bool]) -> std.Void {}\n",
+    "fn f(a: (std.Num, std.Bool)) -> std.Void {}\nfn f(a: (std.Bool, std.Num)) -> std.Void {}\n",
+])
+def test_distinct_overloads(parse, code):
+    SemanticAnalysis.analyse_function_overloads(prototypes(parse, code))
+
+
+def test_tuple_index_parts(parse):
+    # A type's parts can be tuple indexes, which are compared by their value.
+    f, g = prototypes(parse, "fn f(a: std.Num) -> std.Void {}\nfn f(a: std.Num) -> std.Void {}\n")
+    f.parameters[0].type_annotation.parts.append(0)
+    g.parameters[0].type_annotation.parts.append(1)
+    assert SemanticAnalysis.overload_signature(f) != SemanticAnalysis.overload_signature(g)
+    SemanticAnalysis.analyse_function_overloads([f, g])
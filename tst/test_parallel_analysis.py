@@ -0,0 +1,119 @@
+import pytest
+
+from src.SemanticAnalysis2.SemanticAnalysis import SemanticAnalysis
+from src.SyntacticAnalysis import Ast
+
+# Analysing the function bodies in worker processes ("-j") must produce the same program as analysing them in order.
+
+MAIN = """mod main
+
+cls Point {
+    x: std.Num
+    y: std.Num
+}
+
+sup Point {
+    fn norm1(self) -> std.Num {
+        ret self.x + self.y
+    }
+    fn add(&self, other: Point) -> Point {
+        ret other
+    }
+}
+
+fn ident[T](a: T) -> T {
+    ret a
+}
+
+fn twice[U](a: U, n: std.Num) -> std.Num {
+    let x = ident(a)
+    if n < 0 {
+        true { ret 0 }
+    }
+    ret n + 1
+}
+
+fn sum_to(n: std.Num) -> std.Num {
+    let mut total = 0
+    let mut i = 0
+    while i < n {
+        total = i + total
+        i = i + 1
+    }
+    ret total
+}
+
+fn caller(n: std.Num, m: std.Num, k: std.Num) -> std.Num {
+    let a = ident(n)
+    let b = ident(true)
+    let c = twice(b, k)
+    ret twice(m, c)
+}
+
+fn points(a: std.Num, b: std.Num) -> std.Num {
+    let p = Point { x = a, y = b }
+    let q = Point { x = 1, y = 2 }
+    let r = p + q
+    ret r.norm1()
+}
+
+fn main() -> std.Void {
+}
+"""
+
+
+FUNCTION_ARGUMENTS = """mod main
+
+fn inc(x: std.Num) -> std.Num {
+    ret x + 1
+}
+
+fn apply(f: std.FnRef[std.Num, std.Num], x: std.Num) -> std.Num {
+    ret f(x)
+}
+
+fn main() -> std.Void {
+    let a = apply(inc, 2)
+}
+"""
+
+
+def compile_ir(program, jobs: int) -> list[str]:
+    SemanticAnalysis.JOBS = jobs
+    return [compiled_module.ir for compiled_module in program({"main.spp": MAIN}).compile()]
+
+
+def annotations(program, jobs: int) -> list[tuple[str, dict[str, str]]]:
+    # The overload selected by each call and binary expression in the main module, and the types that its generic
+    # parameters were bound to.
+    SemanticAnalysis.JOBS = jobs
+    semantics = program({"main.spp": MAIN}).analyse()
+    main = next(ast for scope, ast in semantics.modules if str(ast.module.identifier) == "main")
+    nodes = SemanticAnalysis.function_nodes(main.module)
+    calls = [node.op for node in nodes if isinstance(node, Ast.PostfixExpressionAst) and isinstance(node.op, Ast.PostfixFunctionCallAst)]
+    operators = [node for node in nodes if isinstance(node, Ast.BinaryExpressionAst)]
+    assert len(calls) == 6 and len(operators) == 7
+    return [(str(node._overload.meta_data["fn_proto"]), {str(g): str(ty) for g, ty in getattr(node, "generic_map", {}).items()}) for node in calls + operators]
+
+
+def test_same_annotations(program, monkeypatch):
+    # The calls analysed by the workers are annotated in this process too, so code generation doesn't resolve them
+    # again.
+    monkeypatch.setattr(SemanticAnalysis, "JOBS", 1)
+    assert annotations(program, 2) == annotations(program, 1)
+
+
+def test_same_ir(program, monkeypatch):
+    monkeypatch.setattr(SemanticAnalysis, "JOBS", 1)
+    expected = compile_ir(program, 1)
+    actual = compile_ir(program, 2)
+    assert actual == expected
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_first_error(program, monkeypatch, jobs):
+    # Calling a function-typed parameter isn't supported, and analysing "main" fails with an internal error, as the
+    # type of "inc" has no symbol. The first error in the program is reported either way.
+    monkeypatch.setattr(SemanticAnalysis, "JOBS", jobs)
+    with pytest.raises(SystemExit, match="Could not call function 'f'"):
+        program({"main.spp": FUNCTION_ARGUMENTS}).analyse()
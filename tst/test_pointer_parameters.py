@@ -0,0 +1,25 @@
+# The attributes of the parameters passed by pointer (CodeGen.llvm_function): only the "&mut" borrows and the moved
+# aggregates are "noalias", as "&" borrows of the same value can be passed together.
+
+MAIN = """mod main
+
+cls Point {
+    x: std.Num
+    y: std.Num
+}
+
+fn f(a: &Point, b: &mut Point, c: Point) -> std.Num {
+    ret 1
+}
+
+fn main() -> std.Void {
+}
+"""
+
+
+def test_noalias(program):
+    [main] = [module for module in program({"main.spp": MAIN}).compile() if module.name == "main"]
+    [define] = [line for line in main.ir.splitlines() if line.startswith('define double @"main.f')]
+    a, b, c = define.split("(", 1)[1].split(", ")
+    assert "noalias" not in a and "noalias" in b and "noalias" in c
+    assert all("nonnull" in parameter and "captures(none)" in parameter for parameter in (a, b, c))
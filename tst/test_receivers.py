@@ -0,0 +1,38 @@
+import pytest
+
+# The initialization check on the receiver of a member access or method call
+# (SemanticAnalysis.analyse_receiver_initialized).
+
+FUNCTIONS = """mod main
+
+cls Point {
+    x: std.Num
+    y: std.Num
+}
+
+fn f(a: std.Num) -> std.Num {
+    ret a
+}
+
+fn g(a: std.Num) -> Point {
+    ret Point { x = a, y = 1 }
+}
+
+"""
+
+
+@pytest.mark.parametrize("body", [
+    "fn h(a: std.Num, b: std.Num) -> std.Num {\n    ret f(a) + b\n}\n",
+    "fn h(a: std.Num) -> std.Num {\n    ret g(a).x\n}\n",
+])
+def test_call_result_receivers(program, body):
+    program({"main.spp": FUNCTIONS + body + "\nfn main() -> std.Void {\n}\n"}).analyse()
+
+
+@pytest.mark.parametrize("body", [
+    "fn h(a: std.Num, b: std.Num) -> std.Num {\n    let c = a\n    ret a + b\n}\n",
+    "fn h(a: std.Num) -> std.Num {\n    let p = g(a)\n    let q = p\n    ret p.x\n}\n",
+])
+def test_moved_receivers(program, body):
+    with pytest.raises(SystemExit, match="not initialized"):
+        program({"main.spp": FUNCTIONS + body + "\nfn main() -> std.Void {\n}\n"}).analyse()
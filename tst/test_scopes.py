@@ -0,0 +1,45 @@
+from src.SemanticAnalysis2.SymbolTable import ScopeHandler
+from src.SyntacticAnalysis import Ast
+
+# Moving between scopes (ScopeHandler.next_scope), either to the scope opened by an AST, or by walking the children of
+# the current scope in the order they were created in.
+
+
+def scope_handler() -> tuple[ScopeHandler, Ast.IdentifierAst]:
+    # A function scope, addressed by its AST, with two nested scopes that aren't, followed by another scope.
+    s = ScopeHandler()
+    function = Ast.IdentifierAst("f", 0)
+    s.enter_scope("f", ast=function)
+    s.enter_scope("if")
+    s.exit_scope()
+    s.enter_scope("while")
+    s.exit_scope()
+    s.exit_scope()
+    s.enter_scope("g")
+    s.exit_scope()
+    return s, function
+
+
+def test_addressed_scopes_are_visited():
+    s, function = scope_handler()
+    s.next_scope(function)
+    assert s.current_scope.name == "f"
+    s.next_scope()
+    assert s.current_scope.name == "if"
+    s.prev_scope()
+    s.prev_scope()
+
+    # Walking from the global scope skips the scope already moved to by its AST.
+    s.next_scope()
+    assert s.current_scope.name == "g"
+
+
+def test_switch_to_global_scope_resets_addressed_scopes():
+    s, function = scope_handler()
+    s.next_scope(function)
+    s.prev_scope()
+    s.switch_to_global_scope()
+    s.next_scope()
+    assert s.current_scope.name == "f"
+    s.next_scope()
+    assert s.current_scope.name == "if"
@@ -0,0 +1,82 @@
+from src.SemanticAnalysis2.SemanticAnalysis import SemanticAnalysis
+from src.SemanticAnalysis2.SymbolTable import ScopeHandler, SymbolTypes
+from src.SemanticAnalysis2.TypeInference import TypeInfer
+from src.SyntacticAnalysis import Ast
+
+# Rolling the scope tree back to a snapshot (ScopeHandler.snapshot and ScopeHandler.rollback), ie after speculatively
+# analysing a function body again.
+
+MAIN = """mod main
+
+fn h(a: std.Num) -> std.Num {
+    let b = a
+    ret b + 1
+}
+
+fn main() -> std.Void {
+}
+"""
+
+
+def function_h(program) -> tuple[ScopeHandler, Ast.FunctionPrototypeAst]:
+    # Analyse the program, and move to the scope of "h", whose parameter "a" has been moved into "b".
+    semantics = program({"main.spp": MAIN}).analyse()
+    main = next(ast for scope, ast in semantics.modules if str(ast.module.identifier) == "main")
+    h = next(node for node in SemanticAnalysis.function_nodes(main.module) if isinstance(node, Ast.FunctionPrototypeAst) and node.body.statements and isinstance(node.body.statements[0], Ast.LetStatementAst))
+    s = semantics.scope_handler
+    s.current_scope = s.scopes[h._scope_index]
+    return s, h
+
+
+def variable(s: ScopeHandler, name: str) -> SymbolTypes.VariableSymbol:
+    return s.current_scope.get_symbol(Ast.IdentifierAst(name, -1), SymbolTypes.VariableSymbol, error=False)
+
+
+def test_rollback(program):
+    s, h = function_h(program)
+    scope = s.current_scope
+    a = variable(s, "a")
+    symbols = scope.symbol_table.symbols.copy()
+    num_children = len(scope.children)
+    consume_ast = a.mem_info.consume_ast
+    assert not a.mem_info.is_initialized
+
+    # Nothing is copied until something changes, and then only what changes is recorded.
+    snapshot = s.snapshot()
+    assert not snapshot.tables and not snapshot.scopes and not snapshot.mem_infos
+
+    for _ in range(2):
+        a.mem_info.is_initialized = True
+        SemanticAnalysis.analyse_function_body(h, s)
+        s.current_scope.add_symbol(SymbolTypes.VariableSymbol(Ast.IdentifierAst("c", -1), Ast.TypeSingleAst([], -1)))
+        s.enter_scope("block")
+        s.exit_scope()
+        a.mem_info.is_borrowed_ref = True
+        assert variable(s, "c") and a.mem_info.is_borrowed_ref
+        assert list(snapshot.tables) == [scope.symbol_table]
+
+        # The same snapshot can be rolled back to more than once.
+        s.rollback(snapshot)
+        assert variable(s, "c") is None
+        assert scope.symbol_table.symbols == symbols and variable(s, "b") is symbols[hash(Ast.IdentifierAst("b", -1))]
+        assert len(scope.children) == num_children
+        assert not a.mem_info.is_initialized and not a.mem_info.is_borrowed_ref and a.mem_info.consume_ast is consume_ast
+
+    # Changes aren't recorded once the snapshot is released.
+    s.release(snapshot)
+    b = variable(s, "b")
+    b.mem_info.is_initialized = False
+    assert id(b.mem_info) not in snapshot.mem_infos
+
+
+def test_rollback_invalidates_cached_operators(program):
+    s, h = function_h(program)
+    operator = h.body.statements[-1].value
+    overload = TypeInfer.resolve_binary_operator(operator, s)
+    num_cached = len(TypeInfer.BINARY_OPERATORS)
+    assert TypeInfer.resolve_binary_operator(operator, s) == overload and len(TypeInfer.BINARY_OPERATORS) == num_cached
+
+    # The operator is resolved again after the rollback, as the overload it was resolved to might have been dropped.
+    s.rollback(s.snapshot())
+    assert TypeInfer.resolve_binary_operator(operator, s)[0] is overload[0]
+    assert len(TypeInfer.BINARY_OPERATORS) == num_cached + 1
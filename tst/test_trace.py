@@ -0,0 +1,31 @@
+import pytest
+
+from src.Compiler.Trace import Trace
+
+# A span that isn't traced doesn't build its name or arguments, and a traced one records them when it ends.
+
+
+def fail() -> str:
+    raise AssertionError("built while the trace is disabled")
+
+
+def test_disabled_span():
+    assert not Trace.ENABLED
+    with Trace.span(fail, "test", token=fail) as span:
+        assert span is None
+    assert Trace.span("a", "test") is Trace.span("b", "test")
+
+
+@pytest.fixture
+def trace():
+    Trace.start()
+    yield
+    Trace.stop()
+
+
+def test_enabled_span(trace):
+    with Trace.span(lambda: "lazy", "test", token=lambda: 3, module="m", file=None):
+        pass
+    [event] = [event for event in Trace.EVENTS if event["ph"] == "X"]
+    assert event["name"] == "lazy" and event["cat"] == "test" and event["dur"] >= 0
+    assert event["args"] == {"token": "3", "module": "m"}